@@ -1,5 +1,6 @@
 from PIL import Image, ImageDraw, ImageFont
 import os
+import sys
 
 # 1. 파일 설정 (파일명이 정확한지 꼭 확인하세요!)
 input_image_name = "독수리 심볼.jfif"  
@@ -50,4 +51,10 @@ else:
     
     # 6. 저장
     canvas.save(output_image_name)
-    print(f"✅ 완성! 폴더에 '{output_image_name}' 파일이 생겼습니다.")
\ No newline at end of file
+    print(f"✅ 완성! 폴더에 '{output_image_name}' 파일이 생겼습니다.")
+
+# 7. 웹용 에셋 빌드 (python LogoMaker.py --assets 일 때만): 앱이 프로세스당 한 번만 읽는 리사이즈 + WebP/PNG 최적화 버전 -> assets/ 폴더
+if __name__ == "__main__" and "--assets" in sys.argv[1:]:
+    from assets import build_assets
+    for path, before, after in build_assets():
+        print(f"🖼️ assets/{os.path.basename(path)}: {before / 1024:.0f}KB -> {after / 1024:.1f}KB")
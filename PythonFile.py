@@ -1,110 +1,43 @@
 import streamlit as st
-import FinanceDataReader as fdr
-import pandas as pd
 import numpy as np
-import cv2
 import os
-import base64
 import time
 from datetime import datetime
-import matplotlib.pyplot as plt
-from scipy.stats import pearsonr
-from sklearn.preprocessing import MinMaxScaler
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from streamlit_gsheets import GSheetsConnection 
 import json
+from patterns import PATTERN_DB
+from pattern_cache import get_pattern_features
+from scoring import minmax_rows, METHODS
+from assets import get_file_uri
+from sparklines import render_cards, pattern_svg
+from scan_engine import get_stock_list, TOP_K
+from prefilter import parse as parse_expr, build_expr, FilterReport
+from scan_scheduler import get_scheduler, scan_job, scan_key
+from timeframes import TIMEFRAMES
+from telemetry import ScanTrace, consume_profile_request, start_metrics_server, get_metrics
+from result_cache import get_result_cache, make_key, current_trading_day
+from license_cache import get_license_cache, hash_key, SheetSource, CSV_PATH as LICENSE_CSV, MSG_UNAVAILABLE
+from ui_static import TRANS, BASE_STYLE
 
 # --- 🔐 [인증 및 시크릿 설정] ---
 try:
     gs_info = st.secrets["gsheets"]
     spreadsheet_url = gs_info["spreadsheet"]
 except Exception as e:
-    st.error(f"초기 설정(secrets.toml) 읽기 오류: {e}")
-    st.stop()
+    if not LICENSE_CSV:  # ALPHACHART_LICENSE_CSV (로컬/테스트용 CSV) 를 쓰면 시트 설정 없이 실행
+        st.error(f"초기 설정(secrets.toml) 읽기 오류: {e}")
+        st.stop()
 
 # --- 🔐 [라이선스 확인 함수] ---
+def get_licenses():
+    # 프로세스 공용 라이선스 캐시 (시트는 백그라운드에서 주기적으로 다시 읽고, 확인은 해시 키 딕셔너리에서 O(1))
+    return get_license_cache(None if LICENSE_CSV else SheetSource(st.connection("gsheets", type=GSheetsConnection), spreadsheet_url))
+
 def check_license_from_sheet(input_key):
-    try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        df = conn.read(spreadsheet=spreadsheet_url, ttl=0)
-        if df is None or df.empty: return False, "시트 데이터를 가져오지 못했습니다.", None
-        df['license_key'] = df['license_key'].astype(str).str.strip()
-        user_row = df[df['license_key'] == str(input_key).strip()]
-        if not user_row.empty:
-            if str(user_row.iloc[0]['status']).lower() == 'active':
-                return True, "인증 성공", user_row.iloc[0]['expiry_date']
-            return False, "비활성화된 라이선스입니다.", None
-        return False, "유효하지 않은 라이선스 키입니다.", None
+    try: return get_licenses().check(input_key)
     except Exception as e:
         return False, f"연결 실패: {e}", None
 
-# --- 🌐 언어 데이터 팩 ---
-TRANS = {
-    "KR": {
-        "sidebar_header": "⚙️ 설정", "license_active": "✅ PRO 라이선스 활성", "license_info": "남은 기간: {}", "logout": "로그아웃 / 리셋",
-        "current_free": "현재: 무료 버전 (Free)", "license_input": "🔑 라이선스 키 입력", "confirm": "인증 확인", "cancel": "취소",
-        "checking": "라이선스 확인 중...", "market_select": "시장 선택", "limit_search": "검색 범위 제한 (전체 {:,}개 중)",
-        "limit_search_free": "검색 범위 제한 (시가총액 상위 {:,}개 중)", "pro_active_msg": "✅ PRO 활성화: {}개 정밀 스캔 가능",
-        "free_limit_msg": "🔒 무료 버전은 시가총액 상위 300개만 스캔 가능", "filter_detail": "🎯 상세 필터 설정 (눌러서 열기)",
-        "filter_bullish": "마지막(최근) 캔들 양봉(상승)만 보기", "filter_doji": "마지막(최근) 캔들 도지(십자가)만 보기",
-        "filter_hammer": "마지막 캔들 양봉/도지이면서 아래꼬리 아주 긴 것(망치형)", "period_set_caption": "⏱️ 분석 기간 설정",
-        "period_info_fmt": "💠 **[{}]** 기준: AI가 차트에서 **오늘부터 과거 {}일** 치 패턴을 자동 인식하여 분석합니다.",
-        "section1_title": "### 🧬 1. AlphaChart AI 에 기본 장착된 패턴 모델 선택 <span style='font-size:16px; color:#64748b; font-weight:normal;'>(차트매매 대가들이 사용)</span>",
-        "btn_upgrade_view": "👑 PRO 업그레이드 옵션 보기", "btn_close": "닫기",
-        "lbl_sub_title": "💎 월 정기구독", "lbl_sub_badge": "10% 할인", "lbl_one_title": "🎫 단기 이용권 구매",
-        "lbl_day_pass": "1일 이용권", "lbl_month_pass": "1개월 이용권",
-        "guide_html": """<div style="background-color: #e8f4f8; padding: 15px; border-radius: 10px; line-height: 1.6; color: #333;">이 패턴들은 상승 지속형 6개, 하락에서 반등형 9개이며 하락 경직 또는 눌림목 상태이므로,<br>내일 또는 모레 매수해도 단타나 스윙으로 성공할 확률이 높은 대표적인 모델입니다.<br><br>단, 기업가치, 거래량, 뉴스, 공시 등 내재가치와 외부환경은 매매 전에 함께 고려해야 할 것입니다.<br><br>물론, 복잡한 내재와 외부를 고려하지 않고 그냥 매수해도 안전할 확률이 높은 편이지만,<br>돌다리도 두드리고 건널 필요는 있겠지요.<br><br>자! 이제, <span class="mission-highlight">도플갱어를 찾은 후 최종 선택</span>은 여러분의 몫입니다.</div>""",
-        "section2_title": "### 🖼️ 2. 또는 나만의 차트 업로드", "upload_label": "이미지 파일 업로드 (jpg, png)", "upload_caption": "이동평균선 등을 제외하고 캔들차트만 있을수록 정확합니다.",
-        "ai_analysis_badge": "🔍 AI 분석", "ai_pattern_shape": "AI Pattern Shape", "candles_detected": "캔들 <b>{}</b>개 인식됨", "pro_only_model": "🔒 PRO 전용 모델입니다.",
-        "btn_analyze": "🚀 [{}] 분석 시작", "error_pro_only": "PRO 전용 패턴입니다. 업그레이드 후 이용해 주세요.", "error_no_file": "이미지를 분석할 수 없습니다. 파일을 확인해 주세요.",
-        "scanning_msg": "최적의 도플갱어 종목을 스캔 중입니다... {}", "result_title": "### 🏆 분석 결과 (80% 이상 일치: {}개)", "no_result": "80% 이상 일치하는 종목을 찾지 못했습니다.",
-        "chart_view": "📈 차트 보기", "pc_chart": "💻 PC용 차트", "mo_chart": "📱 모바일용 차트", "locked_msg": "🔒 TOP 6위 이후 결과 및 전종목 정밀 스캔은<br>PRO 버전에서 확인 가능합니다.",
-        "mission_html": """<div class="mission-box">먼저, <span class="mission-highlight">AlphaChart의 미션</span>은 급등주, 대박주를 찾아 투자하도록 돕는 것이 아닙니다. 그런 차트들은 통계적으로 유의하지 않기 때문입니다.<br>즉, 그동안의 급등주, 대박주들의 패턴이 일정하지 않아 성공률이 낮습니다.<br>AlphaChart의 미션은 내일이나 모레 몇프로라도 상승할 확률이 높고 안전한 종목을 찾는 것입니다.<br>안전하다는 것은, 상승 패턴에서는 <span class="mission-highlight">상승이 유지되는 상태</span>, 하락 패턴에서는 드디어 <span class="mission-highlight">상승으로 전환하기 직전</span>의 상태를 말합니다.<br><br>오랜 주식 거래의 경험과 반복을 통해, 캔들의 단순한 형태보다는 수거래일 동안의 <span class="mission-highlight">추세와 마지막 몇개의 캔들 형태를 함께 보는 것</span>이 중요하다는 사실이 수많은 연구자와 투자자들로부터 검증되어 왔습니다.<br><br>이러한 과거의 패턴을 통한 단기의 패턴 예측, 그 중에서도 오늘까지의 차트를 보고 내일의 캔들 형태와 방향을 알고 싶습니다. 그래서, 일일이 상장된 모든 종목을 찾아서 내가 원하는 차트와 유사한 종목을 찾고, 증권사의 프로그램을 통해 원하는 그림을 그리거나 조건을 입력해서 검색해 왔죠. 그러나 무겁고 불편하고 부정확했습니다.<br><br>이제 <span class="mission-highlight">AlphaChart AI</span>가 몇 분만에 도플갱어 종목들을 찾아줄 수 있습니다.<br><br>또, 많은 시행착오를 통해 차트 매매의 대가들이 정립해 놓은 검증된 패턴들을 기본 장착하여, 사용자가 일일이 관심 차트를 찾아 업로드 하지 않아도, 내일이나 모레 매수 할 만한 종목 후보군을 찾을 수 있게 되었습니다.<br><br>차트 매매를 주로 하시는 데이 트레이더, 기업가치와 함께 차트를 같이 보시는 단중기 트레이더 모두 AlphaChart AI를 통해 불필요한 시간 낭비 없이, <span class="mission-highlight">투자의 성공확률을 극대화</span> 하시길 기원합니다.<br><br>세계인이 함께 쓰는 글로벌 서칭 시스템으로서 과부하를 막고 양질의 결과를 도출하기 위해, 부득이 무료버전은 기능을 제한하고 있습니다.<br>추후 서버 증설 등 투자 확대를 통해 무료 범위를 확대할 계획이니 너그러이 양해 부탁드립니다. <br><br>원하는 차트의 도플갱어가 어쩌면 매일 나오지는 않을 수도 있습니다. 하지만 성공률을 높이는 것이 중요하니 또 내일을 기다리면 됩니다.<br><br>앞으로, 위에서 매도해야 하는 패턴도 제공할 계획이며, 계속해서<span class="mission-highlight"> 혁신적인 인사이트</span>를 제시하겠습니다. 감사합니다.</div>"""
-    },
-    "EN": {
-        "sidebar_header": "⚙️ Settings", "license_active": "✅ PRO License Active", "license_info": "Remaining: {}", "logout": "Logout / Reset",
-        "current_free": "Current: Free Version", "license_input": "🔑 Enter License Key", "confirm": "Verify", "cancel": "Cancel",
-        "checking": "Verifying...", "market_select": "Select Market", "limit_search": "Search Limit (Scanning {:,} stocks)",
-        "limit_search_free": "Search Limit (Top {:,} Market Cap)", "pro_active_msg": "✅ PRO Active: Precision scan of {} stocks",
-        "free_limit_msg": "🔒 Free version scans top 300 market cap only", "filter_detail": "🎯 Advanced Filters (Click to expand)",
-        "filter_bullish": "Last candle must be Bullish (Green/Red)", "filter_doji": "Last candle must be Doji (Cross)",
-        "filter_hammer": "Last candle Bullish/Doji with Very Long Lower Shadow (Hammer)", "period_set_caption": "⏱️ Analysis Period",
-        "period_info_fmt": "💠 Based on **[{}]**: AI automatically detects and analyzes the pattern of **past {} days from today**.",
-        "section1_title": "### 🧬 1. Select AI Built-in Patterns <span style='font-size:16px; color:#64748b; font-weight:normal;'>(Used by Master Traders)</span>",
-        "btn_upgrade_view": "👑 View PRO Upgrade Options", "btn_close": "Close",
-        "lbl_sub_title": "💎 Monthly Subscription", "lbl_sub_badge": "10% OFF", "lbl_one_title": "🎫 1 Day / 1 Month Pass",
-        "lbl_day_pass": "1 Day Pass", "lbl_month_pass": "1 Month Pass",
-        "guide_html": """<div style="background-color: #e8f4f8; padding: 15px; border-radius: 10px; line-height: 1.6; color: #333;">These patterns consist of 6 bullish continuation types and 9 reversal-from-bottom types. As they represent a state of consolidated decline or pullback,<br>they are representative models with a high probability of success for day or swing trading, even if bought tomorrow or the day after.<br><br>However, intrinsic values and external environments such as corporate value, trading volume, news, and disclosures should be considered together before trading.<br><br>Of course, the probability of safety is high even if you buy without considering complex internal and external factors,<br>but it is necessary to look before you leap.<br><br>Now! After finding the doppelganger, <span class="mission-highlight">the final choice</span> is yours.</div>""",
-        "section2_title": "### 🖼️ 2. Or Upload Your Own Chart", "upload_label": "Upload Image (jpg, png)", "upload_caption": "Accuracy improves if only candlestick charts are present (exclude Moving Averages, etc).",
-        "ai_analysis_badge": "🔍 AI Analysis", "ai_pattern_shape": "AI Pattern Shape", "candles_detected": "<b>{}</b> Candles Detected", "pro_only_model": "🔒 PRO Version Only.",
-        "btn_analyze": "🚀 Start Analysis [{}]", "error_pro_only": "This is a PRO pattern. Please upgrade to use.", "error_no_file": "Cannot analyze image. Please check the file.",
-        "scanning_msg": "Scanning for optimal doppelgangers... {}", "result_title": "### 🏆 Analysis Results (Found {} stocks > 80%)", "no_result": "No stocks found with > 80% similarity.",
-        "chart_view": "📈 View Chart", "pc_chart": "💻 PC Chart", "mo_chart": "📱 Mobile Chart", "locked_msg": "🔒 Results from Top 6 onwards & Full Scan<br>available in PRO Version.",
-        "mission_html": """<div class="mission-box">First of all, <span class="mission-highlight">AlphaChart's mission</span> is not to help you find skyrocketing or jackpot stocks. This is because such charts are not statistically significant.<br>In other words, the patterns of past jackpot stocks are inconsistent, resulting in a low success rate.<br>AlphaChart's mission is to find safe stocks with a high probability of rising even a few percent tomorrow or the day after.<br>Being safe means a state where <span class="mission-highlight">the rise is maintained</span> in an upward pattern, or a state <span class="mission-highlight">just before turning into a rise</span> in a downward pattern.<br><br>Through extensive experience and repetition in stock trading, it has been verified by numerous researchers and investors that it is more important to look at the <span class="mission-highlight">trend over several trading days combined with the shape of the last few candles</span> rather than the simple shape of a single candle.<br><br>Through predicting short-term patterns using these past patterns, we specifically want to know tomorrow's candle shape and direction based on the chart up to today. Previously, we had to manually search through all listed stocks to find similar charts, or use heavy and inaccurate PC programs to draw patterns or input conditions. However, it was heavy, inconvenient, and inaccurate.<br><br>Now, <span class="mission-highlight">AlphaChart AI</span> can find doppelganger stocks in just a few minutes.<br><br>Also, by equipping verified patterns established by chart trading masters through many trials and errors, you can now find candidate stocks to buy tomorrow or the day after without uploading your own chart.<br><br>We hope that both day traders and short-to-medium term traders who look at charts alongside corporate value will <span class="mission-highlight">maximize their success probability</span> without wasting unnecessary time through AlphaChart AI.<br><br>As a global searching system used by people around the world, we inevitably limit the features of the free version to prevent server overload and ensure high-quality results.<br>We plan to expand the free scope through future investments such as server expansion, so we ask for your generous understanding.<br><br>A doppelganger of the chart you want may not appear every day. However, it is important to increase the success rate, so you can just wait for tomorrow.<br><br>We plan to provide patterns for selling at the top in the future, and we will continue to present <span class="mission-highlight">innovative insights</span>. Thank you.</div>"""
-    },
-    "JP": {
-        "sidebar_header": "⚙️ 設定", "license_active": "✅ PROライセンス有効", "license_info": "残り期間: {}", "logout": "ログアウト / リセット",
-        "current_free": "現在: 無料版 (Free)", "license_input": "🔑 ライセンスキー入力", "confirm": "確認", "cancel": "キャンセル",
-        "checking": "確認中...", "market_select": "市場選択", "limit_search": "検索範囲制限 (全体 {:,} 銘柄中)",
-        "limit_search_free": "検索範囲制限 (時価総額上位 {:,} 銘柄)", "pro_active_msg": "✅ PRO有効化: {}銘柄 精密スキャン",
-        "free_limit_msg": "🔒 無料版は時価総額上位300銘柄のみスキャン可能", "filter_detail": "🎯 詳細フィルタ設定 (クリックして展開)",
-        "filter_bullish": "直近ローソク足が「陽線」のみ", "filter_doji": "直近ローソク足が「十字線(同時線)」のみ",
-        "filter_hammer": "直近ローソク足が陽線/十字で下ヒゲが非常に長いもの (ハンマー)", "period_set_caption": "⏱️ 分析期間設定",
-        "period_info_fmt": "💠 **[{}]** 基準: AIがチャートから **今日から過去{}日分** のパターンを自動認識して分析します。",
-        "section1_title": "### 🧬 1. AlphaChart AI 搭載のパターンモデルを選択 <span style='font-size:16px; color:#64748b; font-weight:normal;'>(チャート売買の大家たちが使用)</span>",
-        "btn_upgrade_view": "👑 PROアップグレードオプションを見る", "btn_close": "閉じる",
-        "lbl_sub_title": "💎 月額定期購読", "lbl_sub_badge": "10%割引", "lbl_one_title": "🎫 1日 / 1ヶ月利用券",
-        "lbl_day_pass": "1日 利用券", "lbl_month_pass": "1ヶ月 利用券",
-        "guide_html": """<div style="background-color: #e8f4f8; padding: 15px; border-radius: 10px; line-height: 1.6; color: #333;">これらのパターンは上昇持続型6つ、下落からの反発型9つであり、下落硬直または押し目買いの状態にあるため、<br>明日や明後日に購入してもデイトレやスイングトレードで成功する確率が高い代表的なモデルです。<br><br>ただし、企業価値、出来高、ニュース、開示情報などの本質的価値と外部環境は、売買前に併せて考慮する必要があります。<br><br>もちろん、複雑な内外要因を考慮せずに購入しても安全である確率は高い方ですが、<br>石橋を叩いて渡る必要はあるでしょう。<br><br>さあ！ドッペルゲンガーを見つけた後の<span class="mission-highlight">最終選択</span>は、あなたの役割です。</div>""",
-        "section2_title": "### 🖼️ 2. または自分のチャートをアップロード", "upload_label": "画像ファイルアップロード (jpg, png)", "upload_caption": "移動平均線などを除き、ローソク足チャートのみであるほど正確です。",
-        "ai_analysis_badge": "🔍 AI分析", "ai_pattern_shape": "AI Pattern Shape", "candles_detected": "ローソク足 <b>{}</b>本 認識", "pro_only_model": "🔒 PRO専用モデルです。",
-        "btn_analyze": "🚀 [{}] 分析開始", "error_pro_only": "PRO専用パターンです。アップグレードしてご利用ください。", "error_no_file": "画像を分析できません。ファイルを確認してください。",
-        "scanning_msg": "最適なドッペルゲンガー銘柄をスキャン中... {}", "result_title": "### 🏆 分析結果 (80%以上一致: {}件)", "no_result": "80%以上一致する銘柄が見つかりませんでした。",
-        "chart_view": "📈 チャートを見る", "pc_chart": "💻 PC用チャート", "mo_chart": "📱 モバイル用チャート", "locked_msg": "🔒 6位以降の結果および全銘柄スキャンは<br>PROバージョンで確認可能です。",
-        "mission_html": """<div class="mission-box">まず、<span class="mission-highlight">AlphaChartのミッション</span>は、急騰株や大化け株を探して投資を助けることではありません。そのようなチャートは統計的に有意ではないためです。<br>つまり、これまでの急騰株や大化け株のパターンは一定しておらず、成功率が低いのです。<br>AlphaChartのミッションは、明日や明後日に数パーセントでも上昇する確率が高く、安全な銘柄を見つけることです。<br>安全とは、上昇パターンでは<span class="mission-highlight">上昇が維持されている状態</span>、下落パターンではついに<span class="mission-highlight">上昇に転じる直前</span>の状態を指します。<br><br>長年の株式取引の経験と反復を通じて、単なるローソク足の形よりも、数取引日間の<span class="mission-highlight">トレンドと最後の数本のローソク足の形を共に見ること</span>が重要であるという事実が、数多くの研究者や投資家によって検証されてきました。<br><br>このような過去のパターンを通じた短期パターン予測、その中でも私たちは今日までのチャートを見て、明日のローソク足の形と方向を知りたいのです。これまでは、上場されている全銘柄から自分が望むチャートと類似した銘柄を手作業で探したり、証券会社の重いプログラムを使って絵を描いたり条件を入力して検索してきました。しかし、それは重くて不便で、不正確でした。<br><br>今や<span class="mission-highlight">AlphaChart AI</span>が数分でドッペルゲンガー銘柄を見つけ出します。<br><br>また、多くの試行錯誤を経てチャート売買の大家たちが確立した検証済みのパターンを基本搭載しており、ユーザーがわざわざ関心のあるチャートを探してアップロードしなくても、明日や明後日に購入すべき銘柄候補群を見つけることができます。<br><br>チャート売買を主とするデイトレーダーの方も、企業価値と共にチャートを見るスイングトレーダーの方も、AlphaChart AIを通じて不必要な時間の浪費なく、<span class="mission-highlight">投資の成功確率を最大化</span>されることを祈念いたします。<br><br>世界中の人々が共に使用するグローバルサーチングシステムとして、過負荷を防ぎ良質な結果を導き出すために、やむを得ず無料版は機能を制限しております。<br>今後、サーバー増設などの投資拡大を通じて無料範囲を拡大する計画ですので、何卒寛大なご理解をお願い申し上げます。<br><br>ご希望のチャートのドッペルゲンガーは、毎日現れるわけではないかもしれません。しかし、成功率を高めることが重要ですので、また明日を待てばよいのです。<br><br>今後、高値で売却すべきパターンも提供する計画であり、引き続き<span class="mission-highlight">革新的なインサイト</span>を提示してまいります。ありがとうございます。</div>"""
-    }
-}
-
 # --- 🔐 라이선스 및 세션 관리 ---
 if 'is_pro' not in st.session_state: st.session_state.is_pro = False
 if 'show_license_input' not in st.session_state: st.session_state.show_license_input = False
@@ -112,6 +45,14 @@ if 'show_pricing' not in st.session_state: st.session_state.show_pricing = False
 if 'detected_period' not in st.session_state: st.session_state.detected_period = 20
 if 'lang' not in st.session_state: st.session_state.lang = "KR"
 if 'license_expiry_msg' not in st.session_state: st.session_state.license_expiry_msg = ""
+if 'license_hash' not in st.session_state: st.session_state.license_hash = None
+
+# 로그인한 세션도 재실행마다 다시 확인 (만료/해지/비활성화는 시트 갱신을 기다리지 않고 바로 무료로 전환)
+if st.session_state.is_pro and st.session_state.license_hash:
+    try: lic_ok, lic_msg, _ = get_licenses().check_hash(st.session_state.license_hash)
+    except Exception: lic_ok, lic_msg = True, MSG_UNAVAILABLE
+    if not lic_ok and lic_msg != MSG_UNAVAILABLE:
+        st.session_state.is_pro = False; st.session_state.license_hash = None; st.session_state.license_expiry_msg = ""; st.session_state.license_notice = lic_msg
 
 with st.sidebar:
     lang_choice = st.selectbox("🌐 Language", ["🇰🇷 Korean (한국어)", "🇺🇸 English", "🇯🇵 Japanese (日本語)"])
@@ -127,9 +68,10 @@ with st.sidebar:
         if st.session_state.license_expiry_msg: st.caption(t['license_info'].format(st.session_state.license_expiry_msg))
         if st.button(t['logout'], use_container_width=True):
             st.session_state.is_pro = False; st.session_state.show_license_input = False; st.session_state.license_expiry_msg = ""
-            st.session_state.show_pricing = False; st.rerun()
+            st.session_state.license_hash = None; st.session_state.show_pricing = False; st.rerun()
     else:
         st.info(t['current_free'])
+        if st.session_state.get('license_notice'): st.warning(st.session_state.pop('license_notice'))
         if not st.session_state.show_license_input:
             if not st.session_state.show_pricing:
                 if st.button(t['btn_upgrade_view'], type="primary", use_container_width=True):
@@ -203,6 +145,7 @@ with st.sidebar:
                         is_valid, msg, expiry_info = check_license_from_sheet(input_key)
                         if is_valid:
                             st.session_state.is_pro = True; st.session_state.show_license_input = False; st.session_state.license_expiry_msg = expiry_info
+                            st.session_state.license_hash = hash_key(input_key)
                             st.success(f"Welcome! ({expiry_info})"); time.sleep(1.5); st.rerun()
                         else: st.error(msg)
                 if c_btn2.button(t['cancel'], use_container_width=True):
@@ -216,25 +159,13 @@ t = TRANS[st.session_state.lang]
 debug_code = None 
 
 # --- 🎯 [설정] ---
-FREE_SYMBOL_URL = "https://raw.githubusercontent.com/kimjeantag-a11y/alphachart-ai/main/candlestick_ai_symbol.png"
-PRO_SYMBOL_FILE = "독수리 심볼.jfif"
-RAW_PATTERN_DB = {
-    "A": {"file": "장대양봉 허리 지지 상승.jpg", "name_KR": "A. 장대양봉 허리 지지 상승", "name_EN": "A. Long Bullish Support", "name_JP": "A. 大陽線の腰押し支持上昇", "locked": False, "type": "A"},
-    "B": {"file": "급락후 바닥에서 반등.jpg", "name_KR": "B. 급락후\n 바닥에서 반등", "name_EN": "B. Rebound after Plunge", "name_JP": "B. 急落後の底値反発", "locked": False, "type": "B"}, 
-    "C": {"file": "큰하락 후 정배열 상승1파(컵위드핸들).jpg", "name_KR": "C. 큰하락 후\n 정배열 상승1파\n(컵위드핸들)", "name_EN": "C. 1st Wave after Drop\n(Cup w/ Handle)", "name_JP": "C. 大暴落後の整列上昇1波\n(カップ・ウィズ・ハンドル)", "locked": False, "type": "Custom"},
-    "D": {"file": "큰하락 후 정배열 상승2파(컵위드핸들).jpg", "name_KR": "D. 큰하락 후\n 정배열 상승2파\n(컵위드핸들)", "name_EN": "D. 2nd Wave after Drop\n(Cup w/ Handle)", "name_JP": "D. 大暴落後の整列上昇2波\n(カップ・ウィズ・ハンドル)", "locked": not IS_PRO, "type": "Custom"},
-    "E": {"file": "큰하락 후 정배열 상승3파(컵위드핸들).jpg", "name_KR": "E. 큰하락 후\n 정배열 상승3파\n(컵위드핸들)", "name_EN": "E. 3rd Wave after Drop\n(Cup w/ Handle)", "name_JP": "E. 大暴落後の整列上昇3波\n(カップ・ウィズ・ハンドル)", "locked": not IS_PRO, "type": "Custom"},
-    "F": {"file": "적당한 하락 후 정배열 상승(컵위드핸들2형).jpg", "name_KR": "F. 적당한 하락 후 정배열 상승\n(컵위드핸들2형)", "name_EN": "F. Rise after Mild Drop\n(Cup w/ Handle Type 2)", "name_JP": "F. 適度な下落後の整列上昇\n(カップ・ウィズ・ハンドル2型)", "locked": not IS_PRO, "type": "Custom"},
-    "G": {"file": "적당한 하락 후 정배열 상승2(컵위드핸들2형).jpg", "name_KR": "G. 적당한 하락 후 정배열 상승2\n(컵위드핸들2형)", "name_EN": "G. Rise after Mild Drop 2\n(Cup w/ Handle Type 2)", "name_JP": "G. 適度な下落後の整列上昇2\n(カップ・ウィズ・ハンドル2型)", "locked": not IS_PRO, "type": "Custom"},
-    "H": {"file": "쌍바닥(완만).jpg", "name_KR": "H. 쌍바닥(완만)", "name_EN": "H. Double Bottom (Gentle)", "name_JP": "H. 二重底 (緩やか)", "locked": not IS_PRO, "type": "Custom"},
-    "I": {"file": "쌍바닥(급경사).jpg", "name_KR": "I. 쌍바닥(급경사)", "name_EN": "I. Double Bottom (Steep)", "name_JP": "I. 二重底 (急勾配)", "locked": not IS_PRO, "type": "Custom"},
-    "J": {"file": "쌍바닥(상승전 시작점).jpg", "name_KR": "J. 쌍바닥\n(상승전 시작점)", "name_EN": "J. Double Bottom (Start of Rise)", "name_JP": "J. 二重底 (上昇開始点)", "locked": not IS_PRO, "type": "Custom"},
-    "K": {"file": "급락후 연속 도지.jpg", "name_KR": "K. 급락후\n 연속 도지", "name_EN": "K. Doji after Plunge", "name_JP": "K. 急落後の連続十字線", "locked": not IS_PRO, "type": "Custom"},
-    "L": {"file": "횡보, 급락후 바닥확인.jpg", "name_KR": "L. 횡보, 급락후 바닥확인", "name_EN": "L. Bottom Check after Flat & Plunge", "name_JP": "L. 横ばい・急落後の底値確認", "locked": not IS_PRO, "type": "Custom", "fixed_period": 13},
-    "M": {"file": "하락 횡보, 급락후 반등.jpg", "name_KR": "M. 하락 횡보,\n 급락후 반등", "name_EN": "M. Bullish after Drop & Flat", "name_JP": "M. 下落横ばい、急落後の陽線", "locked": not IS_PRO, "type": "Custom", "fixed_period": 29},
-    "N": {"file": "장기횡보, 급락후 바닥확인 연속캔들.jpg", "name_KR": "N. 장기횡보,\n 급락후 바닥확인\n 연속캔들", "name_EN": "N. Bottom Check Candles\nafter Long Flat & Plunge", "name_JP": "N. 長期横ばい、急落後の\n底値確認連続ローソク足", "locked": not IS_PRO, "type": "Custom"},
-    "O": {"file": "3중바닥.jpg", "name_KR": "O. 3중바닥", "name_EN": "O. Triple Bottom", "name_JP": "O. 三重底 (トリプルボトム)", "locked": not IS_PRO, "type": "Custom"}
-}     
+SCAN_PROCESSES = int(os.environ.get("ALPHACHART_SCAN_PROCESSES", "0"))  # PRO 전종목 스캔용 프로세스 수 (0 = 스레드 모드)
+start_metrics_server()  # ALPHACHART_METRICS_PORT 가 있으면 /metrics 노출 (프로세스당 한 번)
+EARLY_STOP_SIM = float(os.environ["ALPHACHART_EARLY_STOP_SIM"]) if os.environ.get("ALPHACHART_EARLY_STOP_SIM") else None  # 표시 개수(무료 5 / PRO 100)가 이 점수 이상으로 차면 스캔 조기 종료 (미설정 = 끝까지)
+LISTING_TTL = 6 * 3600  # 상장 종목표 재조회 주기 (초) - 신규 상장/시가총액 순서 반영
+FREE_SYMBOL_FILE = "candlestick_ai_symbol.png"  # assets.ASSETS 의 free_symbol 원본
+PRO_SYMBOL_FILE = "독수리 심볼.jfif"  # assets.ASSETS 의 pro_symbol 원본 (python assets.py 가 assets/ 에 최적화 버전 생성)
+RAW_PATTERN_DB = {k: dict(p, locked=p['pro'] and not IS_PRO) for k, p in PATTERN_DB.items()}
     
 if 'selected_key' not in st.session_state: st.session_state.selected_key = "A"
 def update_pattern(key): st.session_state.selected_key = key
@@ -244,22 +175,23 @@ theme_color = "#fbbf24" if IS_PRO else "#38bdf8"
 bg_gradient = "linear-gradient(135deg, #1e293b 0%, #000000 100%)" if IS_PRO else "linear-gradient(135deg, #0f172a 0%, #334155 100%)"
 symbol_style = "border: 4px solid #fbbf24; border-radius: 50%; box-shadow: 0 0 25px rgba(251, 191, 36, 0.6); animation: dynamic-pulse 2s infinite;" if IS_PRO else "animation: dynamic-pulse 2.5s infinite;"
 
-st.markdown(f"""<style>@import url('https://fonts.googleapis.com/css2?family=Pretendard:wght@400;700;800;900&display=swap'); * {{ font-family: 'Pretendard', sans-serif; }} .stApp {{ background-color: #f8fafc; color: #1e293b; }} @keyframes dynamic-pulse {{ 0% {{ transform: translateY(0px) scale(1); filter: drop-shadow(0 5px 15px rgba(56, 189, 248, 0.4)); }} 50% {{ transform: translateY(-8px) scale(1.03); filter: drop-shadow(0 15px 25px rgba(56, 189, 248, 0.7)); }} 100% {{ transform: translateY(0px) scale(1); filter: drop-shadow(0 5px 15px rgba(56, 189, 248, 0.4)); }} }} .symbol-img {{ {symbol_style} width: 160px; height: 160px; object-fit: cover; margin-bottom: 15px; background: white; }} .brand-container {{ display: flex; flex-direction: column; align-items: center; justify-content: center; background: {bg_gradient}; padding: 60px 15px 50px 15px; border-radius: 24px; color: white; margin-bottom: 1.5rem; box-shadow: 0 10px 40px rgba(0,0,0,0.2); text-align: center; margin-top: -60px; border: {'2px solid #fbbf24' if IS_PRO else 'none'}; }} @media (max-width: 768px) {{ [data-testid="stSidebarCollapsedControl"] {{ background: linear-gradient(45deg, #FFD700, #FF8C00) !important; border-radius: 50% !important; border: 2px solid white !important; width: 3.5rem !important; height: 3.5rem !important; box-shadow: 0 0 15px rgba(255, 215, 0, 0.9) !important; top: 0.5rem !important; left: 0.5rem !important; animation: attention-pulse 1.5s infinite !important; display: flex !important; align-items: center !important; justify-content: center !important; z-index: 999999 !important; }} [data-testid="stSidebarCollapsedControl"] svg {{ fill: black !important; stroke: black !important; width: 2rem !important; height: 2rem !important; }} .mobile-guide-text {{ position: fixed; top: 1.2rem; left: 4.5rem; color: #b45309; font-weight: 900; font-size: 14px; z-index: 999999; background: rgba(255, 255, 255, 0.95); padding: 6px 12px; border-radius: 20px; border: 2px solid #fbbf24; box-shadow: 0 4px 10px rgba(0,0,0,0.15); animation: text-pulse 2s infinite; pointer-events: none; }} }} @media (min-width: 769px) {{ .mobile-guide-text {{ display: none; }} }} @keyframes attention-pulse {{ 0% {{ transform: scale(1); box-shadow: 0 0 0 0 rgba(251, 191, 36, 0.7); }} 70% {{ transform: scale(1.15); box-shadow: 0 0 0 15px rgba(251, 191, 36, 0); }} 100% {{ transform: scale(1); box-shadow: 0 0 0 0 rgba(251, 191, 36, 0); }} }} @keyframes text-pulse {{ 0% {{ transform: scale(1); box-shadow: 0 0 0 0 rgba(251, 191, 36, 0.4); }} 50% {{ transform: scale(1.05); box-shadow: 0 0 10px rgba(251, 191, 36, 0.2); }} 100% {{ transform: scale(1); box-shadow: 0 0 0 0 rgba(251, 191, 36, 0.4); }} }} div.stButton > button {{ width: 100%; min-height: 4.5rem; height: auto; white-space: pre-wrap !important; word-wrap: break-word; line-height: 1.4 !important; padding: 8px 5px !important; vertical-align: middle; font-size: 14px !important; }} .pro-badge {{ background: #fbbf24; color: black; font-weight: 900; padding: 2px 8px; border-radius: 4px; font-size: 14px; vertical-align: middle; margin-left: 10px; }} .upgrade-pro-btn {{ display: inline-block; padding: 15px 50px; margin-top: 25px; background: linear-gradient(135deg, #fbbf24 0%, #f59e0b 100%); color: #000 !important; font-weight: 900; font-size: 20px; text-decoration: none; border-radius: 50px; border: 2px solid #ffffff; transition: transform 0.2s; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }} .upgrade-pro-btn:hover {{ transform: scale(1.05); box-shadow: 0 6px 8px rgba(0,0,0,0.2); }} .mission-box {{ background: white; padding: 25px; border-radius: 15px; border: 1px solid #e2e8f0; margin-bottom: 1.5rem; line-height: 1.8; color: #334155; font-size: 17px; word-break: keep-all; overflow-wrap: break-word; }} .mission-highlight {{ color: {'#b45309' if IS_PRO else '#0284c7'}; font-weight: 800; }} .pattern-info {{ font-size: 16px; color: #334155; line-height: 1.7; background: #f1f5f9; padding: 20px; border-radius: 10px; border-left: 5px solid {theme_color}; margin-bottom: 20px; word-break: keep-all; overflow-wrap: break-word; }} .result-card {{ padding: 18px; border-radius: 12px; background: white; border: 1px solid #e2e8f0; margin-bottom: 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.02); }} .stock-info {{ display: flex; align-items: center; justify-content: space-between; margin-bottom: 12px; }} .stock-name {{ font-weight: 900; font-size: 19px; color: #0f172a; }} .stock-code {{ font-size: 13px; color: #64748b; background: #f1f5f9; padding: 2px 6px; border-radius: 4px; margin-left: 5px; }} .sim-score {{ font-size: 20px; font-weight: 900; color: {'#b45309' if IS_PRO else '#0284c7'}; }} .btn-row {{ display: flex; gap: 8px; flex-wrap: wrap; }} .custom-btn {{ display: inline-flex; align-items: center; justify-content: center; padding: 8px 16px; border-radius: 8px; text-decoration: none !important; font-size: 13px; font-weight: bold; transition: 0.2s; border: none; cursor: pointer; }} .btn-pc {{ background: #f1f5f9; color: #475569 !important; border: 1px solid #cbd5e1; }} .btn-pc:hover {{ background: #e2e8f0; color: #1e293b !important; }} .btn-mo {{ background: #03c75a; color: white !important; border: 1px solid #03c75a; }} .btn-mo:hover {{ background: #02b351; color: white !important; }} .btn-global {{ background: {theme_color}; color: {'black' if IS_PRO else 'white'} !important; }} .locked-card {{ padding: 20px; border-radius: 12px; background: #fffbeb; border: 2px dashed #fbbf24; text-align: center; color: #b45309; font-weight: bold; margin-top: 10px; }} .info-tag {{ background: #e0f2fe; color: #0369a1; padding: 3px 8px; border-radius: 4px; font-size: 12px; font-weight: bold; margin-right: 5px; }}</style>""", unsafe_allow_html=True)
+st.markdown(BASE_STYLE, unsafe_allow_html=True)  # 공통 CSS (ui_static 에서 프로세스당 한 번 생성)
+st.markdown(f"""<style>.symbol-img {{ {symbol_style} width: 160px; height: 160px; object-fit: cover; margin-bottom: 15px; background: white; }} .brand-container {{ display: flex; flex-direction: column; align-items: center; justify-content: center; background: {bg_gradient}; padding: 60px 15px 50px 15px; border-radius: 24px; color: white; margin-bottom: 1.5rem; box-shadow: 0 10px 40px rgba(0,0,0,0.2); text-align: center; margin-top: -60px; border: {'2px solid #fbbf24' if IS_PRO else 'none'}; }} .mission-highlight {{ color: {'#b45309' if IS_PRO else '#0284c7'}; font-weight: 800; }} .pattern-info {{ font-size: 16px; color: #334155; line-height: 1.7; background: #f1f5f9; padding: 20px; border-radius: 10px; border-left: 5px solid {theme_color}; margin-bottom: 20px; word-break: keep-all; overflow-wrap: break-word; }} .sim-score {{ font-size: 20px; font-weight: 900; color: {'#b45309' if IS_PRO else '#0284c7'}; }} .btn-global {{ background: {theme_color}; color: {'black' if IS_PRO else 'white'} !important; }}</style>""", unsafe_allow_html=True)  # 테마 색이 들어가는 규칙만
 
 st.markdown('<div class="mobile-guide-text">👈 설정(언어/결제) 메뉴 열기</div>', unsafe_allow_html=True)
 
 # 3. 로고 및 헤더
 def get_img_tag(path_or_url, is_local=False):
-    if is_local and os.path.exists(path_or_url):
-        with open(path_or_url, "rb") as f: data = base64.b64encode(f.read()).decode()
-        return f"data:image/jpeg;base64,{data}"
+    # 로컬 파일은 프로세스 공용 에셋 캐시의 data URI 사용 (등록된 심볼은 리사이즈된 WebP, 재실행마다 파일 읽기/인코딩 없음)
+    if is_local: return get_file_uri(path_or_url) or path_or_url
     return path_or_url
 
 if IS_PRO:
     symbol_src = get_img_tag(PRO_SYMBOL_FILE, is_local=True)
     header_html = f"""<div class="brand-container"><img src="{symbol_src}" class="symbol-img"><div style="font-size: 36px; font-weight: 900; color: white; letter-spacing: -1px;">AlphaChart AI <span class="pro-badge">PRO</span></div><div style="font-size: 15px; color: #fbbf24; font-weight: 700; letter-spacing: 3px; margin-bottom: 10px;">MEET YOUR CHART DOPPELGÄNGER</div></div>"""
 else:
-    header_html = f"""<div class="brand-container"><img src="{FREE_SYMBOL_URL}" class="symbol-img"><div style="font-size: 36px; font-weight: 900; color: white; letter-spacing: -1px;">AlphaChart AI</div><div style="font-size: 15px; color: #38bdf8; font-weight: 700; letter-spacing: 3px; margin-bottom: 10px;">MEET YOUR CHART DOPPELGÄNGER</div></div>"""
+    symbol_src = get_img_tag(FREE_SYMBOL_FILE, is_local=True)
+    header_html = f"""<div class="brand-container"><img src="{symbol_src}" class="symbol-img"><div style="font-size: 36px; font-weight: 900; color: white; letter-spacing: -1px;">AlphaChart AI</div><div style="font-size: 15px; color: #38bdf8; font-weight: 700; letter-spacing: 3px; margin-bottom: 10px;">MEET YOUR CHART DOPPELGÄNGER</div></div>"""
 st.markdown(header_html, unsafe_allow_html=True)
 st.markdown(t['mission_html'], unsafe_allow_html=True)
 
@@ -271,19 +203,10 @@ with c_m1:
     market_label = st.selectbox("Market", list(market_map.keys()), label_visibility="collapsed")
     market_code = market_map[market_label]
 
-@st.cache_data
+# 종목표(Listing)는 읽기 전용 배열이라 cache_resource 로 모든 세션이 객체 하나를 공유 (cache_data 는 세션마다 복사본을 만든다)
+@st.cache_resource(ttl=LISTING_TTL, show_spinner=False)
 def get_stock_list_info(market):
-    try:
-        df = fdr.StockListing(market)
-        if market == 'KRX' and 'Marcap' in df.columns:
-            df['Marcap'] = pd.to_numeric(df['Marcap'], errors='coerce'); df = df.sort_values(by='Marcap', ascending=False)
-        elif 'Market Cap' in df.columns:
-            df['Market Cap'] = pd.to_numeric(df['Market Cap'], errors='coerce'); df = df.sort_values(by='Market Cap', ascending=False)
-        code_col = 'Code' if 'Code' in df.columns else 'Symbol'
-        if market == "TSE": df[code_col] = df[code_col].astype(str) + ".T"
-        elif market == "HKEX": df[code_col] = df[code_col].apply(lambda x: "{:04d}.HK".format(int(x)) if str(x).isdigit() else str(x) + ".HK")
-        return df[[code_col, 'Name']].values.tolist()
-    except: return []
+    return get_stock_list(market)
 
 stock_data = get_stock_list_info(market_code)
 total_count = len(stock_data)
@@ -301,6 +224,17 @@ with st.expander(t['filter_detail']):
     only_bullish = c_f1.checkbox(t['filter_bullish'], value=False)
     only_doji = c_f2.checkbox(t['filter_doji'], value=False)
     only_hammer = st.checkbox(t['filter_hammer'], value=False)
+    # 추가 조건식 (PRO): 캔들 체크박스와 AND 로 묶여 사전 필터 단계에서 시장 전체에 한 번에 적용된다
+    filter_expr = st.text_input(t['filter_expr'], placeholder="volume > 20d avg", help=t['filter_expr_help'], disabled=not IS_PRO).strip()
+    if not IS_PRO: filter_expr = ""
+    expr_error = None
+    if filter_expr:
+        try: parse_expr(filter_expr)
+        except ValueError as e: expr_error = str(e); st.error(t['filter_expr_error'].format(expr_error))
+    # 통합 검색(ANN 인덱스)은 일봉 + 기본(피어슨) 유사도 전용
+    timeframe = st.radio(t['timeframe_label'], TIMEFRAMES, format_func=lambda tf: t['timeframe_names'][tf], horizontal=True)
+    sim_method = st.radio(t['method_label'], METHODS, format_func=lambda m: t['method_names'][m], horizontal=True)
+    all_markets = st.checkbox(t['filter_all_markets'], value=False, disabled=not IS_PRO or timeframe != "D" or sim_method != "pearson") and timeframe == "D" and sim_method == "pearson"
     st.markdown("---"); st.caption(t['period_set_caption'])
     cur_key = st.session_state.selected_key; name_key = 'name_' + st.session_state.lang
     cur_name = RAW_PATTERN_DB[cur_key][name_key].replace('\n', ' ')
@@ -332,100 +266,58 @@ else:
     is_path_mode = True; sel_p_name = sel_p['name_' + st.session_state.lang].replace("\n", ""); sel_p_type = sel_p.get('type', 'Custom'); sel_p_locked = sel_p['locked']
     if 'fixed_period' in sel_p: st.session_state.detected_period = sel_p['fixed_period']
 
-# --- 🧠 분석 엔진 ---
-def count_candles_engine(img):
-    try:
-        if len(img.shape) == 3: gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        else: gray = img
-        if np.mean(gray) > 127: thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
-        else: thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        kernel_v = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 3)) 
-        cleaned = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel_v)
-        contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        if not contours: return 20
-        valid_widths = []
-        height, width = img.shape[:2]; min_h = height * 0.02 
-        for c in contours:
-            x, y, w, h = cv2.boundingRect(c)
-            if h > min_h: valid_widths.append(w)
-        if not valid_widths: return 20
-        median_w = np.median(valid_widths)
-        if median_w == 0: median_w = 1
-        total_cnt = 0
-        for w in valid_widths: cnt = max(1, round(w / median_w)); total_cnt += cnt
-        if total_cnt < 5: return 20
-        if total_cnt > 120: return 60 
-        return int(total_cnt)
-    except Exception as e: return 20
+# --- 🃏 결과 카드 (스캔 중에는 중간 결과로 여러 번 다시 그린다) ---
+def display_list(results):
+    if IS_PRO:
+        if len(results) < 10: return results
+        return results[:100]
+    return results[:5]
 
-def extract_features_engine(img_input, is_file_path=False):
-    try:
-        if is_file_path: img_array = np.fromfile(img_input, np.uint8); img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-        else: file_bytes = np.asarray(bytearray(img_input.read()), dtype=np.uint8); img = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
-        if img is None: return None
-        candle_count = count_candles_engine(img)
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        mask_r = cv2.bitwise_or(cv2.inRange(hsv, np.array([0, 50, 50]), np.array([10, 255, 255])), cv2.inRange(hsv, np.array([170, 50, 50]), np.array([180, 255, 255])))
-        mask_b = cv2.inRange(hsv, np.array([100, 50, 50]), np.array([130, 255, 255])); mask_g = cv2.inRange(hsv, np.array([40, 50, 50]), np.array([80, 255, 255])); mask_k = cv2.inRange(hsv, np.array([0, 0, 0]), np.array([180, 255, 80]))
-        combined = cv2.bitwise_or(cv2.bitwise_or(mask_r, mask_b), cv2.bitwise_or(mask_k, mask_g))
-        height, width = combined.shape; p_avg = []
-        for x in range(width):
-            px = np.where(combined[:, x] > 0)[0]
-            if len(px) > 0: p_avg.append(height - np.mean(px))
-        if not p_avg: return None
-        res_p = np.interp(np.linspace(0, len(p_avg)-1, 50), np.arange(len(p_avg)), np.array(p_avg))
-        return res_p, img, candle_count
-    except: return None
+def card_sparks(results, user_p_norm, period, trading_day=None):
+    # 표시할 카드들의 미니 캔들 + 사용자 패턴 겹침을 시장별로 한 번에 렌더링 (거래일 키로 캐시)
+    by_market = {}
+    for r in display_list(results): by_market.setdefault(r.get('market', market_code), []).append(r['code'])
+    sparks = {}
+    for m, codes in by_market.items():
+        try: sparks.update(render_cards(m, codes, period, user_p_norm, timeframe if m == market_code else "D", trading_day if m == market_code else None))
+        except Exception: continue  # 미니 캔들은 부가 정보 - 실패해도 카드는 그대로 표시
+    return sparks
 
-def analyze_stock_legacy(code, name, user_p_norm, n_days=20, market_type="KRX", require_bullish=False, require_doji=False, require_hammer=False, pattern_type="Custom", force_include=False):
-    try:
-        df = fdr.DataReader(code).tail(n_days + 10)
-        if len(df) < n_days: return None
-        if not force_include and df['Volume'].iloc[-1] == 0: return None 
-        last_open = df['Open'].iloc[-1]; last_close = df['Close'].iloc[-1]; last_high = df['High'].iloc[-1]; last_low = df['Low'].iloc[-1]
-        if not force_include and market_type != "KRX" and last_close < 1.0: return None
-        candle_range = last_high - last_low; body_size = abs(last_close - last_open); is_doji = (candle_range > 0 and (body_size / candle_range) <= 0.1)
-        filter_status = "Pass"
-        if require_bullish:
-            if last_close <= last_open: filter_status = "Fail_Bearish (음봉)"
-            if is_doji: filter_status = "Fail_Doji (도지)"
-        if require_doji and not is_doji: filter_status = "Fail_NotDoji (도지아님)"
-        if require_hammer:
-            is_bullish = last_close >= last_open; upper_shadow = last_high - max(last_open, last_close); lower_shadow = min(last_open, last_close) - last_low; total_range = last_high - last_low
-            if not (is_bullish or is_doji): filter_status = "Fail_Hammer_Shape"
-            elif lower_shadow < upper_shadow * 3.0: filter_status = "Fail_Upper_Shadow_Too_Long"
-            else:
-                tail_condition = False
-                if body_size > 0:
-                    if lower_shadow >= body_size * 3.0: tail_condition = True
-                elif total_range > 0:
-                    if lower_shadow >= total_range * 0.7: tail_condition = True
-                if total_range > 0 and (body_size / total_range) > 0.3: tail_condition = False
-                if total_range > 0 and (lower_shadow / total_range) < 0.6: tail_condition = False
-                if not tail_condition: filter_status = "Fail_Hammer_Tail_Length"
-        if not force_include and filter_status != "Pass": return None
-        df_t = df.tail(n_days); flow = df_t['Close'].values
-        s_res = np.interp(np.linspace(0, n_days-1, 50), np.arange(n_days), MinMaxScaler().fit_transform(flow.reshape(-1, 1)).flatten())
-        corr_total = pearsonr(user_p_norm, s_res)[0]
-        if np.isnan(corr_total): return None
-        tail_len = 10; corr_tail = pearsonr(user_p_norm[-tail_len:], s_res[-tail_len:])[0]
-        if np.isnan(corr_tail): corr_tail = 0
-        final_sim = (corr_total * 0.7) + (corr_tail * 0.3)
-        return {'code': code, 'name': name, 'sim': (final_sim + 1) * 50, 'price': last_close, 'filter_status': filter_status}
-    except: return None
+def render_results(results, matched, market_code, final=True, sparks=None):
+    final_display_list = display_list(results); sparks = sparks or {}
+
+    st.markdown(t['result_title'].format(matched))
+    if final and not final_display_list: st.warning(t['no_result'])
+    for i, res in enumerate(final_display_list):
+        res_market = res.get('market', market_code); spark_html = f'<img src="{sparks[res["code"]]}" class="spark-img">' if res['code'] in sparks else ""
+        if res_market == "KRX":
+            pc_link = f"https://finance.naver.com/item/fchart.naver?code={res['code']}"; mo_link = f"https://m.stock.naver.com/fchart/domestic/stock/{res['code']}/"
+            links_html = f'<div class="btn-row"><a href="{pc_link}" target="_blank" class="custom-btn btn-pc">{t["pc_chart"]}</a><a href="{mo_link}" target="_blank" class="custom-btn btn-mo">{t["mo_chart"]}</a></div>'
+        elif res_market in ["NASDAQ", "NYSE"]:
+            link = f"https://www.tradingview.com/chart/?symbol={res['code']}"; links_html = f'<a href="{link}" target="_blank" class="custom-btn btn-global">{t["chart_view"]}</a>'
+        elif res_market == "TSE":
+            link = f"https://www.tradingview.com/chart/?symbol=TSE:{res['code'].replace('.T','')}"; links_html = f'<a href="{link}" target="_blank" class="custom-btn btn-global">{t["chart_view"]}</a>'
+        elif res_market == "HKEX":
+            link = f"https://www.tradingview.com/chart/?symbol=HKEX:{res['code'].replace('.HK','')}"; links_html = f'<a href="{link}" target="_blank" class="custom-btn btn-global">{t["chart_view"]}</a>'
+        else:
+            link = f"https://finance.yahoo.com/quote/{res['code']}"; links_html = f'<a href="{link}" target="_blank" class="custom-btn btn-global">{t["chart_view"]}</a>'
+
+        st.markdown(f"""<div class="result-card"><div class="stock-info"><div><span class="stock-name">{res['name']}</span><span class="stock-code">{res['code']}</span></div><div class="sim-score">{res['sim']:.1f}%</div></div>{spark_html}{links_html}</div>""", unsafe_allow_html=True)
+        
+    if not IS_PRO and matched > 5: st.markdown(f"""<div class="locked-card">{t['locked_msg']}</div>""", unsafe_allow_html=True)
 
 # --- 🖼️ 실행 ---
 st.markdown("---")
 c_p1, c_p2, c_p3 = st.columns([1, 10, 1]); feat_data = None
 with c_p2:
     if uploaded_file:
-        feat_data = extract_features_engine(target_input, is_file_path=False); st.image(uploaded_file, caption=t['section2_title'], width=300)
+        from image_engine import extract_features_fast  # cv2 는 업로드할 때만 로드
+        feat_data = extract_features_fast(target_input, is_file_path=False); st.image(uploaded_file, caption=t['section2_title'], width=300)
         if feat_data:
             _, _, detected_cnt = feat_data
             if 'last_file' not in st.session_state or st.session_state.last_file != uploaded_file.name: st.session_state.detected_period = detected_cnt; st.session_state.last_file = uploaded_file.name; st.rerun()
-    elif not sel_p_locked and os.path.exists(target_input):
-        feat_data = extract_features_engine(target_input, is_file_path=True)
-        with open(target_input, "rb") as f: b64 = base64.b64encode(f.read()).decode()
+    elif not sel_p_locked and (pat_feat := get_pattern_features(sel_key)):
+        feat_data = (pat_feat.profile, None, pat_feat.candle_count); b64 = pat_feat.thumb_b64
         st.markdown(f"""<div style="border:2px solid {theme_color}; border-radius:15px; overflow:hidden; text-align:center;"><img src="data:image/jpeg;base64,{b64}" style="width:100%; height:auto; max-height:250px; object-fit:contain;"></div>""", unsafe_allow_html=True)
         if feat_data:
             _, _, detected_cnt = feat_data
@@ -433,59 +325,60 @@ with c_p2:
             if st.session_state.detected_period != detected_cnt: st.session_state.detected_period = detected_cnt; st.rerun()
     if feat_data:
         user_p, _, cnt = feat_data; st.markdown(f"""<div style="margin-top:10px; margin-bottom:5px;"><span class="info-tag">{t['ai_analysis_badge']}</span> {t['candles_detected'].format(st.session_state.detected_period)} │ <b>{t['ai_pattern_shape']}</b></div>""", unsafe_allow_html=True)
-        user_p_norm = MinMaxScaler().fit_transform(user_p.reshape(-1, 1)).flatten()
-        fig, ax = plt.subplots(figsize=(6, 1.5)); ax.plot(user_p_norm, color=theme_color, lw=2.5); ax.axis('off'); fig.patch.set_alpha(0); st.pyplot(fig)
+        user_p_norm = minmax_rows(np.asarray(user_p, dtype=np.float64)[None, :])[0]
+        st.markdown(f"""<img src="{pattern_svg(user_p_norm, theme_color)}" style="width:100%; height:120px;">""", unsafe_allow_html=True)
     elif sel_p_locked: st.warning(t['pro_only_model'])
 
 clean_name = sel_p_name.replace('\n', ' '); button_label = t['btn_analyze'].format(clean_name)
 if st.button(button_label, type="primary", use_container_width=True):
     if sel_p_locked and not uploaded_file: st.error(t['error_pro_only'])
     elif not feat_data: st.error(t['error_no_file'])
+    elif expr_error: st.error(t['filter_expr_error'].format(expr_error))
     else:
-        period_msg = f" | {t['period_set_caption']}: {search_period}"; info_msg = f"({limit_val}{period_msg})"; st.info(t['scanning_msg'].format(info_msg))
-        progress_bar = st.progress(0); user_p, _, _ = feat_data; user_p_norm = MinMaxScaler().fit_transform(user_p.reshape(-1, 1)).flatten(); results = []
-        target_stocks = stock_data[:limit_val]
-        if debug_code:
-            exists = False
-            for s in target_stocks:
-                if s[0] == debug_code: exists = True; break
-            if not exists:
-                found_name = "Target"
-                for s in stock_data:
-                    if s[0] == debug_code: found_name = s[1]; break
-                target_stocks.insert(0, [debug_code, found_name])
-        total_scan = len(target_stocks)
-        with ThreadPoolExecutor(max_workers=30) as ex:
-            futures = [ex.submit(analyze_stock_legacy, s[0], s[1], user_p_norm, search_period, market_code, only_bullish, only_doji, only_hammer, sel_p_type, (s[0] == debug_code)) for s in target_stocks]
-            for idx, f in enumerate(as_completed(futures)):
-                res = f.result()
-                if res: results.append(res)
-                progress_bar.progress((idx + 1) / total_scan)
-        results = [r for r in results if r['sim'] >= 80.0]
-        results.sort(key=lambda x: x['sim'], reverse=True)
-        final_display_list = []
-        if IS_PRO:
-            if len(results) < 10: final_display_list = results
-            else: final_display_list = results[:100]
-        else: final_display_list = results[:5]
-
-        st.markdown(t['result_title'].format(len(results)))
-        if not final_display_list: st.warning(t['no_result'])
-        for i, res in enumerate(final_display_list):
-            if market_code == "KRX":
-                pc_link = f"https://finance.naver.com/item/fchart.naver?code={res['code']}"; mo_link = f"https://m.stock.naver.com/fchart/domestic/stock/{res['code']}/"
-                links_html = f'<div class="btn-row"><a href="{pc_link}" target="_blank" class="custom-btn btn-pc">{t["pc_chart"]}</a><a href="{mo_link}" target="_blank" class="custom-btn btn-mo">{t["mo_chart"]}</a></div>'
-            elif market_code in ["NASDAQ", "NYSE"]:
-                link = f"https://www.tradingview.com/chart/?symbol={res['code']}"; links_html = f'<a href="{link}" target="_blank" class="custom-btn btn-global">{t["chart_view"]}</a>'
-            elif market_code == "TSE":
-                link = f"https://www.tradingview.com/chart/?symbol=TSE:{res['code'].replace('.T','')}"; links_html = f'<a href="{link}" target="_blank" class="custom-btn btn-global">{t["chart_view"]}</a>'
-            elif market_code == "HKEX":
-                link = f"https://www.tradingview.com/chart/?symbol=HKEX:{res['code'].replace('.HK','')}"; links_html = f'<a href="{link}" target="_blank" class="custom-btn btn-global">{t["chart_view"]}</a>'
+        period_msg = f" | {t['period_set_caption']}: {search_period} {t['timeframe_names'][timeframe]}"; info_msg = f"({limit_val}{period_msg})"; st.info(t['scanning_msg'].format(info_msg))
+        progress_bar = st.progress(0); user_p, _, _ = feat_data; user_p_norm = minmax_rows(np.asarray(user_p, dtype=np.float64)[None, :])[0]; results = []
+        card_slot = st.empty()
+        if all_markets:
+            # 5개 시장 통합: ANN 인덱스 후보를 정확한 점수로 재정렬한 결과만 사용. 시장 스캔과 같은 사전 필터(거래정지/동전주/캔들 조건)를 거친 상위 100개
+            from ann_index import get_index, apply_prefilter  # scipy 는 통합 검색할 때만 로드
+            filter_report = FilterReport(); cands = get_index().query(user_p_norm, search_period, k=300)
+            for r in apply_prefilter(cands, build_expr(only_bullish, only_doji, only_hammer, filter_expr), search_period, report=filter_report)[:100]:
+                r['name'] = get_stock_list_info(r['market']).name_of(r['code'], r['code']); results.append(r)
+            progress_bar.progress(1.0); results = sorted((r for r in results if r['sim'] >= 80.0), key=lambda x: x['sim'], reverse=True); matched = len(results)
+            if any(filter_report.drops.values()): st.caption(t['prefilter_msg'].format(filter_report.total, filter_report.survivors, ", ".join(f"{name} -{n}" for name, n in filter_report.drops.items() if n)))
+        else:
+            target_stocks = stock_data[:limit_val]  # Listing 뷰 (복사 없음)
+            if debug_code and not 0 <= stock_data.find(debug_code) < limit_val: target_stocks = target_stocks.prepend(debug_code, stock_data.name_of(debug_code, "Target"))
+            # 기본 패턴은 (시장, 패턴, 기간, 필터, 범위, 거래일) 키로 저장된 전체 결과를 재사용
+            cache_key = None; trading_day = current_trading_day(market_code, stock_data)
+            if not uploaded_file and not debug_code and not filter_expr:
+                if trading_day: cache_key = make_key(market_code, sel_key, search_period, only_bullish, only_doji, only_hammer, len(target_stocks), trading_day, timeframe, sim_method)
+            cached = get_result_cache().get(cache_key) if cache_key else None
+            if cached is not None: results, matched = cached; progress_bar.progress(1.0)
             else:
-                link = f"https://finance.yahoo.com/quote/{res['code']}"; links_html = f'<a href="{link}" target="_blank" class="custom-btn btn-global">{t["chart_view"]}</a>'
-
-            st.markdown(f"""<div class="result-card"><div class="stock-info"><div><span class="stock-name">{res['name']}</span><span class="stock-code">{res['code']}</span></div><div class="sim-score">{res['sim']:.1f}%</div></div>{links_html}</div>""", unsafe_allow_html=True)
-            
-        if not IS_PRO and len(results) > 5: st.markdown(f"""<div class="locked-card">{t['locked_msg']}</div>""", unsafe_allow_html=True)
+                # 같은 조건의 스캔은 서버 전체에서 하나만 돌고 (진행 중이면 합류), 동시 스캔 한도를 넘으면 PRO/무료 대기열에서 순번을 기다린다
+                # 시가총액 순 chunk 마다 상위 k 를 갱신하며 카드를 다시 그린다 (전체 종료를 기다리지 않음). 결과 캐시 저장은 스캔 작업이 한다
+                # 카드 렌더링 시간은 세션마다 따로 재서 지표로 남긴다 (스캔 trace 는 실행 스레드 것 - 합류한 세션이 거기에 쓰지 않는다)
+                done = total = matched = 0; seen = None; queue_slot = st.empty(); render_s = 0.0
+                trace = ScanTrace(profile=consume_profile_request(), market=market_code, pattern=sel_key if not uploaded_file else "upload", period=search_period, timeframe=timeframe, method=sim_method, stocks=len(target_stocks), pro=IS_PRO)
+                job = scan_job(market_code, {'user': (user_p_norm, search_period)}, target_stocks, cache_key, trading_day, trace, require_bullish=only_bullish, require_doji=only_doji, require_hammer=only_hammer, force_codes={debug_code} if debug_code else (), expr=filter_expr or None, k=TOP_K, stop_sim=EARLY_STOP_SIM, stop_k=TOP_K if IS_PRO else 5, processes=SCAN_PROCESSES if IS_PRO else 0, timeframe=timeframe, method=sim_method)
+                flight, joined = get_scheduler().submit(scan_key(market_code, user_p_norm, search_period, (only_bullish, only_doji, only_hammer), target_stocks.code_list(), timeframe=timeframe, method=sim_method, debug=debug_code, expr=filter_expr or None), job, pro=IS_PRO)
+                if joined: st.caption(t['coalesced_msg'])
+                snap = flight.snapshot()  # follow() 가 아무 상태도 내지 않고 끝나도 최종 상태를 읽을 수 있게
+                for snap in flight.follow():
+                    if snap['state'] == "queued": queue_slot.info(t['queue_msg'].format(snap['position'], get_scheduler().max_running)); continue
+                    queue_slot.empty()
+                    if snap['version'] == seen or 'user' not in snap['tops']: continue
+                    seen = snap['version']; done, total = snap['done'], snap['total']; results, matched = snap['tops']['user']
+                    progress_bar.progress(done / total if total else 1.0)
+                    t_render = time.perf_counter()
+                    with card_slot.container(): render_results(results, matched, market_code, final=False, sparks=card_sparks(results, user_p_norm, search_period, trading_day))
+                    render_s += time.perf_counter() - t_render
+                get_metrics().inc('alphachart_stage_seconds_total', render_s, stage="render")
+                if snap['state'] == "error": st.error(t['scan_error_msg'].format(snap['error']))
+                filter_report = flight.info.get('filter_report'); fetch_report = flight.info.get('fetch_report')
+                if filter_report and any(filter_report.drops.values()): st.caption(t['prefilter_msg'].format(filter_report.total, filter_report.survivors, ", ".join(f"{name} -{n}" for name, n in filter_report.drops.items() if n)))
+                if fetch_report and fetch_report.failed: st.caption(t['fetch_failed_msg'].format(len(fetch_report.failed)))
+        with card_slot.container(): render_results(results, matched, market_code, sparks=card_sparks(results, user_p_norm, search_period, None if all_markets else trading_day))
 
 st.caption("AlphaChart AI v21.5 Global")
@@ -0,0 +1,231 @@
+import os
+import argparse
+import threading
+import numpy as np
+from scipy.spatial import cKDTree
+from scoring import resample_rows, score_profiles, N_POINTS, TAIL_LEN, W_TOTAL, W_TAIL
+from ohlcv_store import DATA_DIR, MARKETS, get_store
+from prefilter import prefilter
+
+# --- 🧭 [근사 최근접 이웃 인덱스] ---
+# 종목별 최신 구간(기간별 13/20/29/60일)을 50점 정규화 프로파일로 저장해 두고, 업로드 한 번에 5개 시장 전체 후보를 찾는다.
+# 임베딩 e = [√0.7·z(전체 50점), √0.3·z(마지막 10점)] (z: 평균 0, 노름 1) 이면
+#   ||e_a - e_b||^2 = 2 - 2·(0.7·r_전체 + 0.3·r_꼬리)
+# 이므로 유클리드 거리 순서가 곧 기존 유사도 순서다. 트리는 PAA 로 차원을 줄인 벡터(거리의 하한)로 만들고,
+# 트리에서 넉넉히 뽑은 후보만 정확한 피어슨 점수로 다시 정렬한다.
+# 요청 기간이 인덱스 기간(13/20/29/60일)이 아니면 가장 가까운 기간으로 후보만 찾고, 점수는 저장소에서 요청 기간 그대로 다시 계산한다.
+# 앱은 야간 재구축 뒤 인덱스 파일의 수정 시각이 바뀌면 다시 읽는다 (get_index).
+# 재구축은 저장소에서 빠진 종목을 지우고, 구간이 짧거나 가격 변화가 없어 행을 만들지 않은 종목도 마지막 날짜는 기록해 매일 다시 읽지 않는다.
+INDEX_DIR = os.path.join(DATA_DIR, "ann")
+PERIODS = (13, 20, 29, 60)
+PAA_FULL = 5  # 전체 50점 -> 10구간
+PAA_TAIL = 2  # 꼬리 10점 -> 5구간
+OVERSAMPLE = 4
+
+
+def _unit_rows(m):
+    c = m - m.mean(axis=1, keepdims=True); n = np.linalg.norm(c, axis=1, keepdims=True)
+    return np.divide(c, n, out=np.zeros_like(c), where=n > 0)
+
+
+def embed(profiles, tail_len=TAIL_LEN):
+    profiles = np.atleast_2d(np.asarray(profiles, dtype=np.float64))
+    return np.hstack([np.sqrt(W_TOTAL) * _unit_rows(profiles), np.sqrt(W_TAIL) * _unit_rows(profiles[:, -tail_len:])])
+
+
+def paa(emb, n_points=N_POINTS):
+    # 구간 평균 x √구간길이 -> 유클리드 거리가 원래 거리의 하한이 된다
+    full, tail = emb[:, :n_points], emb[:, n_points:]
+    f = full.reshape(len(emb), -1, PAA_FULL).mean(axis=2) * np.sqrt(PAA_FULL)
+    t = tail.reshape(len(emb), -1, PAA_TAIL).mean(axis=2) * np.sqrt(PAA_TAIL)
+    return np.hstack([f, t])
+
+
+class PeriodIndex:
+    # 한 기간(period)에 대한 (시장, 종목) -> 최신 프로파일 테이블 + PAA k-d 트리
+    def __init__(self, period):
+        self.period = period; self.keys = []; self.rows = {}; self.last_dates = []; self.skipped = {}  # skipped: 행 없이 날짜만 기록한 종목 -> 마지막 날짜
+        self._profiles = np.empty((0, N_POINTS), dtype=np.float32); self._pending = []; self._tree = None; self._lock = threading.Lock()
+
+    def __len__(self): return len(self.keys)
+
+    @property
+    def profiles(self):
+        # 새로 추가된 행은 모아 두었다가 필요할 때 한 번에 붙인다 (행마다 vstack 하지 않도록)
+        if self._pending: self._profiles = np.vstack([self._profiles] + self._pending); self._pending = []
+        return self._profiles
+
+    def upsert(self, market, code, closes, last_date):
+        # 종목의 최신 구간이 바뀐 경우에만 해당 행을 교체/추가 (증분 재구축). 쓸 수 없는 구간(짧은 이력 / 가격 변화 없음)이면 행을 빼고 날짜만 기록
+        closes = np.asarray(closes, dtype=np.float64)[-self.period:]; key = (market, code)
+        if len(closes) < self.period or np.ptp(closes) == 0:
+            self.remove([key])
+            with self._lock: self.skipped[key] = last_date
+            return False
+        prof = resample_rows(closes[None, :])[0].astype(np.float32)
+        with self._lock:
+            self.skipped.pop(key, None); row = self.rows.get(key)
+            if row is None:
+                self.rows[key] = len(self.keys); self.keys.append(key); self.last_dates.append(last_date); self._pending.append(prof[None, :])
+            else:
+                self.profiles[row] = prof; self.last_dates[row] = last_date
+            self._tree = None
+        return True
+
+    def remove(self, keys):
+        # 행/날짜 기록 삭제 (상장폐지 등). 남은 행의 순서는 유지. 반환: 지운 행 수
+        with self._lock:
+            for key in keys: self.skipped.pop(key, None)
+            drop = {key for key in keys if key in self.rows}
+            if not drop: return 0
+            keep = np.array([key not in drop for key in self.keys], dtype=bool); self._profiles = self.profiles[keep]
+            self.keys = [key for key, ok in zip(self.keys, keep) if ok]; self.last_dates = [d for d, ok in zip(self.last_dates, keep) if ok]
+            self.rows = {key: i for i, key in enumerate(self.keys)}; self._tree = None
+        return len(drop)
+
+    def last_date(self, market, code):
+        row = self.rows.get((market, code))
+        return self.skipped.get((market, code)) if row is None else self.last_dates[row]
+
+    def _get_tree(self):
+        with self._lock:
+            if self._tree is None and len(self.keys): self._tree = cKDTree(paa(embed(self.profiles)))
+            return self._tree
+
+    def query(self, user_p_norm, k=100, markets=None, oversample=OVERSAMPLE):
+        # 트리에서 k*oversample 개 후보 -> 정확한 유사도로 재정렬 -> 상위 k
+        tree = self._get_tree()
+        if tree is None: return []
+        n_cand = min(len(self.keys), k * oversample * (len(MARKETS) if markets else 1))
+        _, idx = tree.query(paa(embed(user_p_norm)), k=n_cand)
+        idx = np.atleast_1d(np.asarray(idx).ravel()); idx = idx[idx < len(self.keys)]
+        if markets: idx = np.array([i for i in idx if self.keys[i][0] in markets], dtype=np.int64)
+        return self._rank(user_p_norm, idx, k)
+
+    def brute_force(self, user_p_norm, k=100, markets=None):
+        idx = np.arange(len(self.keys))
+        if markets: idx = np.array([i for i in idx if self.keys[i][0] in markets], dtype=np.int64)
+        return self._rank(user_p_norm, idx, k)
+
+    def _rank(self, user_p_norm, idx, k):
+        if len(idx) == 0: return []
+        sims = score_profiles(self.profiles[idx].astype(np.float64), user_p_norm)
+        order = np.argsort(np.where(np.isnan(sims), -np.inf, sims))[::-1][:k]
+        return [{'market': self.keys[idx[o]][0], 'code': self.keys[idx[o]][1], 'sim': float(sims[o])} for o in order if not np.isnan(sims[o])]
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True); tmp = path + ".tmp.npz"
+        np.savez(tmp, markets=np.array([k[0] for k in self.keys], dtype=str), codes=np.array([k[1] for k in self.keys], dtype=str),
+                 last_dates=np.array(self.last_dates, dtype="M8[D]"), profiles=self.profiles,
+                 skip_markets=np.array([k[0] for k in self.skipped], dtype=str), skip_codes=np.array([k[1] for k in self.skipped], dtype=str),
+                 skip_dates=np.array(list(self.skipped.values()), dtype="M8[D]"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, period, path):
+        idx = cls(period)
+        if not os.path.exists(path): return idx
+        with np.load(path, allow_pickle=False) as z:
+            idx.keys = list(zip(z["markets"].tolist(), z["codes"].tolist())); idx.last_dates = list(z["last_dates"])
+            idx._profiles = z["profiles"].astype(np.float32); idx.rows = {k: i for i, k in enumerate(idx.keys)}
+            if "skip_codes" in z.files: idx.skipped = dict(zip(zip(z["skip_markets"].tolist(), z["skip_codes"].tolist()), z["skip_dates"]))
+        return idx
+
+
+class PatternIndex:
+    def __init__(self, root=INDEX_DIR, periods=PERIODS):
+        self.root = root; self.periods = tuple(periods); self.stamp = self.file_stamp()
+        self.indexes = {p: PeriodIndex.load(p, self._path(p)) for p in self.periods}
+
+    def _path(self, period):
+        return os.path.join(self.root, f"p{period}.npz")
+
+    def file_stamp(self):
+        # 기간별 인덱스 파일의 (수정 시각, 크기) - 재구축(os.replace) 여부 확인용
+        stamp = []
+        for p in self.periods:
+            try: st = os.stat(self._path(p)); stamp.append((st.st_mtime_ns, st.st_size))
+            except OSError: stamp.append(None)
+        return tuple(stamp)
+
+    def nearest_period(self, n_days):
+        return min(self.periods, key=lambda p: abs(p - n_days))
+
+    def update_from_store(self, markets=MARKETS, store=None):
+        # 일일 데이터 업데이트 후 호출: 저장소에서 빠진 종목은 지우고, 마지막 날짜가 바뀐 종목만 다시 임베딩. 반환: 바뀐 행 수
+        store = store or get_store(); changed = 0; max_p = max(self.periods)
+        for market in markets:
+            codes = store.codes(market); live = set(codes)
+            for ix in self.indexes.values(): changed += ix.remove([key for key in list(ix.rows) + list(ix.skipped) if key[0] == market and key[1] not in live])
+            for code in codes:
+                last = store.last_date(market, code)
+                if last is None or all(ix.last_date(market, code) == last for ix in self.indexes.values()): continue
+                closes = np.asarray(store.read_tail(market, code, max_p)['Close'])
+                for ix in self.indexes.values(): changed += ix.upsert(market, code, closes, last)
+        return changed
+
+    def save(self):
+        for p, ix in self.indexes.items(): ix.save(self._path(p))
+        self.stamp = self.file_stamp()
+
+    def query(self, user_p_norm, n_days, k=100, markets=None, store=None):
+        # 결과의 sim 은 항상 요청 기간(n_days) 기준
+        period = self.nearest_period(n_days)
+        if period == n_days: return self.indexes[period].query(user_p_norm, k, markets)
+        return rescore(self.indexes[period].query(user_p_norm, k * OVERSAMPLE, markets), user_p_norm, n_days, store)[:k]
+
+
+def rescore(cands, user_p_norm, n_days, store=None):
+    # 인덱스 후보를 저장소의 최근 n_days 종가로 다시 점수 매겨 정렬 (상장 기간이 짧거나 가격 변화가 없으면 제외)
+    store = store or get_store(); keep = []; rows = []
+    for r in cands:
+        bars = store.read_tail(r['market'], r['code'], n_days)
+        if bars is None or len(bars['Close']) < n_days: continue
+        closes = np.asarray(bars['Close'], dtype=np.float64)
+        if np.ptp(closes) == 0: continue
+        keep.append(r); rows.append(closes)
+    if not keep: return []
+    sims = score_profiles(resample_rows(np.vstack(rows)), user_p_norm)
+    order = np.argsort(np.where(np.isnan(sims), -np.inf, sims))[::-1]
+    return [{'market': keep[o]['market'], 'code': keep[o]['code'], 'sim': float(sims[o])} for o in order if not np.isnan(sims[o])]
+
+
+def apply_prefilter(cands, expr=None, min_bars=1, store=None, report=None):
+    # 통합 검색 후보에도 시장 스캔과 같은 사전 필터 (거래정지 / 해외 동전주 / 짧은 이력 / 캔들 조건식) 를 시장별로 적용
+    by_market = {}
+    for r in cands: by_market.setdefault(r['market'], []).append(r['code'])
+    keep = set()
+    for market, codes in by_market.items():
+        mask = prefilter(market, codes, expr, min_bars, store=store, report=report)
+        keep.update((market, code) for code, ok in zip(codes, mask) if ok)
+    return [r for r in cands if (r['market'], r['code']) in keep]
+
+
+def measure_recall(period_index, queries, k=100, oversample=OVERSAMPLE):
+    # 브루트포스 정확 스캔 대비 상위 k 재현율 (쿼리 평균)
+    recalls = []
+    for q in queries:
+        exact = {(r['market'], r['code']) for r in period_index.brute_force(q, k)}
+        if not exact: continue
+        approx = {(r['market'], r['code']) for r in period_index.query(q, k, oversample=oversample)}
+        recalls.append(len(exact & approx) / len(exact))
+    return float(np.mean(recalls)) if recalls else np.nan
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+def get_index():
+    # 야간 재구축(별도 프로세스)이 파일을 바꿔 끼웠으면 다시 읽는다 (파일 stat 4번 - 질의마다 확인해도 싸다)
+    global _default_index
+    with _default_lock:
+        if _default_index is None or _default_index.stamp != _default_index.file_stamp(): _default_index = PatternIndex()
+        return _default_index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 OHLCV 저장소에서 ANN 인덱스 증분 재구축")
+    parser.add_argument("--markets", default=",".join(MARKETS))
+    args = parser.parse_args()
+    index = get_index(); changed = index.update_from_store(args.markets.split(",")); index.save()
+    print(f"✅ {changed}개 항목 갱신 (" + ", ".join(f"{p}일: {len(ix)}" for p, ix in index.indexes.items()) + ")")
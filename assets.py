@@ -0,0 +1,108 @@
+import io
+import os
+import base64
+import argparse
+import mimetypes
+import threading
+
+# --- 🖼️ [정적 에셋 캐시] ---
+# Streamlit 은 위젯을 누를 때마다 PythonFile.py 전체를 다시 실행한다.
+# 로고 심볼을 매 실행마다 파일에서 읽어 base64 로 인코딩하던 것을, 빌드 단계(python assets.py 또는 python LogoMaker.py --assets)에서 만든
+# 리사이즈 + WebP/PNG 최적화 버전을 프로세스당 한 번만 읽어 data URI 로 들고 있도록 바꾼다 (모든 세션 공유).
+# 빌드 산출물이 없으면 원본을 한 번 리사이즈/인코딩해서 같은 캐시에 넣는다.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(BASE_DIR, "assets")
+# 이름 -> (원본 파일, 최대 폭 px). 화면 표시 폭(심볼 160px)의 2배로 만들어 고해상도 화면에서도 선명하게
+ASSETS = {
+    'pro_symbol': ("독수리 심볼.jfif", 320),
+    'free_symbol': ("candlestick_ai_symbol.png", 320),
+    'trademark': ("AlphaChart_Trademark.png", 800),
+}
+FORMATS = ("webp", "png")  # data URI 로 쓸 때의 우선순위
+MIME = {'webp': "image/webp", 'png': "image/png"}
+WEBP_QUALITY = 85
+
+
+def variant_path(name, fmt, out_dir=ASSET_DIR):
+    return os.path.join(out_dir, f"{name}_{ASSETS[name][1]}.{fmt}")
+
+
+def load_resized(name):
+    from PIL import Image
+    src, width = ASSETS[name]; img = Image.open(os.path.join(BASE_DIR, src))
+    img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+    if img.width > width: img = img.resize((width, max(1, round(img.height * width / img.width))), Image.Resampling.LANCZOS)
+    return img
+
+
+def encode(img, fmt):
+    buf = io.BytesIO()
+    if fmt == "webp": img.save(buf, format="WEBP", quality=WEBP_QUALITY, method=6)
+    else:
+        # PNG 는 256색 팔레트로 줄여 저장 (로고/심볼은 색 수가 적어 눈으로 차이가 없다)
+        from PIL import Image
+        img.quantize(256, method=Image.Quantize.FASTOCTREE if img.mode == "RGBA" else Image.Quantize.MEDIANCUT).save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def build_assets(names=None, out_dir=ASSET_DIR):
+    # 빌드 단계: 에셋마다 리사이즈된 WebP/PNG 를 assets/<이름>_<폭>.<형식> 으로 저장. [(경로, 원본 크기, 결과 크기)]
+    os.makedirs(out_dir, exist_ok=True); built = []
+    for name in names or ASSETS:
+        src = os.path.join(BASE_DIR, ASSETS[name][0])
+        if not os.path.exists(src): continue
+        img = load_resized(name)
+        for fmt in FORMATS:
+            path = variant_path(name, fmt, out_dir); data = encode(img, fmt)
+            with open(path, "wb") as f: f.write(data)
+            built.append((path, os.path.getsize(src), len(data)))
+    return built
+
+
+_uris = {}
+_lock = threading.Lock()
+
+def get_asset_uri(name):
+    # 에셋 이름 -> data URI (프로세스당 한 번만 읽고 인코딩). 원본도 빌드 산출물도 없으면 None
+    if name in _uris: return _uris[name]
+    with _lock:
+        if name not in _uris: _uris[name] = _load_uri(name)
+        return _uris[name]
+
+
+def get_file_uri(path):
+    # 로컬 이미지 파일 -> data URI. ASSETS 에 등록된 원본이면 그 에셋(리사이즈/최적화 버전), 아니면 파일 그대로 (둘 다 프로세스당 한 번). 파일이 없으면 None
+    base = os.path.basename(path)
+    for name, (src, _) in ASSETS.items():
+        if src == base: return get_asset_uri(name)
+    key = ("file", os.path.abspath(path))
+    if key in _uris: return _uris[key]
+    with _lock:
+        if key not in _uris: _uris[key] = _load_file_uri(key[1])
+        return _uris[key]
+
+
+def _load_file_uri(path):
+    if not os.path.exists(path): return None
+    with open(path, "rb") as f: data = f.read()
+    return f"data:{mimetypes.guess_type(path)[0] or 'image/jpeg'};base64,{base64.b64encode(data).decode()}"
+
+
+def _load_uri(name):
+    for fmt in FORMATS:
+        path = variant_path(name, fmt)
+        if os.path.exists(path):
+            with open(path, "rb") as f: return f"data:{MIME[fmt]};base64,{base64.b64encode(f.read()).decode()}"
+    if not os.path.exists(os.path.join(BASE_DIR, ASSETS[name][0])): return None
+    try: data, fmt = encode(load_resized(name), "webp"), "webp"
+    except Exception: data, fmt = encode(load_resized(name), "png"), "png"  # WebP 미지원 Pillow 빌드
+    return f"data:{MIME[fmt]};base64,{base64.b64encode(data).decode()}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="웹용 정적 에셋 빌드 (리사이즈 + WebP/PNG 최적화)")
+    parser.add_argument("--names", help=f"쉼표로 구분된 에셋 이름 (기본: 전체 {','.join(ASSETS)})")
+    parser.add_argument("--out", default=ASSET_DIR)
+    args = parser.parse_args()
+    for path, before, after in build_assets(args.names.split(",") if args.names else None, args.out):
+        print(f"🖼️ {os.path.relpath(path, BASE_DIR)}: {before / 1024:.0f}KB -> {after / 1024:.1f}KB")
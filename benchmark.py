@@ -0,0 +1,419 @@
+import os
+import io
+import json
+import shutil
+import time
+import argparse
+import platform
+import sys
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+import cv2
+
+# --- ⏱️ [오프라인 벤치마크] ---
+# 네트워크(FinanceDataReader) 없이 합성 OHLCV 유니버스와 합성 캔들 차트 이미지로
+#   - 점수 계산 / 이미지 추출 / 전체 스캔 속도 (asv 방식: 반복 측정 후 min/median)
+#   - 캔들 수 인식 정확도, 기존(legacy) 함수 대비 유사도/프로파일 일치 여부
+#   - DTW 유사도 모드: 하한(LB_Kim/LB_Keogh) 가지치기 비율, 피어슨 대비 전체 스캔 시간 배율, 가지치기 없는 DTW 와 결과 일치
+#   - 5개 시장 통합 검색 ANN 인덱스: 구축 시간, 기간별 recall@k (브루트포스 정확 스캔 대비) 와 질의 시간
+#   - 결과 카드 미니 캔들 100장 렌더링 (캐시 없음 / 같은 거래일 재실행 / 기존 matplotlib 방식 추정치) 과 시간 예산
+#   - 메모리: 동시 세션 수별 최대 RSS 증가량 (세션당 MB), 시장 여러 개의 종목표를 세션마다 리스트로 복사할 때 vs 공유 Listing
+#   - 앱 기동: 모듈 import 시간, 첫 실행 / 재실행(위젯 클릭) 1회 시간, 기동 시 로드된 무거운 모듈
+# 를 재고 JSON 으로 남긴다. --compare 로 이전 버전 JSON 과 비교해 느려졌거나 일치 검사가 깨지면 종료 코드 1.
+# 저장소/캐시 경로는 ALPHACHART_DATA_DIR 로 임시 폴더를 가리키므로, 저장소 모듈은 main() 에서 환경 변수 설정 후 import 한다.
+SIZES = (1000, 5000, 20000)
+QUICK_SIZES = (1000,)
+LENGTHS = (30, 120, 500)
+IMAGE_SIZES = ((600, 300), (1200, 500), (2000, 800))
+CANDLE_RANGE = (8, 60)
+MARKET = "KRX"
+LEGACY_SAMPLE = 300
+SIM_TOLERANCE = 1e-9
+REGRESSION_TOLERANCE = 1.25
+ANN_K = 100
+ANN_QUERIES = 20
+ANN_MIN_RECALL = 0.9  # 기간별 recall@k 가 이보다 낮으면 실패
+SPARK_CARDS = 100
+SPARK_BUDGET_MS = 150.0  # PRO 결과 100장 미니 캔들을 캐시 없이 그리는 시간 예산
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PythonFile.py")
+APP_RERUNS = 5
+MEMORY_SESSIONS = (1, 4, 16)
+LISTING_MARKETS = 5
+LISTING_SIZE = 4000  # 시장당 종목 수 (합성 유니버스보다 작으면 합성 코드로 채운다)
+# 앱 기동 시 로드되면 안 되는 무거운 모듈 (스캔/업로드 경로에서만 지연 import)
+HEAVY_MODULES = ("cv2", "sklearn", "scipy.spatial", "matplotlib.pyplot")
+
+
+def timeit(fn, repeat=5, number=1):
+    # 반환: {'min', 'median', 'mean'} (1회 호출당 초)
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number): fn()
+        runs.append((time.perf_counter() - t0) / number)
+    return {'min': min(runs), 'median': float(np.median(runs)), 'mean': float(np.mean(runs)), 'repeat': repeat, 'number': number}
+
+
+# --- 📈 합성 OHLCV ---
+def synth_ohlcv(n_bars, rng, start="2015-01-01"):
+    close = 1000 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n_bars)))
+    open_ = close * np.exp(rng.normal(0, 0.01, n_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, n_bars)))
+    volume = rng.integers(1, 1_000_000, n_bars).astype(np.float64); volume[rng.random(n_bars) < 0.01] = 0
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=pd.bdate_range(start, periods=n_bars, name="Date"))
+
+
+def synth_universe(n_tickers, lengths=LENGTHS, seed=0):
+    # {code: DataFrame} - 길이는 lengths 를 돌아가며 사용 (짧은 상장 종목 ~ 긴 히스토리 혼합)
+    rng = np.random.default_rng(seed)
+    return {f"{i:06d}": synth_ohlcv(lengths[i % len(lengths)], rng) for i in range(n_tickers)}
+
+
+def build_store(root, frames, market=MARKET):
+    # 합성 데이터를 로컬 저장소에 쓰고 '오늘 동기화 완료' 로 표시 -> 스캔 경로가 외부 요청을 하지 않는다
+    from ohlcv_store import OHLCVStore
+    store = OHLCVStore(root)
+    for code, df in frames.items(): store.append(market, code, df); store.mark_synced(market, code)
+    return store
+
+
+# --- 🕯️ 합성 캔들 차트 이미지 ---
+def render_candles(o, h, l, c, width, height, margin=10, grid=True):
+    # 흰 배경, 양봉 빨강 / 음봉 파랑 (국내 차트 관례), 연한 회색 격자. 반환: BGR 이미지
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    if grid:
+        for y in np.linspace(margin, height - margin, 6).astype(int): img[y, :] = 225
+    lo, hi = float(np.min(l)), float(np.max(h)); span = (hi - lo) or 1.0
+    ys = lambda p: int(round(height - margin - (p - lo) / span * (height - 2 * margin)))
+    slot = (width - 2 * margin) / len(c); body_w = max(1, int(slot * 0.7))
+    for i in range(len(c)):
+        x = int(margin + slot * (i + 0.5)); color = (0, 0, 230) if c[i] >= o[i] else (230, 60, 0)
+        cv2.line(img, (x, ys(h[i])), (x, ys(l[i])), color, 1)
+        top, bottom = ys(max(o[i], c[i])), ys(min(o[i], c[i]))
+        cv2.rectangle(img, (x - body_w // 2, top), (x - body_w // 2 + body_w - 1, max(bottom, top + 1)), color, -1)
+    return img
+
+
+def true_profile(o, c, n_points=50):
+    # 몸통 중심 (시가+종가)/2 를 50점으로 리샘플 - 이미지 프로파일이 따라가야 할 모양
+    mid = (np.asarray(o) + np.asarray(c)) / 2
+    return np.interp(np.linspace(0, len(mid) - 1, n_points), np.arange(len(mid)), mid)
+
+
+def synth_charts(n_images, sizes=IMAGE_SIZES, candle_range=CANDLE_RANGE, seed=0):
+    # [{'png': bytes, 'n_candles': int, 'profile': (50,), 'size': (w, h)}, ...]
+    rng = np.random.default_rng(seed); charts = []
+    for i in range(n_images):
+        n = int(rng.integers(candle_range[0], candle_range[1] + 1)); w, h = sizes[i % len(sizes)]
+        df = synth_ohlcv(n, rng); o, hi, lo, c = (df[col].to_numpy() for col in ("Open", "High", "Low", "Close"))
+        ok, buf = cv2.imencode(".png", render_candles(o, hi, lo, c, w, h))
+        charts.append({'png': buf.tobytes(), 'n_candles': n, 'profile': true_profile(o, c), 'size': (w, h)})
+    return charts
+
+
+# --- 🧓 기존 스칼라 유사도 (analyze_stock_legacy 가 벡터화되기 전 코드 그대로) ---
+def legacy_similarity(flow, user_p_norm):
+    from sklearn.preprocessing import MinMaxScaler
+    from scipy.stats import pearsonr
+    n_days = len(flow)
+    s_res = np.interp(np.linspace(0, n_days-1, 50), np.arange(n_days), MinMaxScaler().fit_transform(flow.reshape(-1, 1)).flatten())
+    corr_total = pearsonr(user_p_norm, s_res)[0]
+    if np.isnan(corr_total): return np.nan
+    tail_len = 10; corr_tail = pearsonr(user_p_norm[-tail_len:], s_res[-tail_len:])[0]
+    if np.isnan(corr_tail): corr_tail = 0
+    return ((corr_total * 0.7) + (corr_tail * 0.3) + 1) * 50
+
+
+# --- 🏁 벤치마크 항목 ---
+def bench_scoring(frames, user_p_norm, n_days, repeat=5):
+    from scoring import score_matrix
+    closes = np.vstack([df['Close'].to_numpy()[-n_days:] for df in frames.values() if len(df) >= n_days])
+    sample = closes[:LEGACY_SAMPLE]
+    legacy = np.array([legacy_similarity(row, user_p_norm) for row in sample]); fast = score_matrix(sample, user_p_norm)
+    both = ~np.isnan(legacy) & ~np.isnan(fast)
+    t_legacy = timeit(lambda: [legacy_similarity(row, user_p_norm) for row in sample], repeat=max(1, repeat // 2))
+    t_fast = timeit(lambda: score_matrix(closes, user_p_norm), repeat=repeat)
+    return {'rows': len(closes), 'n_days': n_days,
+            'legacy_per_stock_us': t_legacy['min'] / len(sample) * 1e6, 'fast_per_stock_us': t_fast['min'] / len(closes) * 1e6,
+            'timing': {'legacy_sample': t_legacy, 'score_matrix': t_fast},
+            'parity': {'max_abs_diff': float(np.max(np.abs(legacy[both] - fast[both]))) if both.any() else 0.0, 'nan_mismatch': int((np.isnan(legacy) != np.isnan(fast)).sum()),
+                       'ok': bool((np.isnan(legacy) == np.isnan(fast)).all() and (not both.any() or np.max(np.abs(legacy[both] - fast[both])) <= SIM_TOLERANCE))}}
+
+
+def bench_scan(frames, patterns, repeat=3):
+    # 동기화 완료된 로컬 저장소 위에서 전체 스캔 (외부 요청 0 회여야 함)
+    from scan_engine import run_scan, iter_scan, analyze_stock_legacy
+    from fetcher import FetchReport
+    stocks = [[code, code] for code in frames]; report = FetchReport()
+    t_scan = timeit(lambda: run_scan(MARKET, patterns, stocks, report=report), repeat=repeat)
+    def first_chunk():
+        for _ in iter_scan(MARKET, patterns, stocks): return
+    t_first = timeit(first_chunk, repeat=repeat)
+    key, (u, n_days) = next(iter(patterns.items())); sample = stocks[:LEGACY_SAMPLE]
+    t_legacy = timeit(lambda: [analyze_stock_legacy(c, nm, u, n_days, MARKET) for c, nm in sample], repeat=1)
+    legacy = sorted((r for r in (analyze_stock_legacy(c, nm, u, n_days, MARKET) for c, nm in sample) if r and r['sim'] >= 80.0), key=lambda x: (-x['sim'], x['code']))
+    new = sorted(run_scan(MARKET, {key: (u, n_days)}, sample)[key], key=lambda x: (-x['sim'], x['code']))
+    same = [r['code'] for r in legacy] == [r['code'] for r in new] and np.allclose([r['sim'] for r in legacy], [r['sim'] for r in new], atol=SIM_TOLERANCE)
+    return {'stocks': len(stocks), 'patterns': len(patterns),
+            'stocks_per_sec': len(stocks) / t_scan['min'], 'legacy_stocks_per_sec': len(sample) / t_legacy['min'],
+            'timing': {'run_scan': t_scan, 'iter_scan_first_chunk': t_first, 'analyze_stock_legacy_sample': t_legacy},
+            'offline': {'fetch_ok': report.ok, 'fetch_failed': len(report.failed), 'ok': report.ok == 0 and not report.failed},
+            'parity': {'legacy_matches': len(legacy), 'ok': bool(same)}}
+
+
+def bench_dtw(frames, patterns, repeat=3, min_sim=80.0):
+    from scan_engine import run_scan
+    from scoring import resample_rows
+    from dtw import PruneStats, band_radius, dtw_rows, dtw_scores, to_sim
+    stocks = [[code, code] for code in frames]
+    t_pearson = timeit(lambda: run_scan(MARKET, patterns, stocks, min_sim=min_sim), repeat=repeat)
+    t_dtw = timeit(lambda: run_scan(MARKET, patterns, stocks, min_sim=min_sim, method="dtw"), repeat=repeat)
+    stats = PruneStats(); same = True; matches = 0
+    for u, n_days in patterns.values():
+        profiles = resample_rows(np.vstack([df['Close'].to_numpy()[-n_days:] for df in frames.values() if len(df) >= n_days]), len(u))
+        sims = dtw_scores(profiles, u, min_sim, stats=stats); full = to_sim(dtw_rows(u, profiles, band_radius(len(u)))[0], len(u))
+        keep = sims >= min_sim; matches += int(keep.sum())
+        same = same and np.array_equal(keep, ~np.isnan(sims) & (full >= min_sim)) and np.allclose(sims[keep], full[keep], atol=SIM_TOLERANCE)
+    return {'patterns': len(patterns), 'min_sim': min_sim, 'matches': matches, 'slowdown': t_dtw['min'] / t_pearson['min'],
+            'timing': {'run_scan_pearson': t_pearson, 'run_scan_dtw': t_dtw}, 'pruning': stats.summary(), 'parity': {'ok': bool(same)}}
+
+
+def bench_ann(workdir, k=ANN_K, n_queries=ANN_QUERIES, repeat=3, seed=0, min_recall=ANN_MIN_RECALL):
+    # 합성 저장소로 ANN 인덱스를 새로 구축하고, 무작위 패턴 질의로 기간별 recall@k 와 (인덱스 / 브루트포스) 질의 시간을 잰다
+    from ann_index import PatternIndex, measure_recall
+    from ohlcv_store import get_store
+    root = os.path.join(workdir, "ann"); shutil.rmtree(root, ignore_errors=True); index = PatternIndex(root=root)
+    t0 = time.perf_counter(); index.update_from_store([MARKET], get_store()); build_s = time.perf_counter() - t0
+    rng = np.random.default_rng(seed); queries = [np.cumsum(rng.normal(0, 1, 50)) for _ in range(n_queries)]; queries = [(q - q.min()) / np.ptp(q) for q in queries]
+    periods = {}
+    for p, ix in index.indexes.items():
+        periods[str(p)] = {'rows': len(ix), 'recall': measure_recall(ix, queries, k),
+                           'timing': {'query': timeit(lambda: [ix.query(q, k) for q in queries], repeat=repeat), 'brute_force': timeit(lambda: [ix.brute_force(q, k) for q in queries], repeat=repeat)}}
+    worst = min((r['recall'] for r in periods.values() if r['rows']), default=float('nan'))
+    return {'build_seconds': build_s, 'k': k, 'queries': n_queries, 'periods': periods, 'recall': {'min': worst, 'min_recall': min_recall, 'ok': bool(worst >= min_recall)}}
+
+
+def bench_sparklines(frames, user_p_norm, n_days, repeat=3, cards=SPARK_CARDS, budget_ms=SPARK_BUDGET_MS):
+    from sparklines import render_cards, SparkCache
+    codes = list(frames)[:cards]; warm = SparkCache()
+    out = render_cards(MARKET, codes, n_days, user_p_norm, trading_day="bench", cache=warm)
+    t_cold = timeit(lambda: render_cards(MARKET, codes, n_days, user_p_norm, trading_day="bench", cache=SparkCache()), repeat=repeat)
+    t_warm = timeit(lambda: render_cards(MARKET, codes, n_days, user_p_norm, trading_day="bench", cache=warm), repeat=repeat)
+    res = {'cards': len(out), 'bytes_per_card': float(np.mean([len(v) for v in out.values()])) if out else 0.0, 'timing': {'cold': t_cold, 'warm': t_warm},
+           'budget': {'budget_ms': budget_ms, 'cold_ms': t_cold['median'] * 1000, 'ok': t_cold['median'] * 1000 <= budget_ms}}
+    try: from matplotlib.figure import Figure
+    except ImportError: return res
+    def legacy_card(df):
+        # 기존 사용자 패턴 그림과 같은 방식 (figsize 6x1.5, dpi 200, bbox tight) 으로 카드 1장
+        fig = Figure(figsize=(6, 1.5)); ax = fig.add_subplot(); ax.plot(df['Close'].to_numpy()[-n_days:], lw=1.5); ax.axis('off')
+        fig.savefig(io.BytesIO(), format="png", dpi=200, bbox_inches="tight")
+    sample = codes[:5]; t_legacy = timeit(lambda: [legacy_card(frames[c]) for c in sample], repeat=1)
+    res['timing']['matplotlib_sample'] = t_legacy; res['matplotlib_est_ms'] = t_legacy['min'] / len(sample) * cards * 1000
+    return res
+
+
+def bench_images(charts, repeat=3):
+    from image_engine import count_candles_engine, extract_features_engine, extract_features_fast, decode_image, profile_error
+    imgs = [decode_image(io.BytesIO(ch['png'])) for ch in charts]
+    counts = np.array([count_candles_engine(img) for img in imgs]); truth = np.array([ch['n_candles'] for ch in charts])
+    legacy = [extract_features_engine(io.BytesIO(ch['png'])) for ch in charts]; fast = [extract_features_fast(None, img=img) for img in imgs]
+    err_fast = [profile_error(l[0], f[0]) for l, f in zip(legacy, fast) if l is not None and f is not None]
+    err_truth = [profile_error(ch['profile'], l[0]) for ch, l in zip(charts, legacy) if l is not None]
+    abs_err = np.abs(counts - truth)
+    return {'images': len(charts),
+            'timing': {'count_candles_engine': timeit(lambda: [count_candles_engine(img) for img in imgs], repeat=repeat),
+                       'extract_features_engine': timeit(lambda: [extract_features_engine(io.BytesIO(ch['png'])) for ch in charts], repeat=repeat),
+                       'extract_features_fast': timeit(lambda: [extract_features_fast(None, img=img) for img in imgs], repeat=repeat)},
+            'candle_count': {'exact_rate': float((abs_err == 0).mean()), 'within_10pct_rate': float((abs_err <= np.ceil(truth * 0.1)).mean()),
+                             'mean_abs_error': float(abs_err.mean()), 'mean_abs_pct_error': float((abs_err / truth).mean())},
+            'profile': {'legacy_vs_truth_mean_error': float(np.mean(err_truth)) if err_truth else None,
+                        'fast_vs_legacy_max_error': float(np.max(err_fast)) if err_fast else None,
+                        'failed': sum(f is None for f in fast), 'ok': bool(err_fast) and max(err_fast) <= 0.01}}
+
+
+# 새 인터프리터에서 세션 N개가 동시에 스캔하고 결과를 들고 있을 때의 최대 RSS.
+# 리눅스는 /proc/self/clear_refs 로 최댓값(VmHWM)을 기준선 시점에 초기화하고, 그 외에는 ru_maxrss (import 시점 최댓값이 섞일 수 있다)
+_MEMORY_PROBE = """
+import json, resource, sys, threading
+import numpy as np
+from listing import Listing, deep_size
+from ohlcv_store import get_store
+from scan_engine import iter_scan
+def status(key):
+    try:
+        with open("/proc/self/status") as f: return next(int(l.split()[1]) * 1024 for l in f if l.startswith(key + ":"))
+    except (OSError, StopIteration): return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+def reset_peak():
+    try:
+        with open("/proc/self/clear_refs", "w") as f: f.write("5")
+    except OSError: pass
+market, sessions, n_markets, size, n_days = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5])
+codes = get_store().codes(market); codes += [f"X{i:06d}" for i in range(size - len(codes))]
+listings = {}; list_bytes = 0
+for m in range(n_markets):  # 시장 하나씩 만들고 리스트는 버린다 (리스트 생성 자체가 기준선을 끌어올리지 않도록)
+    pairs = [[c, f"종목{m}{c}"] for c in (codes if m == 0 else [f"M{m}{i:06d}" for i in range(size)])]
+    list_bytes += deep_size(pairs); listings[m] = Listing.from_pairs(market, pairs); del pairs
+real = listings[0][:len(get_store().codes(market))]
+u = np.linspace(0, 1, 50); list(iter_scan(market, {'p': (u, n_days)}, real[:10]))  # import / 첫 호출 비용은 기준선에 넣는다
+reset_peak(); base = status("VmRSS"); held = [None] * sessions
+def session(i):
+    last = None
+    for last in iter_scan(market, {'p': (u + 0.01 * i, n_days)}, real): pass
+    held[i] = last[2]['p'].items()  # 세션 상태에 남는 결과
+threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+for th in threads: th.start()
+for th in threads: th.join()
+print(json.dumps({'base_bytes': base, 'peak_bytes': status("VmHWM"), 'results': sum(len(h) for h in held), 'listing_bytes': sum(l.nbytes for l in listings.values()),
+                  'list_bytes': list_bytes}))
+"""
+
+
+def bench_memory(sessions_list=MEMORY_SESSIONS, n_days=20, markets=LISTING_MARKETS, size=LISTING_SIZE):
+    # 세션 수별 (최대 RSS - 기준선) / 세션 수. 종목표: 세션마다 복사되던 [[코드, 이름], ...] (st.cache_data) vs 모든 세션이 공유하는 Listing
+    cwd = os.path.dirname(os.path.abspath(__file__)); rows = []
+    for n in sessions_list:
+        p = subprocess.run([sys.executable, "-c", _MEMORY_PROBE, MARKET, str(n), str(markets), str(size), str(n_days)], capture_output=True, text=True, cwd=cwd, env=os.environ.copy(), timeout=600)
+        if p.returncode != 0: return {'error': p.stderr.strip().splitlines()[-1:] or None}
+        r = json.loads(p.stdout.strip().splitlines()[-1]); grow = max(r['peak_bytes'] - r['base_bytes'], 0)
+        rows.append({'sessions': n, 'peak_mb': r['peak_bytes'] / 2 ** 20, 'growth_mb': grow / 2 ** 20, 'per_session_mb': grow / 2 ** 20 / n, 'results': r['results']})
+    return {'sessions': rows, 'listing': {'markets': markets, 'per_market': size, 'shared_kb': r['listing_bytes'] / 1024, 'list_copy_kb': r['list_bytes'] / 1024,
+                                          'list_copies_mb_at_max_sessions': r['list_bytes'] * sessions_list[-1] / 2 ** 20}}
+
+
+# 새 인터프리터에서 AppTest 로 앱을 한 번 실행하고 재실행 시간을 잰다 (import 캐시가 섞이지 않도록 측정마다 별도 프로세스)
+_APP_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_st = time.perf_counter() - t0
+at = AppTest.from_file(sys.argv[1], default_timeout=300); at.secrets["gsheets"] = {"spreadsheet": "https://example.invalid/sheet"}
+t0 = time.perf_counter(); at.run(); first = time.perf_counter() - t0
+reruns = []
+for _ in range(int(sys.argv[2])):
+    t0 = time.perf_counter(); at.run(); reruns.append(time.perf_counter() - t0)
+print(json.dumps({'streamlit_import': t_st, 'first_run': first, 'reruns': reruns, 'errors': [str(e.value) for e in at.exception],
+                  'heavy_loaded': [m for m in json.loads(sys.argv[3]) if m in sys.modules]}))
+"""
+
+
+def bench_startup(repeat=3, reruns=APP_RERUNS, app_file=APP_FILE):
+    # 첫 실행 시간에는 시장 목록 조회(st.cache_data, 세션 공유)가 포함된다
+    cwd = os.path.dirname(app_file); runs = []
+    for _ in range(repeat):
+        p = subprocess.run([sys.executable, "-c", _APP_PROBE, app_file, str(reruns), json.dumps(HEAVY_MODULES)], capture_output=True, text=True, cwd=cwd, env=os.environ.copy(), timeout=600)
+        if p.returncode != 0: return {'error': p.stderr.strip().splitlines()[-1:] or None}
+        runs.append(json.loads(p.stdout.strip().splitlines()[-1]))
+    def stats(values): return {'min': min(values), 'median': float(np.median(values)), 'mean': float(np.mean(values)), 'repeat': len(values), 'number': 1}
+    heavy = sorted({m for r in runs for m in r['heavy_loaded']})
+    return {'timing': {'streamlit_import': stats([r['streamlit_import'] for r in runs]), 'first_run': stats([r['first_run'] for r in runs]),
+                       'rerun': stats([t for r in runs for t in r['reruns']])},
+            'errors': runs[0]['errors'], 'lazy_imports': {'heavy_loaded': heavy, 'ok': not heavy}}
+
+
+def git_version():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except Exception: return None
+
+
+def run_suite(sizes=SIZES, n_images=60, n_days=20, repeat=3, seed=0, workdir=None, startup=True):
+    workdir = workdir or os.environ.get("ALPHACHART_DATA_DIR") or tempfile.mkdtemp(prefix="alphachart-bench-")
+    out = {'meta': {'version': git_version(), 'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(), 'cpus': os.cpu_count(),
+                    'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"), 'sizes': list(sizes), 'images': n_images, 'n_days': n_days, 'seed': seed}, 'results': {}}
+    rng = np.random.default_rng(seed); user_p_norm = np.linspace(0, 1, 50) + rng.normal(0, 0.05, 50)
+    patterns = {'up': (user_p_norm, n_days), 'v': (np.abs(np.linspace(-1, 1, 50)), 60), 'flat_break': (np.r_[np.zeros(40), np.linspace(0, 1, 10)], 13)}
+    for n in sizes:
+        # 스캔 경로는 기본 저장소(ALPHACHART_DATA_DIR)를 읽으므로 유니버스마다 같은 폴더를 새로 채운다
+        frames = synth_universe(n, seed=seed + n); shutil.rmtree(os.path.join(workdir, "ohlcv"), ignore_errors=True)
+        t0 = time.perf_counter(); build_store(workdir, frames); build_s = time.perf_counter() - t0
+        out['results'][f"universe_{n}"] = {'build_seconds': build_s, 'scoring': bench_scoring(frames, user_p_norm, n_days, repeat), 'scan': bench_scan(frames, patterns, repeat), 'dtw': bench_dtw(frames, patterns, repeat), 'ann': bench_ann(workdir, repeat=repeat, seed=seed),
+                                           'sparklines': bench_sparklines(frames, user_p_norm, n_days, repeat), 'memory': bench_memory(n_days=n_days)}
+    out['results']['images'] = bench_images(synth_charts(n_images, seed=seed), repeat)
+    if startup: out['results']['startup'] = bench_startup(repeat)
+    return out
+
+
+def _timings(results, prefix=""):
+    # 중첩 결과에서 {'경로': min 초} 만 평평하게 뽑는다
+    flat = {}
+    for k, v in results.items():
+        if isinstance(v, dict) and 'min' in v and 'median' in v: flat[prefix + k] = v['min']
+        elif isinstance(v, dict): flat.update(_timings(v, prefix + k + "."))
+    return flat
+
+
+def _parity_failures(results, prefix=""):
+    bad = []
+    for k, v in results.items():
+        if isinstance(v, dict):
+            if k in ('parity', 'offline', 'profile', 'lazy_imports', 'budget', 'recall') and v.get('ok') is False: bad.append(prefix + k)
+            bad += _parity_failures(v, prefix + k + ".")
+    return bad
+
+
+def compare(current, baseline, tolerance=REGRESSION_TOLERANCE):
+    # 반환: (느려진 항목 [(경로, 이전, 현재, 배율)], 일치 검사 실패 항목)
+    cur, base = _timings(current['results']), _timings(baseline['results'])
+    slower = [(k, base[k], cur[k], cur[k] / base[k]) for k in sorted(cur) if k in base and base[k] > 0 and cur[k] / base[k] > tolerance]
+    return slower, _parity_failures(current['results'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AlphaChart AI 오프라인 벤치마크 (합성 데이터, 네트워크 미사용)")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="쉼표로 구분된 유니버스 종목 수")
+    parser.add_argument("--quick", action="store_true", help=f"빠른 점검 ({QUICK_SIZES[0]}종목, 이미지 20장)")
+    parser.add_argument("--images", type=int, default=60)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="합성 저장소 폴더 (생략 시 임시 폴더)")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--no-startup", action="store_true", help="앱 기동/재실행 측정 생략 (streamlit 미설치 환경)")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="이 배율 이상 느려지면 회귀로 판정")
+    args = parser.parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="alphachart-bench-")
+    os.environ["ALPHACHART_DATA_DIR"] = workdir
+    sizes = QUICK_SIZES if args.quick else tuple(int(s) for s in args.sizes.split(","))
+    result = run_suite(sizes, 20 if args.quick else args.images, args.days, args.repeat, args.seed, workdir, not args.no_startup)
+    for key, r in result['results'].items():
+        if key.startswith("universe_"):
+            print(f"[{key}] score_matrix {r['scoring']['fast_per_stock_us']:.2f} us/stock (legacy {r['scoring']['legacy_per_stock_us']:.0f}) | "
+                  f"run_scan {r['scan']['stocks_per_sec']:,.0f} stocks/s (legacy {r['scan']['legacy_stocks_per_sec']:,.0f}) | parity {r['scoring']['parity']['ok'] and r['scan']['parity']['ok']} | offline {r['scan']['offline']['ok']}")
+            dt = r['dtw']
+            print(f"    dtw {dt['slowdown']:.2f}x pearson run_scan | pruned {dt['pruning']['pruned_rate']*100:.1f}% (LB_Kim {dt['pruning']['lb_kim']}, LB_Keogh {dt['pruning']['lb_keogh']}), "
+                  f"abandoned {dt['pruning']['abandoned']}, full DTW {dt['pruning']['full']} / {dt['pruning']['total']} | parity {dt['parity']['ok']}")
+            an = r['ann']
+            print(f"    ann recall@{an['k']} " + ", ".join(f"{p}d {a['recall']:.3f}" for p, a in an['periods'].items()) + f" | query {an['periods']['20']['timing']['query']['min']/an['queries']*1000:.2f} ms "
+                  f"vs brute force {an['periods']['20']['timing']['brute_force']['min']/an['queries']*1000:.2f} ms (20d) | build {an['build_seconds']:.2f} s | ok {an['recall']['ok']}")
+            sp = r['sparklines']
+            print(f"    sparklines {sp['cards']} cards: cold {sp['budget']['cold_ms']:.1f} ms (budget {sp['budget']['budget_ms']:.0f}), warm {sp['timing']['warm']['median']*1000:.1f} ms"
+                  + (f", matplotlib ~{sp['matplotlib_est_ms']:.0f} ms" if 'matplotlib_est_ms' in sp else "") + f", {sp['bytes_per_card']/1024:.1f} KB/card")
+            mem = r['memory']
+            if 'sessions' in mem:
+                print("    memory " + ", ".join(f"{s['sessions']} sessions +{s['growth_mb']:.1f} MB ({s['per_session_mb']:.2f} MB/session)" for s in mem['sessions'])
+                      + f" | listings {mem['listing']['markets']}x{mem['listing']['per_market']}: shared {mem['listing']['shared_kb']:.0f} KB vs list copies {mem['listing']['list_copies_mb_at_max_sessions']:.1f} MB")
+            else: print(f"    memory skipped: {mem['error']}")
+    im = result['results']['images']
+    print(f"[images] candles exact {im['candle_count']['exact_rate']*100:.0f}% / ±10% {im['candle_count']['within_10pct_rate']*100:.0f}% | "
+          f"engine {im['timing']['extract_features_engine']['min']/im['images']*1000:.1f} ms/img, fast {im['timing']['extract_features_fast']['min']/im['images']*1000:.1f} ms/img | profile ok {im['profile']['ok']}")
+    boot = result['results'].get('startup')
+    if boot and 'timing' in boot:
+        print(f"[startup] first run {boot['timing']['first_run']['median']:.2f} s | rerun {boot['timing']['rerun']['median']*1000:.0f} ms | heavy modules at startup {boot['lazy_imports']['heavy_loaded'] or 'none'}")
+    elif boot: print(f"[startup] skipped: {boot['error']}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f: json.dump(result, f, ensure_ascii=False, indent=2)
+    failed = _parity_failures(result['results'])
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f: baseline = json.load(f)
+        slower, failed = compare(result, baseline, args.tolerance)
+        for k, before, after, ratio in slower: print(f"    🐢 {k}: {before*1000:.2f} ms -> {after*1000:.2f} ms (x{ratio:.2f})")
+    else: slower = []
+    for k in failed: print(f"    ❌ {k}")
+    return 1 if slower or failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+import time
+import heapq
+import argparse
+import numpy as np
+
+# --- 〰️ [DTW 유사도 + 하한 가지치기] ---
+# 피어슨(전체 0.7 / 마지막 10점 0.3)은 50점에 고정 리샘플된 점끼리만 비교하므로, 모양은 같은데 몇 봉 밀리거나
+# 늘어난 종목(자동 인식한 분석 기간이 몇 캔들 틀린 경우)을 낮게 본다. DTW 모드는 Sakoe-Chiba 밴드(기본 ±10%) 안에서
+# 시간축을 휘어 맞춘 누적 제곱 오차 d 로 점수를 낸다:  유사도(%) = 100 * (1 - sqrt(d / n))  (n = 프로파일 점 수)
+# 전체 DTW 는 비싸므로 싼 하한부터 차례로 걸러 낸다 (하한 > 컷이면 그 종목은 컷을 넘을 수 없다):
+#   1) LB_Kim  : 첫 점/마지막 점 (경로가 반드시 지나감) - O(1)
+#   2) LB_Keogh: 사용자 패턴의 밴드 포락선 밖으로 나간 만큼, 남은 종목은 종목 포락선 기준 역방향과 중 큰 값 - O(n), 일괄
+#   3) 전체 DTW: 하한이 작은 종목부터 묶음 단위로 계산, 행 최솟값이 컷을 넘으면 그 자리에서 중단 (early abandoning)
+# 컷 = min(min_sim 에 해당하는 거리, k 가 주어지면 지금까지의 k번째 거리). 가지치기된 종목은 하한으로 만든 점수 상한
+# (항상 컷 미만) 을 돌려주므로 호출부의 min_sim / 상위 k 처리는 피어슨과 똑같이 동작한다.
+BAND = 0.1
+BATCH = 256
+SLACK = 1e-9  # 거리 컷을 이만큼(상대) 느슨하게 - 부동소수 오차로 컷에 딱 걸친 종목이 잘못 잘리거나 가지치기 점수가 컷에 닿지 않도록
+
+
+def band_radius(n, band=BAND):
+    return max(1, int(round(n * band)))
+
+
+def to_sim(d, n):
+    return 100.0 * (1.0 - np.sqrt(np.maximum(d, 0.0) / n))
+
+
+def to_dist(sim, n):
+    # 유사도(%) 컷 -> 거리 컷 (0% 미만 점수도 나올 수 있으므로 음수 컷은 무제한)
+    return np.inf if sim < 0 else n * (1.0 - min(sim, 100.0) / 100.0) ** 2 * (1 + SLACK)
+
+
+def envelope(x, r):
+    # 마지막 축 기준 ±r 구간 최댓값/최솟값 (U, L) - 한 칸씩 밀며 r 번 갱신
+    U = x.copy(); L = x.copy()
+    for s in range(1, r + 1):
+        np.maximum(U[..., s:], x[..., :-s], out=U[..., s:]); np.maximum(U[..., :-s], x[..., s:], out=U[..., :-s])
+        np.minimum(L[..., s:], x[..., :-s], out=L[..., s:]); np.minimum(L[..., :-s], x[..., s:], out=L[..., :-s])
+    return U, L
+
+
+def lb_kim(u, S):
+    return (S[:, 0] - u[0]) ** 2 + (S[:, -1] - u[-1]) ** 2
+
+
+def lb_keogh(u, S, r, u_env=None):
+    # 사용자 패턴 포락선 기준 LB_Keogh (밴드 DTW 의 하한)
+    U, L = u_env if u_env is not None else envelope(u, r)
+    return (np.maximum(S - U, 0.0) ** 2 + np.maximum(L - S, 0.0) ** 2).sum(axis=1)
+
+
+def lb_keogh_rev(u, S, r):
+    # 역방향: 종목 포락선 기준 (정방향을 통과한 종목에만 계산)
+    SU, SL = envelope(S, r)
+    return (np.maximum(u - SU, 0.0) ** 2 + np.maximum(SL - u, 0.0) ** 2).sum(axis=1)
+
+
+def dtw_rows(u, S, r, cutoff=np.inf):
+    # u(n,) 와 S(N,n) 각 행의 밴드 DTW (누적 제곱 오차). 종목 축으로 벡터화하고 사용자 패턴 행(i) 만 파이썬 루프.
+    # 같은 행 안의 왼쪽 의존성 D[i,j] = c[j] + min(up[j], D[i,j-1]) 은 누적합으로 풀어 한 번에 계산한다:
+    #   D[i,j] = C[j] + min_{t<=j}(up[t] - C[t-1])   (C = 밴드 안 비용의 누적합, up[t] = min(D[i-1,t], D[i-1,t-1]))
+    # 내부 배열은 (열, 종목) 배치라 누적합/누적 최솟값이 종목 방향으로 연속 메모리를 훑는다.
+    # 반환: (거리, 정확 여부) - 중단된 종목은 그 시점의 행 최솟값(최종 거리의 하한, > cutoff)
+    N, n = S.shape; out = np.full(N, np.inf); exact = np.zeros(N, dtype=bool); alive = np.arange(N)
+    St = np.ascontiguousarray(S.T); prev = np.full((n + 1, N), np.inf); cur = prev.copy(); prev[0] = 0.0  # 열 0 = 가상의 (-1, -1) 시작점
+    for i in range(n):
+        lo, hi = max(0, i - r), min(n, i + r + 1)
+        C = np.cumsum((St[lo:hi] - u[i]) ** 2, axis=0); up = np.minimum(prev[lo:hi], prev[lo + 1:hi + 1])
+        up[1:] -= C[:-1]
+        # 버퍼 두 개를 번갈아 쓰므로 다음 행이 읽는 밴드 양 끝 한 칸만 inf 로 (나머지 열은 읽지 않는다)
+        cur[lo] = np.inf; cur[lo + 1:hi + 1] = C + np.minimum.accumulate(up, axis=0)
+        if hi < n: cur[hi + 1] = np.inf
+        row_min = cur[lo + 1:hi + 1].min(axis=0); dead = row_min > cutoff
+        if dead.sum() * 8 >= len(alive):  # 중단된 종목이 충분히 모였을 때만 압축 (매 행 복사하면 오히려 느리다)
+            out[alive[dead]] = row_min[dead]; keep = ~dead; alive, St, cur, prev = alive[keep], St[:, keep], cur[:, keep], prev[:, keep]
+            if not len(alive): return out, exact
+        prev, cur = cur, prev
+    out[alive] = prev[n]; exact[alive] = True
+    return out, exact
+
+
+class PruneStats:
+    # DTW 점수 계산 단계별 종목 수 (여러 번 호출하면 누적)
+    def __init__(self):
+        self.total = 0; self.flat = 0; self.lb_kim = 0; self.lb_keogh = 0; self.abandoned = 0; self.full = 0; self.seconds = 0.0
+
+    def add(self, other):
+        for name in ("total", "flat", "lb_kim", "lb_keogh", "abandoned", "full", "seconds"): setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def summary(self):
+        scored = max(self.total - self.flat, 1)
+        return {'total': self.total, 'flat': self.flat, 'lb_kim': self.lb_kim, 'lb_keogh': self.lb_keogh, 'abandoned': self.abandoned, 'full': self.full,
+                'pruned_rate': (self.lb_kim + self.lb_keogh) / scored, 'full_rate': self.full / scored, 'seconds': round(self.seconds, 4)}
+
+
+def dtw_scores(profiles, user_p_norm, min_sim=0.0, k=None, band=BAND, stats=None):
+    # profiles: (N, n) 정규화 프로파일 -> (N,) 유사도(%). 모양이 없는(상수) 행은 피어슨처럼 NaN
+    t0 = time.perf_counter()
+    S = np.atleast_2d(np.asarray(profiles, dtype=np.float64)); u = np.asarray(user_p_norm, dtype=np.float64); N, n = S.shape
+    sims = np.full(N, np.nan); counts = PruneStats(); counts.total = N
+    rows = np.flatnonzero(S.max(axis=1) > S.min(axis=1)) if N else np.zeros(0, dtype=np.int64); counts.flat = N - len(rows)
+    r = band_radius(n, band); cut = to_dist(min_sim, n)
+    lb = lb_kim(u, S[rows]); hit = lb > cut
+    sims[rows[hit]] = to_sim(lb[hit], n); counts.lb_kim = int(hit.sum()); rows = rows[~hit]
+    lb = lb_keogh(u, S[rows], r, envelope(u, r)); hit = lb > cut
+    sims[rows[hit]] = to_sim(lb[hit], n); counts.lb_keogh = int(hit.sum()); rows = rows[~hit]
+    lb = np.maximum(lb[~hit], lb_keogh_rev(u, S[rows], r)); hit = lb > cut
+    sims[rows[hit]] = to_sim(lb[hit], n); counts.lb_keogh += int(hit.sum()); rows, lb = rows[~hit], lb[~hit]
+    order = np.argsort(lb, kind="stable"); rows, lb = rows[order], lb[order]
+    best = []; step = BATCH if k else max(len(rows), 1); stop = len(rows)  # best: 지금까지 k개 최소 거리 (음수 최대 힙)
+    for a in range(0, len(rows), step):
+        limit = min(cut, -best[0] * (1 + SLACK)) if k and len(best) >= k else cut
+        b = min(a + step, len(rows)); m = a + int(np.searchsorted(lb[a:b], limit, side="right"))  # 하한 오름차순: [a, m) 만 계산
+        if m > a:
+            d, exact = dtw_rows(u, S[rows[a:m]], r, limit); sims[rows[a:m]] = to_sim(d, n)
+            counts.full += int(exact.sum()); counts.abandoned += int((~exact).sum())
+            for v in (d[exact] if k else ()):
+                if len(best) < k: heapq.heappush(best, -v)
+                elif v < -best[0]: heapq.heapreplace(best, -v)
+        if m < b: stop = m; break
+    sims[rows[stop:]] = to_sim(lb[stop:], n); counts.lb_keogh += len(rows) - stop
+    counts.seconds = time.perf_counter() - t0
+    if stats is not None: stats.add(counts)
+    return sims
+
+
+if __name__ == "__main__":
+    from scoring import resample_rows, score_profiles
+    parser = argparse.ArgumentParser(description="DTW 유사도 가지치기 비율 / 속도 측정 (합성 랜덤워크)")
+    parser.add_argument("--stocks", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--min-sim", type=float, default=80.0)
+    parser.add_argument("--band", type=float, default=BAND)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed); u = np.linspace(0, 1, 50)
+    profiles = resample_rows(np.exp(np.cumsum(rng.normal(0, 0.02, (args.stocks, args.days)), axis=1)), len(u))
+    t0 = time.perf_counter(); score_profiles(profiles, u); t_p = time.perf_counter() - t0
+    stats = PruneStats(); t0 = time.perf_counter(); sims = dtw_scores(profiles, u, args.min_sim, band=args.band, stats=stats); t_d = time.perf_counter() - t0
+    t0 = time.perf_counter(); dtw_rows(u, profiles, band_radius(len(u), args.band)); t_full = time.perf_counter() - t0
+    s = stats.summary()
+    print(f"pearson {t_p * 1000:.1f} ms | dtw {t_d * 1000:.1f} ms (x{t_d / t_p:.1f}) | 가지치기 없이 {t_full * 1000:.1f} ms")
+    print(f"LB_Kim -{s['lb_kim']}, LB_Keogh -{s['lb_keogh']}, 중단 {s['abandoned']}, 전체 DTW {s['full']} / {s['total']} (가지치기 {s['pruned_rate'] * 100:.1f}%) | {args.min_sim:g}% 이상 {int((sims >= args.min_sim).sum())}개")
@@ -0,0 +1,134 @@
+import time
+import random
+import threading
+import urllib.error
+
+# --- 🚦 [공유 데이터 수집 계층] ---
+# 세션마다 ThreadPoolExecutor(30) 를 띄우면 동시 사용자 N명 -> 30·N 개의 동시 요청이 나간다.
+# 이 모듈은 프로세스 전체에서 하나의 동시성 한도(세마포어), 소스별 토큰 버킷, 지터 백오프 재시도를 적용하고
+# 실패한 종목을 조용히 버리지 않고 FetchReport 에 남긴다.
+# 재시도는 일시적인 오류(연결 끊김/타임아웃, HTTP 429, 5xx)에만 한다. 없는 종목, 4xx, 응답 파싱 오류는 첫 시도에서 바로 실패로 남긴다.
+# FinanceDataReader 는 요청마다 requests.get/post 로 자체 연결을 열기 때문에 keep-alive 연결 풀은 여기서 걸 수 없다.
+MAX_CONCURRENCY = 16
+RATE_PER_SEC = 20.0
+BURST = 20
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+
+class FetchError(Exception):
+    def __init__(self, code, cause, attempts):
+        super().__init__(f"{code}: {type(cause).__name__}: {cause} ({attempts}회 시도)")
+        self.code = code; self.cause = cause; self.attempts = attempts
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = float(rate); self.capacity = float(burst); self.tokens = float(burst)
+        self.updated = time.monotonic(); self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate); self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1; return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchReport:
+    # 스캔 1회분 수집 결과: 성공 수, 재시도 수, 실패 종목과 사유
+    def __init__(self):
+        self.ok = 0; self.retries = 0; self.failed = {}; self._lock = threading.Lock()
+
+    def success(self):
+        with self._lock: self.ok += 1
+
+    def retry(self):
+        with self._lock: self.retries += 1
+
+    def fail(self, code, error):
+        with self._lock: self.failed[code] = f"{type(error.cause).__name__}: {error.cause}" if isinstance(error, FetchError) else f"{type(error).__name__}: {error}"
+
+    def summary(self):
+        return {'ok': self.ok, 'retries': self.retries, 'failed': len(self.failed)}
+
+
+def is_transient(e):
+    # 다시 시도하면 성공할 수 있는 오류인지: HTTP 상태가 있으면 429 / 5xx 만, 없으면 네트워크 오류만
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    if status is None and isinstance(e, urllib.error.HTTPError): status = e.code
+    if status is not None: return status == 429 or 500 <= status < 600
+    if isinstance(e, (ConnectionError, TimeoutError, urllib.error.URLError)): return True
+    try: import requests
+    except ImportError: return False
+    return isinstance(e, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError))
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    # 지수 백오프 + full jitter
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class Fetcher:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES, sleep=time.sleep):
+        self.max_concurrency = max_concurrency; self.max_retries = max_retries; self.sleep = sleep
+        self._slots = threading.BoundedSemaphore(max_concurrency); self._buckets = {}; self._lock = threading.Lock()
+
+    def bucket(self, source_name, rate=RATE_PER_SEC, burst=BURST):
+        with self._lock:
+            if source_name not in self._buckets: self._buckets[source_name] = TokenBucket(rate, burst)
+            return self._buckets[source_name]
+
+    def fetch(self, source, code, *args, source_name=None, report=None):
+        # 동시성 슬롯 + 토큰을 얻은 뒤 호출, 일시적인 오류면 지터 백오프로 재시도. 끝내 실패하거나 재시도할 오류가 아니면 FetchError
+        bucket = self.bucket(source_name or type(source).__name__); last_exc = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                if report: report.retry()
+                self.sleep(backoff_delay(attempt - 1))
+            bucket.acquire()
+            with self._slots:
+                try:
+                    result = source(code, *args)
+                    if report: report.success()
+                    return result
+                except Exception as e:
+                    if not is_transient(e): raise FetchError(code, e, attempt + 1) from e
+                    last_exc = e
+        raise FetchError(code, last_exc, self.max_retries + 1)
+
+    def wrap(self, source, source_name=None, report=None):
+        # load_recent_bars(source=...) 등에 그대로 넘길 수 있는 source(code, start) 형태로 감싼다
+        return lambda code, *args: self.fetch(source, code, *args, source_name=source_name, report=report)
+
+
+class FlakySource:
+    # 테스트용: 지연과 오류를 주입하는 가짜 소스 (fail_rate 확률로 일시적 타임아웃, fail_codes 는 재시도하지 않는 404, latency 초 지연)
+    def __init__(self, source, latency=0.0, fail_rate=0.0, fail_codes=(), seed=None):
+        self.source = source; self.latency = latency; self.fail_rate = fail_rate; self.fail_codes = set(fail_codes)
+        self.rng = random.Random(seed); self._lock = threading.Lock(); self.calls = 0; self.active = 0; self.max_active = 0
+
+    def __call__(self, code, *args):
+        with self._lock:
+            self.calls += 1; self.active += 1; self.max_active = max(self.max_active, self.active); fail = self.rng.random() < self.fail_rate
+        try:
+            if self.latency: time.sleep(self.latency)
+            if code in self.fail_codes: raise urllib.error.HTTPError(f"flaky://{code}", 404, "injected permanent failure", None, None)
+            if fail: raise TimeoutError("injected timeout")
+            return self.source(code, *args)
+        finally:
+            with self._lock: self.active -= 1
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+def get_fetcher():
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None: _default_fetcher = Fetcher()
+        return _default_fetcher
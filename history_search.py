@@ -0,0 +1,113 @@
+import argparse
+import numpy as np
+from scipy.signal import fftconvolve
+from scoring import resample_weights, TAIL_LEN, W_TOTAL, W_TAIL
+
+# --- 🕰️ [과거 전 구간 도플갱어 검색] ---
+# 최근 n_days 뿐 아니라 종목 히스토리의 모든 n_days 구간과 비교한다.
+# 구간별 MinMaxScaler 는 아핀 변환이라 피어슨 상관에 영향이 없으므로, 50점 리샘플 s = W^T w 에 대해
+#   cov(u, s)  = w · (W uc)                         (uc = u - mean(u))
+#   var(s)*50  = w^T (W W^T) w - (w · W1)^2 / 50     (W W^T 는 삼중대각)
+# 가 모두 고정 커널과의 슬라이딩 내적이 된다 -> FFT(MASS 방식)로 전 구간을 한 번에 계산.
+HORIZONS = (1, 5, 20)
+
+
+def sliding_dot(x, kernel):
+    # 길이 len(x)-len(kernel)+1 : 각 구간 x[t:t+k] 와 kernel 의 내적
+    if len(kernel) > 64: return fftconvolve(x, kernel[::-1], mode="valid")
+    return np.lib.stride_tricks.sliding_window_view(x, len(kernel)) @ kernel
+
+
+def _sliding_corr(x, W, u):
+    # 모든 구간 w 에 대해 corr(u, W^T w) (W: n x m 리샘플 가중치, u: 길이 m)
+    m = W.shape[1]; uc = u - u.mean(); uu = uc @ uc
+    q = W @ uc; r = W.sum(axis=1); A = W @ W.T
+    a0 = np.diag(A).copy(); a1 = 2 * np.diag(A, 1)
+    num = sliding_dot(x, q); sr = sliding_dot(x, r)
+    quad = sliding_dot(x * x, a0)
+    if len(a1): quad[:] += sliding_dot(x[:-1] * x[1:], a1)[:len(quad)]
+    var = quad - sr * sr / m
+    with np.errstate(divide="ignore", invalid="ignore"): corr = num / np.sqrt(var * uu)
+    # 평평한 구간(분산 0, 부동소수 오차 포함)은 pearsonr 과 같이 NaN
+    corr[(var <= 1e-12 * np.abs(quad)) | (uu == 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def sliding_similarity(closes, user_p_norm, n_days, tail_len=TAIL_LEN):
+    # closes 의 모든 n_days 구간에 대한 유사도(%) - 구간 t 는 closes[t:t+n_days]
+    x = np.asarray(closes, dtype=np.float64)
+    if len(x) < n_days: return np.empty(0)
+    x = x - x.mean()  # 레벨 이동은 상관계수에 영향 없음, 정밀도 확보용
+    u = np.asarray(user_p_norm, dtype=np.float64); W = resample_weights(n_days, len(u))
+    corr_total = _sliding_corr(x, W, u)
+    # 꼬리 10점: W 의 마지막 10열만 사용 (해당 열의 가중치가 있는 행만 남겨 커널을 짧게 만든다)
+    W_tail = W[:, -tail_len:]; rows = np.nonzero(W_tail.any(axis=1))[0]; lo = rows[0]
+    corr_tail = _sliding_corr(x[lo:], W_tail[lo:], u[-tail_len:])[:len(corr_total)]
+    corr_tail = np.nan_to_num(corr_tail, nan=0.0)
+    return ((corr_total * W_TOTAL) + (corr_tail * W_TAIL) + 1) * 50
+
+
+def top_k_windows(sims, k, exclusion):
+    # 겹치는 구간이 결과를 도배하지 않도록, 고른 구간 주변 ±exclusion 은 제외하고 상위 k 개 선택
+    sims = np.where(np.isnan(sims), -np.inf, sims); picked = []
+    for t in np.argsort(sims)[::-1]:
+        if not np.isfinite(sims[t]) or len(picked) >= k: break
+        if all(abs(t - p) > exclusion for p in picked): picked.append(int(t))
+    return picked
+
+
+def forward_returns(closes, end_idx, horizons=HORIZONS):
+    base = closes[end_idx]
+    return {h: (float(closes[end_idx + h] / base - 1) if end_idx + h < len(closes) and base else np.nan) for h in horizons}
+
+
+def search_history(closes, dates, user_p_norm, n_days, top_k=5, horizons=HORIZONS, min_sim=None):
+    closes = np.asarray(closes, dtype=np.float64)
+    sims = sliding_similarity(closes, user_p_norm, n_days)
+    if len(sims) == 0: return []
+    matches = []
+    for t in top_k_windows(sims, top_k, n_days // 2):
+        if min_sim is not None and sims[t] < min_sim: break
+        end = t + n_days - 1
+        matches.append({'start': dates[t], 'end': dates[end], 'sim': float(sims[t]), 'fwd': forward_returns(closes, end, horizons)})
+    return matches
+
+
+def search_market(market, stocks, user_p_norm, n_days, top_k=5, horizons=HORIZONS, min_sim=80.0, store=None):
+    # stocks: [[code, name], ...] - 로컬 OHLCV 저장소의 전체 히스토리에서 종목별 상위 구간을 찾아 유사도 순으로 합친다
+    from ohlcv_store import get_store
+    store = store or get_store(); results = []
+    for code, name in stocks:
+        bars = store.read_tail(market, code, store.length(market, code))
+        if bars is None: continue
+        for m in search_history(bars['Close'], bars['Date'], user_p_norm, n_days, top_k, horizons, min_sim):
+            m['code'] = code; m['name'] = name; results.append(m)
+    results.sort(key=lambda x: x['sim'], reverse=True)
+    return results
+
+
+def summarize_forward_returns(matches, horizons=HORIZONS):
+    # 패턴 검증용: 기간별 표본 수 / 평균 / 중앙값 / 상승 비율
+    summary = {}
+    for h in horizons:
+        r = np.array([m['fwd'][h] for m in matches], dtype=np.float64); r = r[~np.isnan(r)]
+        summary[h] = {'n': len(r), 'mean': float(r.mean()) if len(r) else np.nan, 'median': float(np.median(r)) if len(r) else np.nan, 'hit_rate': float((r > 0).mean()) if len(r) else np.nan}
+    return summary
+
+
+if __name__ == "__main__":
+    from patterns import PATTERN_DB
+    from pattern_cache import get_pattern_features
+    from ohlcv_store import get_store, MARKETS
+    parser = argparse.ArgumentParser(description="과거 전 구간 패턴 검색 및 이후 수익률 검증")
+    parser.add_argument("--market", choices=MARKETS, required=True)
+    parser.add_argument("--pattern", choices=list(PATTERN_DB), required=True)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--min-sim", type=float, default=80.0)
+    args = parser.parse_args()
+    feat = get_pattern_features(args.pattern); p = PATTERN_DB[args.pattern]
+    n_days = p.get('fixed_period', feat.candle_count)
+    store = get_store(); stocks = [[c, c] for c in store.codes(args.market)]
+    matches = search_market(args.market, stocks, feat.profile_norm, n_days, args.top_k, min_sim=args.min_sim, store=store)
+    for m in matches[:20]: print(f"{m['code']:>10} {str(m['start'])} ~ {str(m['end'])}  {m['sim']:.1f}%  " + "  ".join(f"+{h}d {m['fwd'][h]*100:+.2f}%" for h in HORIZONS))
+    for h, s in summarize_forward_returns(matches).items(): print(f"+{h}d: n={s['n']} mean={s['mean']*100:+.2f}% median={s['median']*100:+.2f}% hit={s['hit_rate']*100:.1f}%")
@@ -0,0 +1,131 @@
+import numpy as np
+import cv2
+
+# --- 🧠 [차트 이미지 분석 엔진] ---
+def count_candles_engine(img):
+    try:
+        if len(img.shape) == 3: gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        else: gray = img
+        if np.mean(gray) > 127: thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+        else: thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+        kernel_v = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 3)) 
+        cleaned = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel_v)
+        contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours: return 20
+        valid_widths = []
+        height, width = img.shape[:2]; min_h = height * 0.02 
+        for c in contours:
+            x, y, w, h = cv2.boundingRect(c)
+            if h > min_h: valid_widths.append(w)
+        if not valid_widths: return 20
+        median_w = np.median(valid_widths)
+        if median_w == 0: median_w = 1
+        total_cnt = 0
+        for w in valid_widths: cnt = max(1, round(w / median_w)); total_cnt += cnt
+        if total_cnt < 5: return 20
+        if total_cnt > 120: return 60 
+        return int(total_cnt)
+    except Exception as e: return 20
+
+def extract_features_engine(img_input, is_file_path=False):
+    try:
+        if is_file_path: img_array = np.fromfile(img_input, np.uint8); img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+        else: file_bytes = np.asarray(bytearray(img_input.read()), dtype=np.uint8); img = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
+        if img is None: return None
+        candle_count = count_candles_engine(img)
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        mask_r = cv2.bitwise_or(cv2.inRange(hsv, np.array([0, 50, 50]), np.array([10, 255, 255])), cv2.inRange(hsv, np.array([170, 50, 50]), np.array([180, 255, 255])))
+        mask_b = cv2.inRange(hsv, np.array([100, 50, 50]), np.array([130, 255, 255])); mask_g = cv2.inRange(hsv, np.array([40, 50, 50]), np.array([80, 255, 255])); mask_k = cv2.inRange(hsv, np.array([0, 0, 0]), np.array([180, 255, 80]))
+        combined = cv2.bitwise_or(cv2.bitwise_or(mask_r, mask_b), cv2.bitwise_or(mask_k, mask_g))
+        height, width = combined.shape; p_avg = []
+        for x in range(width):
+            px = np.where(combined[:, x] > 0)[0]
+            if len(px) > 0: p_avg.append(height - np.mean(px))
+        if not p_avg: return None
+        res_p = np.interp(np.linspace(0, len(p_avg)-1, 50), np.arange(len(p_avg)), np.array(p_avg))
+        return res_p, img, candle_count
+    except: return None
+
+# --- ⚡ [벡터화 추출 엔진] ---
+# 픽셀 열마다 np.where 를 돌던 루프와 4번의 inRange 를 없애고, 한 번의 마스크 + 열 단위 합산으로 같은 50점 프로파일을 만든다.
+# 항상 원본 해상도 그대로 계산한다 (기존 엔진과 오차 0). 가로로 줄이면 INTER_AREA 가 얇은 꼬리/몸통의 색을 섞어 마스크에서 빠지는
+# 열이 생기고, 그 오차는 캔들 수나 봉당 픽셀 수와 상관없이 나타나 (1200px / 16봉 차트도 800px 로 줄이면 0.0265) 허용치를 지킬 수 없다.
+PROFILE_ERROR_BUDGET = 0.01  # 기존 엔진 대비 허용 오차 (1 - 상관계수)
+N_PROFILE_POINTS = 50
+
+# 색상(H) 조건: 빨강(0~10, 170~180) / 초록(40~80) / 파랑(100~130) - 채도·명도 50 이상일 때
+_HUE_OK = np.zeros(256, dtype=bool); _HUE_OK[0:11] = True; _HUE_OK[170:181] = True; _HUE_OK[40:81] = True; _HUE_OK[100:131] = True
+
+
+def decode_image(img_input, is_file_path=False):
+    if is_file_path: return cv2.imdecode(np.fromfile(img_input, np.uint8), cv2.IMREAD_COLOR)
+    return cv2.imdecode(np.frombuffer(img_input.read(), dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def chart_mask(img):
+    # extract_features_engine 의 (빨강|파랑|초록|검정) 마스크와 동일한 조건
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    return (_HUE_OK[h] & (s >= 50) & (v >= 50)) | (v <= 80)
+
+
+def column_profile(mask):
+    # 열마다 (높이 - 마스크 픽셀 행 평균). 마스크가 빈 열은 건너뛴다 (기존 루프와 동일)
+    height = mask.shape[0]
+    counts = mask.sum(axis=0)
+    sums = np.arange(height, dtype=np.float64) @ mask
+    valid = counts > 0
+    return height - sums[valid] / counts[valid]
+
+
+def extract_features_fast(img_input, is_file_path=False, img=None):
+    try:
+        if img is None: img = decode_image(img_input, is_file_path)
+        if img is None: return None
+        candle_count = count_candles_engine(img)
+        p_avg = column_profile(chart_mask(img))
+        if len(p_avg) == 0: return None
+        res_p = np.interp(np.linspace(0, len(p_avg)-1, N_PROFILE_POINTS), np.arange(len(p_avg)), p_avg)
+        return res_p, img, candle_count
+    except: return None
+
+
+def profile_error(p_a, p_b):
+    # 두 50점 프로파일의 (1 - 피어슨 상관계수). 유사도 점수는 상관계수로만 계산되므로 이 값으로 오차를 잰다
+    p_a = np.asarray(p_a, dtype=np.float64); p_b = np.asarray(p_b, dtype=np.float64)
+    if np.ptp(p_a) == 0 or np.ptp(p_b) == 0: return 0.0 if np.allclose(p_a, p_b) else 1.0
+    return float(1.0 - np.corrcoef(p_a, p_b)[0, 1])
+
+
+def extract_features_batch(paths, max_workers=4):
+    # 여러 이미지 일괄 추출 (cv2 연산은 GIL 을 놓으므로 스레드로 충분)
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        return list(ex.map(lambda p: extract_features_fast(p, is_file_path=True), paths))
+
+
+def compare_with_legacy(paths, budget=PROFILE_ERROR_BUDGET):
+    # 업로드 폴더 회귀 점검: 이미지별 기존/신규 엔진 프로파일 오차, 캔들 수, 처리 시간
+    import time
+    report = []
+    for p in paths:
+        img = decode_image(p, is_file_path=True)
+        if img is None: report.append({'path': p, 'ok': False, 'error': 'decode'}); continue
+        t0 = time.perf_counter(); legacy = extract_features_engine(p, is_file_path=True); t1 = time.perf_counter()
+        fast = extract_features_fast(None, img=img); t2 = time.perf_counter()
+        if legacy is None or fast is None:
+            report.append({'path': p, 'ok': legacy is None and fast is None, 'error': 'no_profile'}); continue
+        err = profile_error(legacy[0], fast[0])
+        report.append({'path': p, 'ok': err <= budget, 'profile_error': err, 'candles_legacy': legacy[2], 'candles_fast': fast[2], 'legacy_ms': (t1 - t0) * 1000, 'fast_ms': (t2 - t1) * 1000})
+    return report
+
+
+if __name__ == "__main__":
+    import os, sys, json
+    folder = sys.argv[1] if len(sys.argv) > 1 else "."
+    files = [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+    report = compare_with_legacy(files)
+    for r in report: print(json.dumps(r, ensure_ascii=False))
+    bad = [r for r in report if not r['ok']]
+    print(f"{'✅' if not bad else '❌'} {len(report) - len(bad)}/{len(report)}개 이미지가 오차 허용치({PROFILE_ERROR_BUDGET}) 이내")
+    sys.exit(1 if bad else 0)
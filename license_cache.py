@@ -0,0 +1,186 @@
+import os
+import re
+import time
+import hashlib
+import argparse
+import threading
+from datetime import timedelta
+from collections import namedtuple
+from zoneinfo import ZoneInfo
+import pandas as pd
+from ohlcv_store import DATA_DIR
+from telemetry import get_metrics
+
+# --- 🔑 [라이선스 캐시] ---
+# 로그인할 때마다 구글 시트 전체를 내려받아 pandas 로 선형 검색하던 것을,
+# 백그라운드 스레드가 주기적으로(기본 5분) 시트를 읽어 sha256(키) -> License 딕셔너리로 만들어 두고 O(1) 로 확인한다.
+#   - 만료일은 확인 시점의 현재 시각과 매번 비교하므로 갱신 사이에도 정확히 지켜진다
+#     ('YYYY-MM-DD' 는 그 날 자정까지, 시각이 있으면 그 시각까지 / LICENSE_TZ 기준)
+#   - 해지(revoke)는 DATA_DIR/license_revoked 파일에 해시를 추가하면 갱신을 기다리지 않고 모든 세션/프로세스에 바로 반영된다
+#     (해지 목록은 이 파일 하나가 기준 - 줄을 지우면 해지 취소, 파일을 지우면 전부 취소)
+#   - 시트에 없는 키는 새 고객일 수 있으므로 즉시 다시 읽되, 할당량 보호를 위해 MIN_REFRESH_GAP 간격으로 제한한다
+#   - ALPHACHART_LICENSE_CSV 를 주면 구글 시트 대신 같은 컬럼(license_key, status, expiry_date)의 CSV 를 읽는다 (테스트/로컬용)
+REFRESH_INTERVAL = float(os.environ.get("ALPHACHART_LICENSE_REFRESH", 300))
+MIN_REFRESH_GAP = 30.0
+LICENSE_TZ = ZoneInfo(os.environ.get("ALPHACHART_LICENSE_TZ", "Asia/Seoul"))
+REVOKED_FILE = os.path.join(DATA_DIR, "license_revoked")
+CSV_PATH = os.environ.get("ALPHACHART_LICENSE_CSV")
+DATE_ONLY = re.compile(r"^\d{4}[-./]\d{1,2}[-./]\d{1,2}$")
+
+MSG_OK = "인증 성공"
+MSG_INACTIVE = "비활성화된 라이선스입니다."
+MSG_INVALID = "유효하지 않은 라이선스 키입니다."
+MSG_EXPIRED = "만료된 라이선스입니다."
+MSG_REVOKED = "해지된 라이선스입니다."
+MSG_UNAVAILABLE = "시트 데이터를 가져오지 못했습니다."
+
+License = namedtuple("License", ["active", "expires_at", "expiry_text"])  # expires_at: epoch 초 (None = 무기한)
+
+
+def hash_key(key):
+    return hashlib.sha256(str(key).strip().encode()).hexdigest()
+
+
+def parse_expiry(value, tz=LICENSE_TZ):
+    # 비어 있거나 해석할 수 없으면 무기한 (기존 시트의 '무제한' 등 표기 유지)
+    text = str(value).strip()
+    if not text or text.lower() in ("nan", "nat", "none"): return None
+    ts = pd.to_datetime(text, errors="coerce")
+    if pd.isna(ts): return None
+    dt = ts.to_pydatetime()
+    if DATE_ONLY.match(text): dt += timedelta(days=1)  # 날짜만 있으면 그 날 하루 끝까지 유효
+    if dt.tzinfo is None: dt = dt.replace(tzinfo=tz)
+    return dt.timestamp()
+
+
+def push_revocation(key_hash, path=REVOKED_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f: f.write(key_hash + "\n")
+
+
+def build_index(df):
+    # 시트 DataFrame -> {sha256(키): License}. 같은 키가 여러 줄이면 마지막 줄 우선
+    index = {}
+    if df is None or df.empty: return index
+    for key, status, expiry in zip(df['license_key'].astype(str).str.strip(), df['status'].astype(str).str.strip().str.lower(), df['expiry_date'] if 'expiry_date' in df.columns else [None] * len(df)):
+        if not key or key.lower() == "nan": continue
+        index[hash_key(key)] = License(status == "active", parse_expiry(expiry), expiry)
+    return index
+
+
+class SheetSource:
+    # streamlit-gsheets 연결 (ttl=0: 캐시 없이 매번 시트 원본을 읽는다)
+    def __init__(self, conn, spreadsheet):
+        self.conn = conn; self.spreadsheet = spreadsheet
+
+    def __call__(self):
+        return self.conn.read(spreadsheet=self.spreadsheet, ttl=0)
+
+
+class CsvSource:
+    # 시트와 같은 컬럼의 로컬 CSV (테스트/오프라인 대체용)
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self):
+        return pd.read_csv(self.path, dtype=str, keep_default_na=False)
+
+
+class LicenseCache:
+    def __init__(self, source, interval=REFRESH_INTERVAL, revoked_file=REVOKED_FILE, clock=time.time):
+        self.source = source; self.interval = interval; self.revoked_file = revoked_file; self.clock = clock
+        self.index = None; self.loaded_at = None; self.last_error = None; self._last_attempt = 0.0
+        self._revoked = set(); self._revoked_stamp = None
+        self._lock = threading.Lock(); self._thread = None
+
+    def refresh(self):
+        # 시트를 다시 읽어 인덱스를 통째로 교체 (실패하면 이전 인덱스 유지)
+        with self._lock:
+            self._last_attempt = time.monotonic()
+            try: index = build_index(self.source())
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"; get_metrics().inc('alphachart_license_refresh_total', result="error"); return False
+            self.index = index; self.loaded_at = self.clock(); self.last_error = None
+        get_metrics().inc('alphachart_license_refresh_total', result="ok"); return True
+
+    def start(self):
+        # 백그라운드 주기 갱신 (프로세스당 스레드 1개)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="alphachart-license"); self._thread.start()
+        return self
+
+    def _loop(self):
+        while True:
+            self.refresh(); time.sleep(self.interval)
+
+    def _refresh_if_allowed(self):
+        if time.monotonic() - self._last_attempt < MIN_REFRESH_GAP: return False
+        return self.refresh()
+
+    def _load_revoked(self):
+        # 파일이 바뀌었을 때만 (수정 시각, 크기) 파일 내용만으로 다시 만든다. 파일이 없으면 해지 없음
+        try: st = os.stat(self.revoked_file); stamp = (st.st_mtime_ns, st.st_size)
+        except OSError: self._revoked = set(); self._revoked_stamp = None; return self._revoked
+        if stamp != self._revoked_stamp:
+            with open(self.revoked_file, encoding="utf-8") as f: self._revoked = {line.strip() for line in f if line.strip()}
+            self._revoked_stamp = stamp
+        return self._revoked
+
+    def revoke(self, key=None, key_hash=None):
+        # 해지 푸시: 파일에 기록해 다른 프로세스에도 반영하고, 이 프로세스에는 다음 파일 확인을 기다리지 않고 바로 반영
+        h = key_hash or hash_key(key); push_revocation(h, self.revoked_file)
+        with self._lock: self._revoked = self._revoked | {h}
+        return h
+
+    def check_hash(self, h, now=None):
+        # 반환: (유효 여부, 메시지, 만료일 표기). 시트를 다시 읽지 않는다 (세션 재검증용)
+        if self.index is None: return False, MSG_UNAVAILABLE, None
+        lic = self.index.get(h)
+        if lic is None: return False, MSG_INVALID, None
+        if h in self._load_revoked(): return False, MSG_REVOKED, None
+        if not lic.active: return False, MSG_INACTIVE, None
+        if lic.expires_at is not None and (now if now is not None else self.clock()) >= lic.expires_at: return False, MSG_EXPIRED, lic.expiry_text
+        return True, MSG_OK, lic.expiry_text
+
+    def check(self, key, now=None):
+        # 로그인: 아직 못 읽었거나 모르는 키면 (간격 제한 하에) 시트를 즉시 다시 읽고 한 번 더 확인
+        h = hash_key(key)
+        if self.index is None: self.refresh()
+        ok, msg, expiry = self.check_hash(h, now)
+        if msg == MSG_INVALID and self._refresh_if_allowed(): ok, msg, expiry = self.check_hash(h, now)
+        get_metrics().inc('alphachart_license_checks_total', result="ok" if ok else {MSG_INVALID: "invalid", MSG_INACTIVE: "inactive", MSG_EXPIRED: "expired", MSG_REVOKED: "revoked"}.get(msg, "unavailable"))
+        return ok, msg, expiry
+
+    def stats(self):
+        return {'keys': len(self.index or {}), 'loaded_at': self.loaded_at, 'revoked': len(self._load_revoked()), 'last_error': self.last_error, 'interval': self.interval}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_license_cache(source=None):
+    # 프로세스 공용 캐시. 처음 부를 때 source (없으면 ALPHACHART_LICENSE_CSV) 로 만들고 백그라운드 갱신을 시작한다
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            if source is None and CSV_PATH: source = CsvSource(CSV_PATH)
+            if source is None: raise ValueError("license source required (SheetSource or ALPHACHART_LICENSE_CSV)")
+            _default_cache = LicenseCache(source).start()
+        return _default_cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="라이선스 캐시 도구")
+    parser.add_argument("--revoke", action="append", default=[], help="해지할 라이선스 키 (여러 번 지정 가능, 모든 프로세스에 즉시 반영)")
+    parser.add_argument("--revoke-hash", action="append", default=[], help="키 대신 sha256 해시로 해지")
+    parser.add_argument("--csv", default=CSV_PATH, help="확인에 쓸 CSV (license_key, status, expiry_date)")
+    parser.add_argument("--check", action="append", default=[], help="CSV 기준으로 키 확인")
+    args = parser.parse_args()
+    cache = LicenseCache(CsvSource(args.csv)) if args.csv else None
+    for key in args.revoke + args.revoke_hash:
+        h = key if key in args.revoke_hash else hash_key(key); push_revocation(h)
+        print(f"⛔ 해지: {h[:12]}… -> {REVOKED_FILE}")
+    if args.check:
+        if cache is None: parser.error("--check 에는 --csv (또는 ALPHACHART_LICENSE_CSV) 가 필요합니다")
+        for key in args.check: print(key[:4] + "…", *cache.check(key))
+        print(cache.stats())
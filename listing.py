@@ -0,0 +1,141 @@
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+# --- 🗂️ [상장 종목표 / 스캔 레코드 - 작은 메모리 표현] ---
+# fdr.StockListing 결과를 [[코드, 이름], ...] 파이썬 리스트로 들고 있으면 종목마다 list 1개 + str 2개(수백 바이트)가 생기고,
+# st.cache_data 는 세션이 읽을 때마다 그 리스트를 통째로 복사(pickle)한다. 시장 여러 개 x 세션 여러 개면 이게 서버 메모리 한도를 정한다.
+# Listing 은 같은 내용을 numpy 배열 몇 개로 들고 있고 모든 세션이 읽기 전용으로 공유한다:
+#   - 코드: 고정폭 바이트 배열 (S, UTF-8)
+#   - 이름: UTF-8 을 이어 붙인 bytes 한 덩어리 + 행별 시작/끝 오프셋 (Arrow 문자열 열과 같은 방식)
+#   - 코드 -> 행: 코드 정렬 순서 (searchsorted, 선형 탐색 없음 - 처음 찾을 때 한 번 만든다)
+# 시가총액 순서 그대로이고, 기존 리스트처럼 len / 슬라이스 / (코드, 이름) 순회가 된다. 슬라이스는 배열 뷰만 새로 만든다.
+# 스캔 중 종목마다 만들던 dict 는 __slots__ 레코드(Candidate, ScanResult)로 바꾼다 (결과는 기존처럼 r['sim'] / r.get() 로 읽는다).
+
+
+class Listing:
+    __slots__ = ("market", "codes", "_blob", "_start", "_end", "_order")
+
+    def __init__(self, market, codes, blob, start, end, order=None):
+        self.market = market; self.codes = codes; self._blob = blob; self._start = start; self._end = end; self._order = order
+
+    @classmethod
+    def from_pairs(cls, market, pairs):
+        # [[코드, 이름], ...] (또는 (코드, 이름) 튜플) -> Listing
+        codes = []; names = []
+        for code, name in pairs: codes.append(str(code).encode()); names.append(str(name).encode())
+        end = np.cumsum([len(b) for b in names], dtype=np.int64); start = end - np.array([len(b) for b in names], dtype=np.int64)
+        idx = np.int32 if (end[-1] if len(end) else 0) < 2 ** 31 else np.int64
+        arrays = [np.array(codes, dtype=f"S{max(map(len, codes), default=1)}"), start.astype(idx), end.astype(idx)]
+        for a in arrays: a.flags.writeable = False
+        return cls(market, arrays[0], b"".join(names), arrays[1], arrays[2])
+
+    @classmethod
+    def from_frame(cls, market, df, code_col, name_col="Name"):
+        return cls.from_pairs(market, zip(df[code_col].tolist(), df[name_col].tolist()))
+
+    def __len__(self): return len(self.codes)
+
+    def __getitem__(self, i):
+        # 정수 -> (코드, 이름), 슬라이스 / 행 번호 배열 / bool 마스크 -> Listing (같은 이름 덩어리를 공유)
+        if isinstance(i, (int, np.integer)): return self.code(i), self.name(i)
+        return Listing(self.market, self.codes[i], self._blob, self._start[i], self._end[i])
+
+    def __iter__(self):
+        blob = self._blob
+        for code, a, b in zip(self.codes.tolist(), self._start.tolist(), self._end.tolist()): yield code.decode(), blob[a:b].decode()
+
+    def code(self, i): return self.codes[i].decode()
+
+    def name(self, i): return self._blob[self._start[i]:self._end[i]].decode()
+
+    def code_list(self): return [c.decode() for c in self.codes.tolist()]
+
+    def find(self, code):
+        # 코드 -> 행 번호 (없으면 -1)
+        if self._order is None:
+            order = np.argsort(self.codes, kind="stable"); order.flags.writeable = False; self._order = order  # 여러 세션이 동시에 만들어도 결과는 같다
+        key = str(code).encode(); i = int(np.searchsorted(self.codes, key, sorter=self._order))
+        return int(self._order[i]) if i < len(self.codes) and self.codes[self._order[i]] == key else -1
+
+    def name_of(self, code, default=None):
+        i = self.find(code)
+        return default if i < 0 else self.name(i)
+
+    def prepend(self, code, name):
+        # 맨 앞에 한 종목을 더한 새 Listing (디버그 종목 강제 포함용 - 범위 밖 종목일 때만 호출)
+        return Listing.from_pairs(self.market, [(code, name), *self])
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + len(self._blob) + self._start.nbytes + self._end.nbytes + (self._order.nbytes if self._order is not None else 0)
+
+
+def as_listing(stocks, market=None):
+    # [[코드, 이름], ...] 리스트를 넘기는 호출부(CLI, 벤치마크)도 받는다
+    return stocks if isinstance(stocks, Listing) else Listing.from_pairs(market, stocks)
+
+
+class Candidate:
+    # 캔들 필터를 통과한 종목 1개: 마지막 종가 + 유사도 계산용 종가 구간 (float32 복사본 - 저장소 memmap 을 붙잡지 않는다)
+    __slots__ = ("code", "name", "price", "filter_status", "flow")
+
+    def __init__(self, code, name, price, filter_status, flow):
+        self.code = code; self.name = name; self.price = price; self.filter_status = filter_status; self.flow = flow
+
+
+class ScanResult:
+    # 스캔 결과 1건. 기존 dict 결과와 같은 방식으로 읽고 쓴다 (r['sim'], r.get('market', 기본값), r['name'] = ...)
+    # market 은 통합 검색 결과에만 있다. 결과 캐시 / JSON 으로는 to_dict()
+    __slots__ = ("code", "name", "sim", "price", "filter_status", "market")
+
+    def __init__(self, code, name, sim, price, filter_status="Pass", market=None):
+        self.code = code; self.name = name; self.sim = sim; self.price = price; self.filter_status = filter_status; self.market = market
+
+    def __getitem__(self, key):
+        if key not in self.__slots__ or (key == "market" and self.market is None): raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__: raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and not (key == "market" and self.market is None)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__ if key in self}
+
+    def __repr__(self):
+        return f"ScanResult({self.to_dict()!r})"
+
+
+def jsonable(o):
+    # json.dumps(default=...) 용: 레코드는 dict, 나머지(numpy 스칼라)는 float
+    return o.to_dict() if isinstance(o, ScanResult) else float(o)
+
+
+def deep_size(obj):
+    # [[코드, 이름], ...] 리스트가 실제로 차지하는 바이트 (list / 내부 list / str 각각)
+    if isinstance(obj, (list, tuple)): return sys.getsizeof(obj) + sum(deep_size(x) for x in obj)
+    return sys.getsizeof(obj)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="상장 종목표 메모리 비교 (파이썬 리스트 vs Listing, 합성 종목)")
+    parser.add_argument("--stocks", type=int, default=8000)
+    parser.add_argument("--sessions", type=int, default=20, help="같은 시장을 읽는 세션 수 (st.cache_data 는 세션마다 리스트를 복사)")
+    args = parser.parse_args()
+    pairs = [[f"{i:06d}", f"테스트종목{i}"] for i in range(args.stocks)]
+    tracemalloc.start(); listing = Listing.from_pairs("KRX", pairs); t0 = time.perf_counter(); listing.find(pairs[-1][0]); t_index = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    t0 = time.perf_counter(); [s for s in pairs if s[0] == pairs[-1][0]]; t_linear = time.perf_counter() - t0
+    t0 = time.perf_counter(); listing.find(pairs[-1][0]); t_find = time.perf_counter() - t0
+    size = deep_size(pairs)
+    print(f"list {size / 1024:.0f} KB x {args.sessions} 세션 = {size * args.sessions / 1024 ** 2:.1f} MB | Listing {listing.nbytes / 1024:.0f} KB (생성 최대 {peak / 1024:.0f} KB, 세션 공유)")
+    print(f"코드 찾기: 선형 {t_linear * 1e6:.0f} us | 정렬 인덱스 생성 {t_index * 1e6:.0f} us, 이후 {t_find * 1e6:.1f} us")
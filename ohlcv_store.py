@@ -0,0 +1,252 @@
+import os
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+
+# --- 📦 [로컬 OHLCV 저장소] ---
+# 시장/종목별 디렉토리에 컬럼 하나당 raw 바이너리 파일 1개(append-only)를 둔다.
+#   data/ohlcv/<market>/<code>/{Date,Open,High,Low,Close,Volume}.bin
+# 읽을 때는 np.memmap 으로 마지막 N개 구간만 매핑하므로 전체 히스토리를 읽거나 복사하지 않는다.
+DATA_DIR = os.environ.get("ALPHACHART_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+MARKETS = ("KRX", "NASDAQ", "NYSE", "TSE", "HKEX")
+DATE_COL = "Date"
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+DTYPES = {"Date": np.dtype("<M8[D]"), "Open": np.dtype("<f8"), "High": np.dtype("<f8"), "Low": np.dtype("<f8"), "Close": np.dtype("<f8"), "Volume": np.dtype("<f8")}
+SYNC_FILE = "_synced"
+LOCK_FILE = "_lock"
+# 시장별 (시간대, 장 마감 시각, 시간대 DB 가 없을 때의 UTC 오프셋). 마감 + SYNC_DELAY 가 지나야 그날 봉이 있다고 본다
+SESSIONS = {'KRX': ("Asia/Seoul", time(15, 30), 9), 'NASDAQ': ("America/New_York", time(16, 0), -5), 'NYSE': ("America/New_York", time(16, 0), -5),
+            'TSE': ("Asia/Tokyo", time(15, 30), 9), 'HKEX': ("Asia/Hong_Kong", time(16, 10), 8)}
+SYNC_DELAY = timedelta(minutes=30)
+
+
+def _market_tz(market):
+    name, _, offset = SESSIONS[market]
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception: return timezone(timedelta(hours=offset))  # tzdata 없는 환경 (서머타임 무시)
+
+
+def expected_session(market, now=None):
+    # 지금 받을 수 있어야 하는 마지막 거래일 (현지 시각 기준, 마감 전이면 직전 평일). 공휴일은 모르므로 평일 기준 -
+    # 공휴일이면 그날로 한 번 동기화한 뒤에는 다시 받지 않는다. "KRX.W" 같은 주봉/월봉 시장은 원래 시장 기준
+    base = market.split(".")[0]
+    if base not in SESSIONS: return date.today()
+    local = (now or datetime.now(timezone.utc)).astimezone(_market_tz(base))
+    day = local.date() if local.time() >= (datetime.combine(local.date(), SESSIONS[base][1]) + SYNC_DELAY).time() else local.date() - timedelta(days=1)
+    while day.weekday() >= 5: day -= timedelta(days=1)
+    return day
+
+
+class OHLCVStore:
+    def __init__(self, root=None):
+        self.base = root or DATA_DIR; self.root = os.path.join(self.base, "ohlcv"); self._locks = {}; self._locks_guard = threading.Lock()
+
+    def _dir(self, market, code):
+        return os.path.join(self.root, market, str(code).replace("/", "_"))
+
+    def _path(self, d, col):
+        return os.path.join(d, col + ".bin")
+
+    def codes(self, market):
+        d = os.path.join(self.root, market)
+        if not os.path.isdir(d): return []
+        return sorted(c for c in os.listdir(d) if os.path.isdir(os.path.join(d, c)))
+
+    def length(self, market, code):
+        # 쓰다가 중단된 경우를 대비해 모든 컬럼 중 가장 짧은 길이(=완전히 기록된 행 수)를 쓴다
+        d = self._dir(market, code); n = None
+        for col in (DATE_COL,) + COLUMNS:
+            p = self._path(d, col)
+            if not os.path.exists(p): return 0
+            cnt = os.path.getsize(p) // DTYPES[col].itemsize
+            n = cnt if n is None else min(n, cnt)
+        return n
+
+    def _map(self, d, col, start, count):
+        dt = DTYPES[col]
+        return np.memmap(self._path(d, col), dtype=dt, mode="r", offset=start * dt.itemsize, shape=(count,))
+
+    def last_date(self, market, code):
+        n = self.length(market, code)
+        if n == 0: return None
+        return self._map(self._dir(market, code), DATE_COL, n - 1, 1)[0]
+
+    def read_tail(self, market, code, n):
+        # 마지막 n개 봉을 컬럼별 읽기 전용 memmap 으로 반환 (복사 없음)
+        total = self.length(market, code)
+        if total == 0 or n <= 0: return None
+        count = min(n, total); start = total - count; d = self._dir(market, code)
+        return {col: self._map(d, col, start, count) for col in (DATE_COL,) + COLUMNS}
+
+    def read_tail_frame(self, market, code, n):
+        # 기존 fdr.DataReader(code).tail(n) 과 같은 모양의 DataFrame
+        bars = self.read_tail(market, code, n)
+        if bars is None: return None
+        return pd.DataFrame({col: bars[col] for col in COLUMNS}, index=pd.DatetimeIndex(bars[DATE_COL], name=DATE_COL), copy=False)
+
+    @contextmanager
+    def lock(self, market, code):
+        # 종목별 쓰기 잠금: 프로세스 안은 스레드 락, 프로세스 사이(야간 배치 등)는 종목 폴더의 잠금 파일에 flock
+        key = (market, str(code))
+        with self._locks_guard: lk = self._locks.setdefault(key, threading.RLock())
+        with lk:
+            try: import fcntl
+            except ImportError: yield; return  # Windows: 프로세스 안 잠금만
+            d = self._dir(market, code); os.makedirs(d, exist_ok=True)
+            with open(os.path.join(d, LOCK_FILE), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try: yield
+                finally: fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, market, code, df):
+        # 이미 저장된 마지막 날짜 이후의 행만 덧붙인다. 반환값: 추가된 행 수
+        if df is None or df.empty: return 0
+        with self.lock(market, code): return self._append(market, code, df)
+
+    def _append(self, market, code, df):
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        dates = df.index.values.astype(DTYPES[DATE_COL])
+        d = self._dir(market, code); n = self.length(market, code)
+        if n > 0:
+            last = self._map(d, DATE_COL, n - 1, 1)[0]
+            keep = dates > last; df = df[keep]; dates = dates[keep]
+        if df.empty: return 0
+        os.makedirs(d, exist_ok=True)
+        self._truncate(d, n)
+        # 가격 컬럼을 먼저, 날짜를 마지막에 기록 -> 읽는 쪽은 항상 완전한 행만 본다
+        for col in COLUMNS:
+            with open(self._path(d, col), "ab") as f: f.write(df[col].to_numpy(dtype=DTYPES[col]).tobytes())
+        with open(self._path(d, DATE_COL), "ab") as f: f.write(np.ascontiguousarray(dates).tobytes())
+        return len(df)
+
+    def replace_tail(self, market, code, keep, df):
+        # 앞에서부터 keep 개 봉만 남기고 뒤를 df 로 바꾼다 (주봉/월봉의 진행 중인 마지막 봉 재집계용). 반환값: df 의 행 수
+        with self.lock(market, code): return self._replace_tail(market, code, keep, df)
+
+    def _replace_tail(self, market, code, keep, df):
+        # 제자리에서 파일을 줄이면 다른 스캔이 매핑 중인 memmap 이 SIGBUS 를 낼 수 있으므로, 컬럼마다 임시 파일에 새로 쓴 뒤 os.replace 로 바꿔 끼운다
+        # (이미 열린 memmap 은 이전 파일을 그대로 본다). 주봉/월봉은 봉 수가 적어서 앞부분 복사 비용은 작다. 날짜 컬럼을 마지막에 바꾼다
+        d = self._dir(market, code); os.makedirs(d, exist_ok=True); keep = min(keep, self.length(market, code))
+        if df is not None and not df.empty: df = df[~df.index.duplicated(keep="last")].sort_index()
+        n = 0 if df is None else len(df)
+        for col in COLUMNS + (DATE_COL,):
+            p = self._path(d, col); tmp = p + ".tmp"
+            new = (df.index.values.astype(DTYPES[col]) if col == DATE_COL else df[col].to_numpy(dtype=DTYPES[col])) if n else np.zeros(0, DTYPES[col])
+            with open(tmp, "wb") as f:
+                if keep:
+                    with open(p, "rb") as src: f.write(src.read(keep * DTYPES[col].itemsize))
+                f.write(np.ascontiguousarray(new).tobytes())
+            os.replace(tmp, p)
+        return n
+
+    def _truncate(self, d, n):
+        for col in (DATE_COL,) + COLUMNS:
+            p = self._path(d, col)
+            if os.path.exists(p) and os.path.getsize(p) != n * DTYPES[col].itemsize: os.truncate(p, n * DTYPES[col].itemsize)
+
+    def synced_on(self, market, code):
+        p = os.path.join(self._dir(market, code), SYNC_FILE)
+        try:
+            with open(p) as f: return f.read().strip()
+        except OSError: return None
+
+    def mark_synced(self, market, code, day=None):
+        # 기본값: 지금 기준 마지막 거래일 (장중에 동기화하면 전 거래일로 기록 -> 마감 후 다시 받는다)
+        d = self._dir(market, code); os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, SYNC_FILE), "w") as f: f.write((day or expected_session(market)).isoformat())
+
+    def is_fresh(self, market, code, now=None):
+        synced = self.synced_on(market, code)
+        return synced is not None and synced >= expected_session(market, now).isoformat()
+
+    def update(self, market, code, source, only_stale=False):
+        # 저장된 마지막 날짜 다음날부터만 요청해서 빠진 거래일만 추가
+        # only_stale: 잠금을 잡은 뒤 다시 확인해서, 다른 세션이 먼저 받아 왔으면 요청하지 않는다
+        with self.lock(market, code):
+            if only_stale and self.is_fresh(market, code): return 0
+            session = expected_session(market)
+            last = self.last_date(market, code)
+            start = None if last is None else (pd.Timestamp(last) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+            df = source(code, start)
+            added = self._append(market, code, df) if df is not None and not df.empty else 0
+            self.mark_synced(market, code, session)
+            return added
+
+    def update_market(self, market, codes, source, max_workers=8):
+        # 야간 배치용: {code: 추가된 행 수 또는 예외}
+        report = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            futures = {ex.submit(self.update, market, c, source): c for c in codes}
+            for f in as_completed(futures):
+                try: report[futures[f]] = f.result()
+                except Exception as e: report[futures[f]] = e
+        return report
+
+
+# --- 🌐 [데이터 소스] ---
+# source(code, start) -> DatetimeIndex + Open/High/Low/Close/Volume 컬럼의 DataFrame
+class FdrSource:
+    def __call__(self, code, start=None):
+        import FinanceDataReader as fdr
+        return fdr.DataReader(code, start)
+
+
+class FixtureSource:
+    # 오프라인 테스트용: 미리 준비한 DataFrame(또는 CSV 폴더)을 돌려준다. as_of 로 '오늘'을 흉내낼 수 있다.
+    def __init__(self, frames, as_of=None):
+        self.frames = frames; self.as_of = as_of; self.calls = []
+
+    @classmethod
+    def from_dir(cls, path, as_of=None):
+        frames = {}
+        for fn in os.listdir(path):
+            if fn.endswith(".csv"): frames[fn[:-4]] = pd.read_csv(os.path.join(path, fn), index_col=0, parse_dates=True)
+        return cls(frames, as_of)
+
+    def __call__(self, code, start=None):
+        self.calls.append((code, start))
+        df = self.frames[code]
+        if start is not None: df = df[df.index >= pd.Timestamp(start)]
+        if self.as_of is not None: df = df[df.index <= pd.Timestamp(self.as_of)]
+        return df
+
+
+_default_store = None
+
+def get_store():
+    global _default_store
+    if _default_store is None: _default_store = OHLCVStore()
+    return _default_store
+
+
+def load_recent_bars(market, code, n, store=None, source=None, frame=True):
+    # 스캔 경로: 마지막 거래일(시장 시간대/마감 기준)까지 동기화되지 않은 종목만 증분 업데이트 후, 로컬에서 마지막 n개를 읽는다
+    # 기본 소스는 프로세스 공용 Fetcher(동시성 한도/속도 제한/재시도)를 거친다
+    # frame=False 면 DataFrame 대신 read_tail 의 컬럼별 memmap dict (종목마다 DataFrame 을 만들지 않는 스캔 경로용)
+    store = store or get_store()
+    if not store.is_fresh(market, code):
+        if source is None:
+            from fetcher import get_fetcher
+            source = get_fetcher().wrap(FdrSource(), "fdr")
+        store.update(market, code, source, only_stale=True)
+    return store.read_tail_frame(market, code, n) if frame else store.read_tail(market, code, n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AlphaChart 로컬 OHLCV 저장소 증분 업데이트")
+    parser.add_argument("--market", choices=MARKETS, required=True)
+    parser.add_argument("--codes", help="쉼표로 구분된 종목코드 (생략 시 이미 저장된 전 종목)")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    store = get_store()
+    codes = args.codes.split(",") if args.codes else store.codes(args.market)
+    report = store.update_market(args.market, codes, FdrSource(), max_workers=args.workers)
+    failed = {c: r for c, r in report.items() if isinstance(r, Exception)}
+    print(f"✅ {args.market}: {len(report) - len(failed)}개 종목 업데이트, {sum(r for r in report.values() if not isinstance(r, Exception))}행 추가")
+    for c, e in failed.items(): print(f"❌ {c}: {e}")
@@ -0,0 +1,221 @@
+import os
+import sys
+import time
+import heapq
+import shutil
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context, parent_process, resource_tracker, shared_memory
+import numpy as np
+from ohlcv_store import OHLCVStore, COLUMNS, get_store
+from scoring import score_matrix
+from prefilter import last_bar_pass_mask
+from listing import ScanResult, as_listing
+from telemetry import note
+
+# --- 🧵 [멀티 프로세스 공유 메모리 스캔] ---
+# PRO 전종목 스캔에서 필터/상관 계산이 Streamlit 서버 프로세스 하나의 GIL 에 묶이지 않도록,
+# 가격 블록을 multiprocessing.shared_memory 에 두고 워커 프로세스가 행 구간(slice)을
+# 직접 채우고(로컬 저장소 memmap) 필터링/점수 계산한 뒤 구간별 상위 k 만 돌려준다. DataFrame 은 오가지 않는다.
+# 블록에는 (종목 x 봉) 종가만 float32 로 두고, 캔들 판정/현재가에 쓰는 마지막 봉 OHLCV 만 float64 로 따로 둔다
+# ((종목 x 봉 x OHLCV) float64 텐서의 약 1/10 - 유사도는 정규화 후 float64 로 계산하므로 점수 차이는 1e-3%p 미만).
+# 공용 풀 크기는 프로세스 전체에서 하나로 고정 (ALPHACHART_SCAN_PROCESSES, 없으면 코어 수). 스캔별 workers 는 구간 수만 정한다
+CHUNK_ROWS = 256
+TOP_K = 100
+POOL_WORKERS = int(os.environ.get("ALPHACHART_SCAN_PROCESSES", "0")) or (os.cpu_count() or 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # spawn 기반 영구 풀 (스레드가 많은 Streamlit 서버에서 fork 하지 않도록). 크기를 바꾸며 다시 만들지 않는다 -> 다른 세션의 진행 중 작업이 끊기지 않는다
+    global _pool
+    with _pool_lock:
+        if _pool is None: _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=get_context("spawn"))
+        return _pool
+
+
+def _open_shared(name):
+    # 이미 만든 블록에 붙기만 하고 resource_tracker 에는 등록하지 않는다 - 블록 수명(등록/해제)은 생성자(부모)의 unlink 가 맡는다
+    # 3.12 이하는 track 인자가 없어 워커에서 등록 호출만 건너뛴다. 붙은 뒤 unregister 하면 spawn 워커는 부모와 같은 추적기를 쓰므로 부모 등록까지 지워진다
+    if sys.version_info >= (3, 13): return shared_memory.SharedMemory(name=name, track=False)
+    if parent_process() is None: return shared_memory.SharedMemory(name=name)  # 생성자 프로세스 안 (workers<=1): 이미 등록된 이름
+    register = resource_tracker.register; resource_tracker.register = lambda name, rtype: None  # 워커는 작업을 한 번에 하나씩 실행
+    try: return shared_memory.SharedMemory(name=name)
+    finally: resource_tracker.register = register
+
+
+def _attach(name, shape, dtype):
+    shm = _open_shared(name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _bar_views(buf, n_rows, n_bars):
+    # 공유 블록 배치: 마지막 봉 OHLCV (행, 5) float64 + 종가 구간 (행, 봉) float32
+    last = np.ndarray((n_rows, len(COLUMNS)), dtype=np.float64, buffer=buf)
+    return last, np.ndarray((n_rows, n_bars), dtype=np.float32, buffer=buf, offset=last.nbytes)
+
+
+def _top_k(sims, rows, k, min_sim):
+    # k=None 이면 min_sim 이상 전부
+    keep = ~np.isnan(sims) & (sims >= min_sim)
+    sims, rows = sims[keep], rows[keep]
+    if k is not None and len(sims) > k: part = np.argpartition(sims, -k)[-k:]; sims, rows = sims[part], rows[part]
+    return list(zip(sims.tolist(), rows.tolist()))
+
+
+def _score_block(block, row0, patterns, k, min_sim, method="pearson"):
+    # block: (rows, n_bars) 종가. 패턴마다 자기 기간만큼 뒤에서 잘라 점수 계산
+    # DTW 는 구간 안 상위 k / min_sim 을 컷으로 가지치기 (컷 아래 종목은 어차피 _top_k 에서 빠진다)
+    out = {}; rows = np.arange(row0, row0 + len(block))
+    for key, user_p_norm, n_days in patterns:
+        sub = block[:, -n_days:]; valid = ~np.isnan(sub).any(axis=1)
+        sims = np.full(len(block), np.nan)
+        if valid.any(): sims[valid] = score_matrix(sub[valid], user_p_norm, method=method, min_sim=min_sim, k=k)
+        out[key] = _top_k(sims, rows, k, min_sim)
+    return out
+
+
+def _score_slice(name, shape, start, stop, patterns, k, min_sim, method="pearson"):
+    shm, closes = _attach(name, shape, np.float32)
+    try: return _score_block(closes[start:stop], start, patterns, k, min_sim, method)
+    finally: del closes; shm.close()
+
+
+def _fill_and_score_slice(name, shape, start, stop, root, market, codes, patterns, filters, k, min_sim, bars_market=None, method="pearson"):
+    # 워커가 자기 구간의 종목을 로컬 저장소에서 공유 텐서로 직접 채운 뒤 필터 + 점수 계산
+    # bars_market: 봉을 읽을 저장소 시장 (주봉/월봉이면 "KRX.W" 등, 캔들 판정 규칙은 market 기준)
+    # shape: (전체 종목 수, 봉 수) - 공유 블록 배치는 _bar_views. 반환: (패턴별 상위 k, 마지막 봉 캔들 필터 통과 종목 수)
+    shm = _open_shared(name); last, closes = _bar_views(shm.buf, *shape)
+    try:
+        store = OHLCVStore(root); n_bars = shape[1]
+        for i, code in enumerate(codes):
+            tail = store.read_tail(bars_market or market, code, n_bars)
+            if tail is None: continue
+            m = len(tail['Close']); closes[start + i, n_bars - m:] = tail['Close']
+            last[start + i] = [tail[col][-1] for col in COLUMNS]
+        ok = ~np.isnan(last[start:stop]).any(axis=1) & last_bar_pass_mask(*(last[start:stop, j] for j in range(len(COLUMNS))), market, **filters)
+        return _score_block(np.where(ok[:, None], closes[start:stop], np.nan), start, patterns, k, min_sim, method), int(ok.sum())
+    finally: del last, closes; shm.close()
+
+
+def _merge(partials, patterns, k):
+    merged = {}
+    for key, _, _ in patterns:
+        items = (item for p in partials for item in p[key])
+        merged[key] = sorted(items, reverse=True) if k is None else heapq.nlargest(k, items)
+    return merged
+
+
+def _chunks(n, chunk_rows):
+    return [(a, min(n, a + chunk_rows)) for a in range(0, n, chunk_rows)]
+
+
+def parallel_score(closes, patterns, workers=4, k=TOP_K, min_sim=0.0, chunk_rows=CHUNK_ROWS, method="pearson"):
+    # 이미 만들어진 (N, n_days) 종가 행렬을 공유 메모리에 한 번 복사해 워커들이 구간별로 점수 계산
+    # patterns: {key: (user_p_norm, n_days)} -> {key: [(sim, row), ...] 내림차순}
+    closes = np.ascontiguousarray(closes, dtype=np.float32); pats = [(key, np.asarray(u), n) for key, (u, n) in patterns.items()]
+    if workers <= 1: return _merge([_score_block(closes, 0, pats, k, min_sim, method)], pats, k)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, closes.nbytes))
+    try:
+        np.ndarray(closes.shape, dtype=np.float32, buffer=shm.buf)[:] = closes
+        pool = get_pool()
+        futures = [pool.submit(_score_slice, shm.name, closes.shape, a, b, pats, k, min_sim, method) for a, b in _chunks(len(closes), chunk_rows)]
+        return _merge([f.result() for f in futures], pats, k)
+    finally: shm.close(); shm.unlink()
+
+
+def sync_missing(market, codes, store=None, source=None, max_workers=16, report=None, progress=None, trace=None):
+    # 마지막 거래일까지 동기화되지 않은 종목만 (스레드로) 증분 업데이트 - 네트워크 I/O 단계
+    # progress(done, total): 이미 동기화된 종목은 완료로 센다
+    from ohlcv_store import FdrSource
+    from fetcher import get_fetcher
+    store = store or get_store()
+    todo = [c for c in codes if not store.is_fresh(market, c)]
+    if progress: progress(len(codes) - len(todo), len(codes))
+    if not todo: return 0
+    source = source or get_fetcher().wrap(FdrSource(), "fdr", report)
+    def _one(code):
+        t0 = time.perf_counter()
+        try: store.update(market, code, source, only_stale=True)
+        except Exception as e:
+            if report is not None: report.fail(code, e)
+            if trace is not None: trace.exception(e)
+        finally:
+            if trace is not None: trace.latency("fetch", time.perf_counter() - t0)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        for i, _ in enumerate(ex.map(_one, todo)):
+            if progress: progress(len(codes) - len(todo) + i + 1, len(codes))
+    return len(todo)
+
+
+def parallel_scan_store(market, patterns, stocks, require_bullish=False, require_doji=False, require_hammer=False, min_sim=80.0, workers=4, k=TOP_K, store=None, chunk_rows=CHUNK_ROWS, sync=True, report=None, timeframe="D", method="pearson", pool=None, trace=None):
+    # run_scan 과 같은 결과 형식: {key: [ScanResult(code, name, sim, price, filter_status), ...]} (k=None 이면 min_sim 이상 전부)
+    # pool: 기본은 공용 풀 (벤치마크는 워커 수별 풀을 따로 넘긴다)
+    # trace: 마지막 봉 캔들 필터를 실제로 통과한 종목 수를 Pass, 떨어진 종목(데이터 없음 포함) 수를 Fail_LastBar 로 센다
+    from timeframes import tf_market, resample_missing
+    store = store or get_store(); stocks = as_listing(stocks, market); codes = stocks.code_list()
+    if not patterns or not codes: return {key: [] for key in patterns}
+    if sync: sync_missing(market, codes, store, report=report); resample_missing(market, codes, timeframe, store, report=report)
+    pats = [(key, np.asarray(u), n) for key, (u, n) in patterns.items()]
+    shape = (len(codes), max(n for _, _, n in pats))
+    shm = shared_memory.SharedMemory(create=True, size=shape[0] * (len(COLUMNS) * 8 + shape[1] * 4))
+    try:
+        last, closes = _bar_views(shm.buf, *shape); last[:] = np.nan; closes[:] = np.nan
+        filters = {'require_bullish': require_bullish, 'require_doji': require_doji, 'require_hammer': require_hammer}
+        chunk_rows = max(1, min(chunk_rows, -(-shape[0] // max(workers, 1))))  # 종목이 적어도 워커마다 한 구간 이상
+        args = [(shm.name, shape, a, b, store.base, market, codes[a:b], pats, filters, k, min_sim, tf_market(market, timeframe), method) for a, b in _chunks(len(codes), chunk_rows)]
+        if workers <= 1: parts = [_fill_and_score_slice(*a) for a in args]
+        else:
+            pool = pool or get_pool(); parts = [f.result() for f in [pool.submit(_fill_and_score_slice, *a) for a in args]]
+        passed = sum(n for _, n in parts); note(trace, "Pass", passed); note(trace, "Fail_LastBar", len(codes) - passed)
+        merged = _merge([p for p, _ in parts], pats, k); close_idx = COLUMNS.index("Close")
+        out = {key: [ScanResult(codes[row], stocks.name(row), sim, float(last[row, close_idx])) for sim, row in merged[key]] for key in merged}
+        del last, closes
+        return out
+    finally: shm.close(); shm.unlink()
+
+
+def benchmark_scaling(n_stocks=8000, n_days=60, workers_list=(1, 2, 4, 8, 16), n_patterns=15, repeat=3, seed=0, market="KRX"):
+    # 코어 수에 따른 처리량 곡선: [{'workers', 'seconds', 'stocks_per_sec', 'speedup'}, ...]
+    # 앱이 실제로 도는 parallel_scan_store (저장소 memmap -> 공유 블록 채우기 -> 캔들 필터 -> 점수) 를 합성 저장소에서 잰다
+    import pandas as pd
+    rng = np.random.default_rng(seed); root = tempfile.mkdtemp(prefix="alphachart-scaling-")
+    try:
+        store = OHLCVStore(root); dates = pd.bdate_range(end="2026-01-02", periods=n_days, name="Date"); pairs = []
+        for i in range(n_stocks):
+            c = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days))); o = c * (1 + rng.normal(0, 0.01, n_days))
+            code = f"{i:06d}"; pairs.append((code, code))
+            store.append(market, code, pd.DataFrame({'Open': o, 'High': np.maximum(o, c) * 1.01, 'Low': np.minimum(o, c) * 0.99, 'Close': c, 'Volume': np.full(n_days, 1e5)}, index=dates))
+        stocks = as_listing(pairs, market)
+        patterns = {f"P{i}": (rng.random(50), int(rng.integers(10, n_days + 1))) for i in range(n_patterns)}
+        rows = []
+        for w in workers_list:
+            pool = ProcessPoolExecutor(max_workers=w, mp_context=get_context("spawn")) if w > 1 else None
+            try:
+                scan = lambda s: parallel_scan_store(market, patterns, s, min_sim=0.0, workers=w, store=store, sync=False, pool=pool)
+                scan(stocks[:w * CHUNK_ROWS])  # 풀 예열
+                best = float("inf")
+                for _ in range(repeat):
+                    t0 = time.perf_counter(); scan(stocks); best = min(best, time.perf_counter() - t0)
+            finally:
+                if pool is not None: pool.shutdown()
+            rows.append({'workers': w, 'seconds': best, 'stocks_per_sec': n_stocks / best})
+    finally: shutil.rmtree(root, ignore_errors=True)
+    base = rows[0]['seconds']
+    for r in rows: r['speedup'] = base / r['seconds']
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="공유 메모리 멀티 프로세스 스캔 확장성 벤치마크")
+    parser.add_argument("--stocks", type=int, default=8000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--patterns", type=int, default=15)
+    parser.add_argument("--workers", default=",".join(str(w) for w in (1, 2, 4, 8, 16) if w <= (os.cpu_count() or 1)))
+    args = parser.parse_args()
+    for r in benchmark_scaling(args.stocks, args.days, [int(w) for w in args.workers.split(",")], args.patterns):
+        print(f"workers={r['workers']:>2}  {r['seconds']*1000:8.1f} ms  {r['stocks_per_sec']:>10,.0f} stocks/s  x{r['speedup']:.2f}")
@@ -0,0 +1,95 @@
+import os
+import base64
+import hashlib
+import threading
+from collections import namedtuple
+import numpy as np
+from patterns import PATTERN_DB, pattern_path
+from scoring import minmax_rows
+from ohlcv_store import DATA_DIR
+
+# --- 🗂️ [기본 패턴 특징 캐시] ---
+# RAW_PATTERN_DB 이미지들은 배포 사이에 바뀌지 않으므로, 파일 내용 해시를 키로
+# 50점 프로파일 / 정규화 프로파일 / 캔들 수 / 미리 인코딩된 썸네일을 .npz 하나에 저장해 둔다.
+# 프로세스당 한 번만 로드되고 모든 세션이 공유한다.
+# cv2 / image_engine 은 아티팩트에 없는 이미지를 새로 계산할 때만 임포트한다 (앱 기동 시 cv2 로드 없음).
+CACHE_FILE = os.path.join(DATA_DIR, "pattern_features.npz")
+THUMB_MAX_W = 600
+THUMB_QUALITY = 85
+
+PatternFeatures = namedtuple("PatternFeatures", ["profile", "profile_norm", "candle_count", "thumb_b64"])
+
+
+def file_hash(path):
+    with open(path, "rb") as f: return hashlib.sha256(f.read()).hexdigest()
+
+
+def make_thumb_b64(img):
+    import cv2
+    h, w = img.shape[:2]
+    if w > THUMB_MAX_W: img = cv2.resize(img, (THUMB_MAX_W, max(1, round(h * THUMB_MAX_W / w))), interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, THUMB_QUALITY])
+    return base64.b64encode(buf.tobytes()).decode() if ok else ""
+
+
+def compute_features(path):
+    from image_engine import extract_features_engine
+    feat = extract_features_engine(path, is_file_path=True)
+    if feat is None: return None
+    profile, img, candle_count = feat
+    return PatternFeatures(profile, minmax_rows(profile[None, :])[0], int(candle_count), make_thumb_b64(img))
+
+
+def save_cache(entries, path=CACHE_FILE):
+    # entries: {content_hash: PatternFeatures}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    hashes = sorted(entries)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, hashes=np.array(hashes, dtype=str),
+             profiles=np.array([entries[h].profile for h in hashes], dtype=np.float64).reshape(len(hashes), -1),
+             profiles_norm=np.array([entries[h].profile_norm for h in hashes], dtype=np.float64).reshape(len(hashes), -1),
+             candles=np.array([entries[h].candle_count for h in hashes], dtype=np.int32),
+             thumbs=np.array([entries[h].thumb_b64.encode() for h in hashes], dtype=bytes))
+    os.replace(tmp, path)
+
+
+def load_cache_file(path=CACHE_FILE):
+    if not os.path.exists(path): return {}
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            return {str(h): PatternFeatures(z["profiles"][i], z["profiles_norm"][i], int(z["candles"][i]), z["thumbs"][i].decode()) for i, h in enumerate(z["hashes"])}
+    except Exception: return {}
+
+
+def build_cache(paths, path=CACHE_FILE):
+    # 빌드 단계 / 최초 기동 시: 아티팩트에 없는 해시만 새로 계산하고 아티팩트를 갱신한다
+    entries = load_cache_file(path); by_path = {}; changed = False
+    for p in paths:
+        if not os.path.exists(p): continue
+        h = file_hash(p)
+        if h not in entries:
+            feat = compute_features(p)
+            if feat is None: continue
+            entries[h] = feat; changed = True
+        by_path[p] = entries[h]
+    if changed: save_cache(entries, path)
+    return by_path
+
+
+_lock = threading.Lock()
+_features = None
+
+def get_pattern_features(key):
+    # 패턴 키(A~O) -> PatternFeatures (이미지 처리 없음, 프로세스 전역 공유)
+    global _features
+    if _features is None:
+        with _lock:
+            if _features is None:
+                by_path = build_cache([pattern_path(k) for k in PATTERN_DB])
+                _features = {k: by_path.get(pattern_path(k)) for k in PATTERN_DB}
+    return _features.get(key)
+
+
+if __name__ == "__main__":
+    built = build_cache([pattern_path(k) for k in PATTERN_DB])
+    print(f"✅ {len(built)}/{len(PATTERN_DB)}개 패턴 특징 캐시 -> {CACHE_FILE}")
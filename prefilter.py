@@ -0,0 +1,268 @@
+import re
+import time
+import argparse
+import numpy as np
+from ohlcv_store import COLUMNS, MARKETS, get_store
+
+# --- 🧹 [캔들 모양 사전 필터] ---
+# 양봉/도지/망치 조건을 종목별 iloc[-1] 분기 대신, 시장 전체의 '최근 봉 테이블'(종목 x 봉) 에 배열 단위로 적용한다.
+# 유사도 계산용 구간을 읽기 전에 실행되므로, 조건에 떨어지는 종목은 이후 단계 비용이 들지 않는다.
+# 조건식 예: "hammer AND volume > 20d avg", "(bullish OR doji) AND close > 1.5 * 60d avg", "NOT doji"
+#   - 캔들 조건: bullish, doji, hammer (기존 require_* 와 같은 정의)
+#   - 필드: open, high, low, close, volume, body, range, upper_shadow, lower_shadow, body_ratio, upper_ratio, lower_ratio
+#   - "Nd avg" : 왼쪽 필드의 직전 N개 봉 평균 (당일 제외)
+FIELDS = ("open", "high", "low", "close", "volume", "body", "range", "upper_shadow", "lower_shadow", "body_ratio", "upper_ratio", "lower_ratio")
+_TOKEN = re.compile(r"\s*(\(|\)|>=|<=|==|!=|>|<|\*|\d+d\s+avg\b|\d+(?:\.\d*)?|[A-Za-z_][A-Za-z_0-9]*)", re.I)
+
+
+def _bars(o, h, l, c, v):
+    return {'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+
+
+def field(b, name):
+    o, h, l, c = b['open'], b['high'], b['low'], b['close']
+    if name in b: return b[name]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if name == "body": return np.abs(c - o)
+        if name == "range": return h - l
+        if name == "upper_shadow": return h - np.maximum(o, c)
+        if name == "lower_shadow": return np.minimum(o, c) - l
+        if name == "body_ratio": return field(b, "body") / field(b, "range")
+        if name == "upper_ratio": return field(b, "upper_shadow") / field(b, "range")
+        if name == "lower_ratio": return field(b, "lower_shadow") / field(b, "range")
+    raise KeyError(name)
+
+
+# --- 🕯️ 캔들 조건 (screen_stock_legacy 의 분기와 동일, True = 통과) ---
+def is_doji(b):
+    rng = field(b, "range")
+    with np.errstate(divide="ignore", invalid="ignore"): return (rng > 0) & (field(b, "body") / rng <= 0.1)
+
+
+def is_bullish(b):
+    return (b['close'] > b['open']) & ~is_doji(b)
+
+
+def is_hammer(b):
+    body, rng = field(b, "body"), field(b, "range"); upper, lower = field(b, "upper_shadow"), field(b, "lower_shadow")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tail = np.where(body > 0, lower >= body * 3.0, (rng > 0) & (lower >= rng * 0.7))
+        tail &= ~((rng > 0) & (body / rng > 0.3)) & ~((rng > 0) & (lower / rng < 0.6))
+    return ((b['close'] >= b['open']) | is_doji(b)) & ~(lower < upper * 3.0) & tail
+
+
+PREDICATES = {'bullish': is_bullish, 'doji': is_doji, 'hammer': is_hammer}
+
+
+def tradable(b, market_type="KRX"):
+    # 거래정지(거래량 0) 와 해외 시장 1 미만 동전주 제외
+    ok = (b['volume'] != 0)
+    if market_type != "KRX": ok &= ~(b['close'] < 1.0)
+    return ok
+
+
+def last_bar_pass_mask(o, h, l, c, v, market_type="KRX", require_bullish=False, require_doji=False, require_hammer=False):
+    # screen_stock_legacy 의 마지막 캔들 조건을 배열 단위로 계산 (True = 통과)
+    b = _bars(o, h, l, c, v); ok = tradable(b, market_type)
+    for name, on in (("bullish", require_bullish), ("doji", require_doji), ("hammer", require_hammer)):
+        if on: ok &= PREDICATES[name](b)
+    return ok
+
+
+# --- 🔤 조건식 파서 ---
+# 노드: ('and', [..]) ('or', [..]) ('not', n) ('pred', name) ('cmp', field, op, rhs)
+# rhs : ('num', x) ('field', name) ('avg', field, n) ('mul', k, rhs)
+def tokenize(text):
+    pos, out = 0, []
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m: raise ValueError(f"조건식 해석 실패: '{text[pos:]}'")
+        out.append(m.group(1)); pos = m.end()
+    return out
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens; self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def take(self, expected=None):
+        tok = self.peek()
+        if tok is None or (expected and tok.upper() != expected): raise ValueError(f"조건식 오류: '{expected or '값'}' 이(가) 필요합니다 (위치 {self.i})")
+        self.i += 1; return tok
+
+    def parse(self):
+        node = self.expr()
+        if self.peek() is not None: raise ValueError(f"조건식 오류: 예상치 못한 '{self.peek()}'")
+        return node
+
+    def expr(self):
+        items = [self.term()]
+        while (self.peek() or "").upper() == "OR": self.take(); items.append(self.term())
+        return items[0] if len(items) == 1 else ('or', items)
+
+    def term(self):
+        items = [self.factor()]
+        while (self.peek() or "").upper() == "AND": self.take(); items.append(self.factor())
+        return items[0] if len(items) == 1 else ('and', items)
+
+    def factor(self):
+        tok = self.take()
+        if tok.upper() == "NOT": return ('not', self.factor())
+        if tok == "(":
+            node = self.expr(); self.take(")"); return node
+        name = tok.lower()
+        if name in PREDICATES: return ('pred', name)
+        if name not in FIELDS: raise ValueError(f"알 수 없는 조건/필드: '{tok}'")
+        op = self.take()
+        if op not in (">", "<", ">=", "<=", "==", "!="): raise ValueError(f"비교 연산자가 필요합니다: '{op}'")
+        return ('cmp', name, op, self.operand(name))
+
+    def operand(self, lhs):
+        tok = self.take()
+        m = re.match(r"(\d+)d\s+avg$", tok, re.I)
+        if m: return ('avg', lhs, int(m.group(1)))
+        if re.match(r"\d", tok):
+            if self.peek() == "*": self.take(); return ('mul', float(tok), self.operand(lhs))
+            return ('num', float(tok))
+        if tok.lower() in FIELDS: return ('field', tok.lower())
+        raise ValueError(f"비교 대상이 올바르지 않습니다: '{tok}'")
+
+
+def parse(text):
+    return _Parser(tokenize(text)).parse()
+
+
+def to_text(node):
+    kind = node[0]
+    if kind == 'pred': return node[1]
+    if kind == 'not': return "NOT " + to_text(node[1])
+    if kind in ('and', 'or'): return "(" + f" {kind.upper()} ".join(to_text(n) for n in node[1]) + ")"
+    if kind == 'cmp': return f"{node[1]} {node[2]} {to_text(node[3])}"
+    if kind == 'num': return f"{node[1]:g}"
+    if kind == 'field': return node[1]
+    if kind == 'avg': return f"{node[2]}d avg"
+    if kind == 'mul': return f"{node[1]:g} * {to_text(node[2])}"
+
+
+def lookback(node):
+    # 조건식 평가에 필요한 최근 봉 수 (당일 포함)
+    kind = node[0]
+    if kind in ('and', 'or'): return max(lookback(n) for n in node[1])
+    if kind == 'not': return lookback(node[1])
+    if kind == 'cmp': return lookback(node[3])
+    if kind == 'avg': return node[2] + 1
+    if kind == 'mul': return lookback(node[2])
+    return 1
+
+
+def conjuncts(node):
+    # 최상위 AND 항목들 -> 항목별 탈락 수 집계 단위
+    return [c for n in node[1] for c in conjuncts(n)] if node[0] == 'and' else [node]
+
+
+def build_expr(require_bullish=False, require_doji=False, require_hammer=False, extra=None):
+    terms = [name for name, on in (("bullish", require_bullish), ("doji", require_doji), ("hammer", require_hammer)) if on]
+    if extra and extra.strip(): terms.append(f"({extra})")
+    return " AND ".join(terms) or None
+
+
+# --- 📋 최근 봉 테이블 ---
+class LastBars:
+    # (종목 x 최근 L개 봉) 배열. 짧은 종목은 앞쪽이 NaN, lengths 는 저장된 전체 봉 수
+    def __init__(self, codes, bars, lengths):
+        self.codes = list(codes); self.bars = bars; self.lengths = lengths
+        self.last = _bars(*(bars[:, -1, j] for j in range(len(COLUMNS))))
+
+    def __len__(self): return len(self.codes)
+
+    def avg(self, name, n):
+        hist = _bars(*(self.bars[:, -n - 1:-1, j] for j in range(len(COLUMNS))))
+        vals = field(hist, name)
+        with np.errstate(invalid="ignore"): full = ~np.isnan(vals).any(axis=1)
+        out = np.full(len(self), np.nan)
+        if full.any(): out[full] = vals[full].mean(axis=1)
+        return out
+
+    def evaluate(self, node):
+        kind = node[0]
+        if kind == 'pred': return PREDICATES[node[1]](self.last)
+        if kind == 'not': return ~self.evaluate(node[1])
+        if kind == 'and': return np.logical_and.reduce([self.evaluate(n) for n in node[1]])
+        if kind == 'or': return np.logical_or.reduce([self.evaluate(n) for n in node[1]])
+        if kind == 'cmp':
+            lhs, rhs = field(self.last, node[1]), self.value(node[3])
+            with np.errstate(invalid="ignore"):
+                return {'>': np.greater, '<': np.less, '>=': np.greater_equal, '<=': np.less_equal, '==': np.equal, '!=': np.not_equal}[node[2]](lhs, rhs)
+        raise ValueError(node)
+
+    def value(self, node):
+        if node[0] == 'num': return node[1]
+        if node[0] == 'field': return field(self.last, node[1])
+        if node[0] == 'avg': return self.avg(node[1], node[2])
+        if node[0] == 'mul': return node[1] * self.value(node[2])
+        raise ValueError(node)
+
+
+def load_last_bars(market, codes, n=1, store=None):
+    store = store or get_store(); n = max(1, n)
+    bars = np.full((len(codes), n, len(COLUMNS)), np.nan); lengths = np.zeros(len(codes), dtype=np.int64)
+    for i, code in enumerate(codes):
+        tail = store.read_tail(market, code, n)
+        if tail is None: continue
+        m = len(tail['Close']); lengths[i] = store.length(market, code)
+        for j, col in enumerate(COLUMNS): bars[i, n - m:, j] = tail[col]
+    return LastBars(codes, bars, lengths)
+
+
+class FilterReport:
+    # 사전 필터 1회분: 단계(조건)별 탈락 종목 수 (앞 단계를 통과한 종목 기준, 순서대로)
+    def __init__(self):
+        self.total = 0; self.survivors = 0; self.drops = {}; self.seconds = 0.0
+
+    def add(self, total, survivors, drops, seconds):
+        # 나눠서(chunk) 필터링한 경우 누적
+        self.total += total; self.survivors += survivors; self.seconds += seconds
+        for name, n in drops.items(): self.drops[name] = self.drops.get(name, 0) + n
+
+    def summary(self):
+        return {'total': self.total, 'survivors': self.survivors, 'drops': dict(self.drops), 'seconds': round(self.seconds, 4)}
+
+
+def apply_filters(table, market_type="KRX", expr=None, min_bars=1, force_codes=(), report=None):
+    # 반환: 통과 마스크. force_codes 는 모든 조건을 건너뛴다 (기존 force_include 와 동일)
+    t0 = time.perf_counter(); node = parse(expr) if isinstance(expr, str) else expr
+    forced = np.array([c in force_codes for c in table.codes], dtype=bool); alive = np.ones(len(table), dtype=bool)
+    with np.errstate(invalid="ignore"): has_data = (table.lengths > 0) & ~np.isnan(table.bars[:, -1, :]).any(axis=1)
+    steps = [("no_data", has_data), ("short_history", table.lengths >= min_bars), ("tradable", tradable(table.last, market_type))]
+    steps += [(to_text(n)[1:-1] if n[0] in ('and', 'or') else to_text(n), table.evaluate(n)) for n in (conjuncts(node) if node else [])]
+    drops = {}
+    for name, mask in steps:
+        cut = alive & ~mask & ~forced; drops[name] = drops.get(name, 0) + int(cut.sum()); alive &= ~cut
+    if report is not None: report.add(len(table), int(alive.sum()), drops, time.perf_counter() - t0)
+    return alive
+
+
+def prefilter(market, codes, expr=None, min_bars=1, force_codes=(), store=None, report=None, timeframe="D"):
+    # 로컬 저장소의 최근 봉만 읽어 시장 전체에 조건을 한 번에 적용 -> 통과 마스크
+    # timeframe 이 W/M 이면 집계된 주봉/월봉의 마지막 봉 기준 (시장 규칙은 원래 시장 그대로)
+    from timeframes import tf_market
+    node = parse(expr) if isinstance(expr, str) else expr
+    table = load_last_bars(tf_market(market, timeframe), codes, lookback(node) if node else 1, store)
+    return apply_filters(table, market, node, min_bars, force_codes, report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 저장소 기반 캔들 사전 필터 (단계별 탈락 수 출력)")
+    parser.add_argument("--market", choices=MARKETS, required=True)
+    parser.add_argument("--expr", default="hammer", help='예: "hammer AND volume > 20d avg"')
+    parser.add_argument("--min-bars", type=int, default=1)
+    args = parser.parse_args()
+    codes = get_store().codes(args.market); report = FilterReport()
+    mask = prefilter(args.market, codes, args.expr, args.min_bars, report=report)
+    print(f"{report.total} -> {report.survivors} ({report.seconds*1000:.1f} ms)")
+    for name, n in report.drops.items(): print(f"    -{n:>6}  {name}")
+    print(", ".join(c for c, k in zip(codes, mask) if k)[:2000])
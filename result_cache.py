@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import argparse
+import threading
+from ohlcv_store import DATA_DIR, MARKETS, get_store, load_recent_bars
+from listing import jsonable
+
+# --- 💾 [스캔 결과 캐시] ---
+# 기본 패턴(A~O)은 같은 날 같은 시장에서 반복 클릭되므로, 정렬된 전체 결과 리스트를
+# (시장, 패턴, 기간, 양봉/도지/망치 필터, 스캔 범위, 마지막 거래일[, 주봉/월봉][, DTW]) 키로 SQLite 파일에 저장한다.
+# 모든 세션/프로세스가 공유하고 재시작 후에도 남으며, 새 거래일이 오면 키가 바뀌어 자동으로 무효화된다.
+# 무료/PRO 표시 개수 자르기는 캐시에서 꺼낸 뒤에 적용한다.
+# 값은 (결과 목록, min_sim 이상 전체 개수): 스트리밍 스캔은 상위 k 개만 들고 있으므로 목록 길이와 전체 개수가 다를 수 있다.
+CACHE_PATH = os.path.join(DATA_DIR, "scan_results.sqlite")
+MAX_BYTES = 64 * 1024 * 1024
+REF_TICKERS = 3
+
+
+def make_key(market, pattern, period, bullish, doji, hammer, scope, trading_day, timeframe="D", method="pearson"):
+    # 일봉/피어슨 키는 타임프레임/유사도 모드 추가 전과 같게 유지 (주봉/월봉, DTW 만 접미사)
+    key = f"{market}|{pattern}|{int(period)}|{int(bool(bullish))}{int(bool(doji))}{int(bool(hammer))}|{int(scope)}|{trading_day}"
+    if timeframe != "D": key += f"|{timeframe}"
+    return key if method == "pearson" else f"{key}|{method}"
+
+
+def current_trading_day(market, stocks, store=None, n_ref=REF_TICKERS):
+    # 시가총액 상위 몇 종목(당일 동기화 포함)의 마지막 봉 날짜 중 최댓값 = 해당 시장의 마지막 거래일
+    store = store or get_store(); days = []
+    for code, _ in stocks[:n_ref]:
+        try:
+            bars = load_recent_bars(market, code, 1, store=store, frame=False)
+            if bars is not None: days.append(str(bars['Date'][-1]))
+        except Exception: continue
+    return max(days) if days else None
+
+
+class ResultCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        self.path = path; self.max_bytes = max_bytes; self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, market TEXT, trading_day TEXT, payload BLOB, size INTEGER, created REAL, last_access REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_access ON results(last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        # 반환: (결과 목록, 전체 개수) 또는 None
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None: return None
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        data = json.loads(zlib.decompress(row[0]))
+        if isinstance(data, list): return data, len(data)  # 개수 저장 전 형식 (전체 목록)
+        return data['results'], data['count']
+
+    def put(self, key, market, trading_day, results, count=None):
+        # count: min_sim 이상 전체 개수 (생략하면 results 가 전체 목록)
+        data = {'results': results, 'count': len(results) if count is None else int(count)}
+        payload = zlib.compress(json.dumps(data, ensure_ascii=False, default=jsonable).encode()); now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", (key, market, trading_day, payload, len(payload), now, now))
+            # 같은 시장의 지난 거래일 결과는 더 이상 맞을 일이 없으므로 정리
+            conn.execute("DELETE FROM results WHERE market = ? AND trading_day < ?", (market, trading_day))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        # 전체 크기가 한도를 넘으면 가장 오래 안 쓰인 항목부터 삭제 (LRU)
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes: return
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_access ASC").fetchall():
+            conn.execute("DELETE FROM results WHERE key = ?", (key,)); total -= size
+            if total <= self.max_bytes: break
+
+    def stats(self):
+        with self._connect() as conn:
+            n, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {'entries': n, 'bytes': size, 'max_bytes': self.max_bytes}
+
+
+def warm(market, stocks, scopes, filters=((False, False, False),), pattern_keys=None, cache=None, **scan_kwargs):
+    # 야간 예열: 스캔 범위(scope)와 필터 조합마다 전 패턴을 한 번의 패스로 계산해 저장
+    from scan_engine import pattern_inputs, run_scan
+    from patterns import PATTERN_DB
+    cache = cache or get_result_cache(); trading_day = current_trading_day(market, stocks)
+    if trading_day is None: return 0
+    patterns = pattern_inputs(pattern_keys or list(PATTERN_DB)); stored = 0
+    for scope in scopes:
+        for bullish, doji, hammer in filters:
+            res = run_scan(market, patterns, stocks[:scope], bullish, doji, hammer, **scan_kwargs)
+            for key, results in res.items():
+                cache.put(make_key(market, key, patterns[key][1], bullish, doji, hammer, min(scope, len(stocks)), trading_day, scan_kwargs.get('timeframe', "D"), scan_kwargs.get('method', "pearson")), market, trading_day, results); stored += 1
+    return stored
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_result_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None: _default_cache = ResultCache()
+        return _default_cache
+
+
+if __name__ == "__main__":
+    from scan_engine import get_stock_list
+    parser = argparse.ArgumentParser(description="기본 패턴 스캔 결과 캐시 예열 (야간 배치)")
+    parser.add_argument("--market", choices=MARKETS, required=True)
+    parser.add_argument("--scopes", default="300,1000", help="쉼표로 구분된 스캔 범위 (시가총액 상위 N개)")
+    parser.add_argument("--all-filters", action="store_true", help="양봉/도지/망치 단일 필터 조합도 함께 예열")
+    args = parser.parse_args()
+    stocks = get_stock_list(args.market)
+    filters = ((False, False, False), (True, False, False), (False, True, False), (False, False, True)) if args.all_filters else ((False, False, False),)
+    n = warm(args.market, stocks, [int(s) for s in args.scopes.split(",")], filters)
+    print(f"✅ {args.market}: {n}개 결과 저장 {get_result_cache().stats()}")
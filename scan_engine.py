@@ -0,0 +1,261 @@
+import json
+import time
+import heapq
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from ohlcv_store import FdrSource, MARKETS
+from fetcher import get_fetcher, FetchReport
+from scoring import METHODS, resample_rows, score_profiles
+from dtw import PruneStats
+from listing import Listing, Candidate, ScanResult, as_listing, jsonable
+from patterns import PATTERN_DB
+from prefilter import build_expr, parse, prefilter, FilterReport
+from telemetry import ScanTrace, get_metrics, note, timed
+from timeframes import TIMEFRAMES, load_resampled_bars, resample_missing
+
+# --- 🛰️ [헤드리스 스캔 엔진] ---
+# Streamlit 없이 import / 배치 실행이 가능한 스캔 로직. PythonFile.py 와 야간 배치(CLI)가 함께 쓴다.
+MIN_SIM = 80.0
+TOP_K = 100
+STREAM_CHUNK = 100
+
+
+def get_stock_list(market):
+    # 시가총액 순 상장 종목표 (Listing - 코드/이름 배열 + 코드 -> 행 인덱스, 순회하면 (코드, 이름))
+    import FinanceDataReader as fdr
+    t0 = time.perf_counter()
+    try:
+        df = fdr.StockListing(market)
+        if market == 'KRX' and 'Marcap' in df.columns:
+            df['Marcap'] = pd.to_numeric(df['Marcap'], errors='coerce'); df = df.sort_values(by='Marcap', ascending=False)
+        elif 'Market Cap' in df.columns:
+            df['Market Cap'] = pd.to_numeric(df['Market Cap'], errors='coerce'); df = df.sort_values(by='Market Cap', ascending=False)
+        code_col = 'Code' if 'Code' in df.columns else 'Symbol'
+        if market == "TSE": df[code_col] = df[code_col].astype(str) + ".T"
+        elif market == "HKEX": df[code_col] = df[code_col].apply(lambda x: "{:04d}.HK".format(int(x)) if str(x).isdigit() else str(x) + ".HK")
+        return Listing.from_frame(market, df, code_col)
+    except Exception as e:
+        get_metrics().inc('alphachart_scan_exceptions_total', type=type(e).__name__); return Listing.from_pairs(market, [])
+    finally: get_metrics().inc('alphachart_stage_seconds_total', time.perf_counter() - t0, stage="listing")
+
+
+def screen_stock_legacy(code, name, n_days=20, market_type="KRX", require_bullish=False, require_doji=False, require_hammer=False, force_include=False, min_days=None, source=None, report=None, trace=None, timeframe="D"):
+    # 데이터 로드 + 캔들 필터까지만 수행하고, 유사도 계산용 종가 구간(flow, 최대 n_days)을 돌려준다
+    # min_days: 여러 패턴을 한 번에 볼 때 가장 짧은 패턴 기간 (이보다 짧은 종목만 제외)
+    # report: FetchReport 를 주면 수집 실패/예외 종목을 사유와 함께 기록한다
+    # trace: ScanTrace 를 주면 종목별 지연 시간과 탈락 사유(filter_status) 를 센다
+    # timeframe: "D"(일봉) / "W"(주봉) / "M"(월봉) - n_days 와 캔들 판정 모두 해당 봉 기준
+    # 저장소 memmap 을 DataFrame 없이 바로 읽고, 통과하면 Candidate (종가 구간은 float32 복사본) 를 돌려준다
+    t0 = time.perf_counter()
+    try:
+        bars = load_resampled_bars(market_type, code, n_days + 10, timeframe, source=source, frame=False)
+        if bars is None or len(bars['Close']) < (min_days or n_days): note(trace, "Skip_NoData" if bars is None else "Skip_ShortHistory"); return None
+        if not force_include and bars['Volume'][-1] == 0: note(trace, "Skip_ZeroVolume"); return None 
+        last_open, last_high, last_low, last_close = (float(bars[col][-1]) for col in ("Open", "High", "Low", "Close"))
+        if not force_include and market_type != "KRX" and last_close < 1.0: note(trace, "Skip_Penny"); return None
+        candle_range = last_high - last_low; body_size = abs(last_close - last_open); is_doji = (candle_range > 0 and (body_size / candle_range) <= 0.1)
+        filter_status = "Pass"
+        if require_bullish:
+            if last_close <= last_open: filter_status = "Fail_Bearish (음봉)"
+            if is_doji: filter_status = "Fail_Doji (도지)"
+        if require_doji and not is_doji: filter_status = "Fail_NotDoji (도지아님)"
+        if require_hammer:
+            is_bullish = last_close >= last_open; upper_shadow = last_high - max(last_open, last_close); lower_shadow = min(last_open, last_close) - last_low; total_range = last_high - last_low
+            if not (is_bullish or is_doji): filter_status = "Fail_Hammer_Shape"
+            elif lower_shadow < upper_shadow * 3.0: filter_status = "Fail_Upper_Shadow_Too_Long"
+            else:
+                tail_condition = False
+                if body_size > 0:
+                    if lower_shadow >= body_size * 3.0: tail_condition = True
+                elif total_range > 0:
+                    if lower_shadow >= total_range * 0.7: tail_condition = True
+                if total_range > 0 and (body_size / total_range) > 0.3: tail_condition = False
+                if total_range > 0 and (lower_shadow / total_range) < 0.6: tail_condition = False
+                if not tail_condition: filter_status = "Fail_Hammer_Tail_Length"
+        note(trace, filter_status)
+        if not force_include and filter_status != "Pass": return None
+        return Candidate(code, name, last_close, filter_status, np.asarray(bars['Close'][-n_days:], dtype=np.float32))
+    except Exception as e:
+        if report is not None: report.fail(code, e)
+        if trace is not None: trace.exception(e)
+        return None
+    finally:
+        if trace is not None: trace.latency("screen", time.perf_counter() - t0)
+
+def score_candidates(candidates, user_p_norm, n_days=None, trace=None, method="pearson", min_sim=0.0):
+    # 필터를 통과한 종목들의 종가 구간을 행렬로 쌓아 한 번에 유사도 계산 (NaN 은 기존처럼 제외)
+    # method="dtw": min_sim 미만이 확실한 종목은 하한으로 가지치기 (점수는 min_sim 미만의 상한) - 단계별 종목 수는 trace 에 DTW_* 로
+    if n_days: candidates = [c for c in candidates if len(c.flow) >= n_days]
+    if not candidates: return []
+    with timed(trace, "normalize"): profiles = resample_rows(np.vstack([c.flow[-n_days:] if n_days else c.flow for c in candidates]), len(user_p_norm))
+    stats = PruneStats() if method == "dtw" else None
+    with timed(trace, "correlate"): sims = score_profiles(profiles, user_p_norm, method=method, min_sim=min_sim, stats=stats)
+    if stats is not None:
+        for name in ("lb_kim", "lb_keogh", "abandoned", "full"): note(trace, f"DTW_{name}", getattr(stats, name))
+    note(trace, "NaN_Correlation", int(np.isnan(sims).sum())); results = []
+    for c, sim in zip(candidates, sims):
+        if np.isnan(sim): continue
+        results.append(ScanResult(c.code, c.name, float(sim), c.price, c.filter_status))
+    return results
+
+def analyze_stock_legacy(code, name, user_p_norm, n_days=20, market_type="KRX", require_bullish=False, require_doji=False, require_hammer=False, pattern_type="Custom", force_include=False):
+    res = score_candidates([c for c in [screen_stock_legacy(code, name, n_days, market_type, require_bullish, require_doji, require_hammer, force_include)] if c], user_p_norm)
+    return res[0] if res else None
+
+
+def pattern_inputs(keys, period="auto"):
+    # 패턴 키 목록 -> {key: (정규화 프로파일, 분석 기간)}. period='auto' 면 패턴별 고정 기간 또는 인식된 캔들 수
+    from pattern_cache import get_pattern_features
+    out = {}
+    for key in keys:
+        feat = get_pattern_features(key)
+        if feat is None: continue
+        n_days = PATTERN_DB[key].get('fixed_period', feat.candle_count) if period == "auto" else int(period)
+        out[key] = (feat.profile_norm, n_days)
+    return out
+
+
+def run_scan(market, patterns, stocks, require_bullish=False, require_doji=False, require_hammer=False, force_codes=(), min_sim=MIN_SIM, max_workers=30, progress=None, report=None, processes=0, expr=None, filter_report=None, trace=None, timeframe="D", method="pearson"):
+    # patterns: {key: (user_p_norm, n_days)} - 종목 데이터는 한 번만 읽고 필터를 거친 뒤, 패턴마다 일괄 점수 계산
+    # 실제 외부 요청 수는 max_workers 가 아니라 프로세스 공용 Fetcher 의 동시성 한도로 제한된다
+    # processes > 0 이면 공유 메모리 프로세스 풀 모드 (결과는 스레드 모드와 같게 min_sim 이상 전부, force_codes 종목은 현재 스레드에서 따로 판정)
+    # expr: 추가 캔들 조건식 (예: "volume > 20d avg"), filter_report: 사전 필터 단계별 탈락 수를 받을 FilterReport
+    # trace: ScanTrace (단계별 시간 / 탈락 사유 / 예외 / 종목별 지연). 프로파일 모드면 종목 판정을 현재 스레드에서 순차 실행
+    # timeframe: "W"/"M" 이면 일봉 동기화 후 주봉/월봉의 마지막(진행 중) 봉만 다시 집계하고, 패턴 기간(n_days)은 봉 개수로 본다
+    # method: "pearson"(0.7/0.3) / "dtw"(Sakoe-Chiba 밴드 DTW, min_sim 컷으로 LB_Kim -> LB_Keogh -> 조기 중단 가지치기)
+    # stocks: Listing (또는 [[코드, 이름], ...]) - 단계마다 통과한 행만 Listing 뷰로 남긴다
+    if not patterns: return {}
+    from parallel_scan import sync_missing, parallel_scan_store
+    max_n = max(n for _, n in patterns.values()); min_n = min(n for _, n in patterns.values())
+    # 1) 증분 동기화 2) 최근 봉 테이블에 캔들 조건 일괄 적용 3) 통과 종목만 유사도 계산
+    cond = build_expr(require_bullish, require_doji, require_hammer, expr); node = parse(cond) if cond else None
+    report = report if report is not None else FetchReport(); stocks = as_listing(stocks, market)
+    def drop_failed(stocks): return stocks[np.array([c not in report.failed for c in stocks.code_list()], dtype=bool)]
+    with timed(trace, "fetch"):
+        n_failed = len(report.failed)
+        sync_missing(market, stocks.code_list(), max_workers=max_workers, report=report, progress=progress, trace=trace)
+        note(trace, "Fetch_Failed", len(report.failed) - n_failed)
+        stocks = drop_failed(stocks)
+    if timeframe != "D":
+        with timed(trace, "resample"):
+            resample_missing(market, stocks.code_list(), timeframe, report=report, trace=trace)
+            stocks = drop_failed(stocks)
+    with timed(trace, "filter"):
+        f_report = FilterReport()
+        keep = prefilter(market, stocks.code_list(), node, min_n, force_codes, report=f_report, timeframe=timeframe)
+        if filter_report is not None: filter_report.add(f_report.total, f_report.survivors, f_report.drops, f_report.seconds)
+        for name, n in f_report.drops.items(): note(trace, f"Prefilter_{name}", n)
+        stocks = stocks[np.asarray(keep, dtype=bool)]
+    if processes:
+        # 강제 포함 종목(디버그)은 캔들 필터와 무관하게 스레드 모드와 같은 경로로 판정/점수 계산해 덧붙인다
+        forced = np.array([c in force_codes for c in stocks.code_list()], dtype=bool)
+        with timed(trace, "correlate"):
+            out = parallel_scan_store(market, patterns, stocks[~forced], require_bullish, require_doji, require_hammer, min_sim=min_sim, workers=processes, k=None, sync=False, report=report, timeframe=timeframe, method=method, trace=trace)
+        if forced.any():
+            candidates = [c for c in (screen_stock_legacy(code, name, max_n, market, require_bullish, require_doji, require_hammer, True, min_n, None, report, trace, timeframe) for code, name in stocks[forced]) if c]
+            for key, (user_p_norm, n_days) in patterns.items():
+                out[key] = sorted(out[key] + [r for r in score_candidates(candidates, user_p_norm, n_days, trace, method, min_sim) if r['sim'] >= min_sim], key=lambda x: x['sim'], reverse=True)
+        return out
+    source = get_fetcher().wrap(FdrSource(), "fdr", report)
+    args = [(code, name, max_n, market, require_bullish, require_doji, require_hammer, (code in force_codes), min_n, source, report, trace, timeframe) for code, name in stocks]
+    with timed(trace, "screen"):  # 스레드 모드 종목별 로컬 읽기 + 캔들 판정 (사전 필터 "filter" 와 따로 잰다)
+        if trace is not None and trace.profile is not None: candidates = [res for res in (screen_stock_legacy(*a) for a in args) if res]
+        else:
+            candidates = []
+            with ThreadPoolExecutor(max_workers=max_workers) as ex:
+                for f in as_completed([ex.submit(screen_stock_legacy, *a) for a in args]):
+                    res = f.result()
+                    if res: candidates.append(res)
+    out = {}
+    for key, (user_p_norm, n_days) in patterns.items():
+        scored = score_candidates(candidates, user_p_norm, n_days, trace, method, min_sim)
+        results = [r for r in scored if r['sim'] >= min_sim]; note(trace, "Below_MinSim", len(scored) - len(results))
+        results.sort(key=lambda x: x['sim'], reverse=True); out[key] = results
+    return out
+
+
+class TopK:
+    # 점수 상위 k개만 유지하는 최소 힙. min_sim 미만은 들어오는 즉시 버리고, count 는 min_sim 이상 전체 개수
+    def __init__(self, k=TOP_K, min_sim=MIN_SIM):
+        self.k = k; self.min_sim = min_sim; self.count = 0; self._heap = []; self._seq = 0
+
+    def __len__(self): return len(self._heap)
+
+    def push(self, r):
+        if r['sim'] < self.min_sim: return False
+        self.count += 1; self._seq += 1; item = (r['sim'], -self._seq, r)  # 동점이면 먼저 들어온 쪽 우선
+        if len(self._heap) < self.k: heapq.heappush(self._heap, item); return True
+        if item[:2] > self._heap[0][:2]: heapq.heapreplace(self._heap, item); return True
+        return False
+
+    def floor(self, n=None):
+        # n번째(기본 k번째) 점수 - 아직 n개가 안 찼으면 None
+        n = n or self.k
+        if len(self._heap) < n: return None
+        return self._heap[0][0] if n == self.k else heapq.nlargest(n, self._heap)[-1][0]
+
+    def items(self):
+        return [r for _, _, r in sorted(self._heap, key=lambda x: x[:2], reverse=True)]
+
+
+def iter_scan(market, patterns, stocks, require_bullish=False, require_doji=False, require_hammer=False, force_codes=(), min_sim=MIN_SIM, k=TOP_K, stop_sim=None, stop_k=None, chunk_size=STREAM_CHUNK, max_workers=30, report=None, filter_report=None, processes=0, expr=None, trace=None, timeframe="D", method="pearson"):
+    # 스트리밍 스캔: 시가총액 순으로 chunk 단위 (동기화 -> 사전 필터 -> 점수) 를 돌며 매번 (완료 수, 전체 수, {key: TopK}) 를 yield.
+    # 전체 결과 리스트를 모았다가 정렬하지 않으므로 첫 결과가 빨리 나오고 메모리는 상위 k개로 고정된다.
+    # stop_sim: 모든 패턴의 상위 stop_k(기본 k)개가 이 점수 이상으로 채워지면 남은 종목은 건너뛴다 (완료 수 < 전체 수 로 확인)
+    # processes > 0 이면 chunk 를 워커 수 x CHUNK_ROWS 이상으로 키운다 (100개 chunk 는 256행 구간 하나라 워커 1개만 일하고, chunk 마다 공유 메모리를 새로 만든다)
+    tops = {key: TopK(k, min_sim) for key in patterns}; stocks = as_listing(stocks, market)
+    if processes:
+        from parallel_scan import CHUNK_ROWS
+        chunk_size = max(chunk_size, processes * CHUNK_ROWS)
+    for start in range(0, len(stocks), chunk_size):
+        chunk = stocks[start:start + chunk_size]
+        res = run_scan(market, patterns, chunk, require_bullish, require_doji, require_hammer, force_codes, min_sim, max_workers, report=report, processes=processes, expr=expr, filter_report=filter_report, trace=trace, timeframe=timeframe, method=method)
+        for key, rows in res.items():
+            for r in rows: tops[key].push(r)
+        yield start + len(chunk), len(stocks), tops
+        if stop_sim is not None and all((f := t.floor(stop_k)) is not None and f >= stop_sim for t in tops.values()): return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="alphachart-scan", description="AlphaChart AI 헤드리스 스캔 (여러 패턴 한 번에)")
+    parser.add_argument("--market", choices=MARKETS, required=True)
+    parser.add_argument("--patterns", default="all", help="쉼표로 구분된 패턴 키 (예: A,B,H) 또는 all")
+    parser.add_argument("--period", default="auto", help="auto 또는 분석 기간(봉 개수)")
+    parser.add_argument("--timeframe", choices=TIMEFRAMES, default="D", help="D(일봉) / W(주봉) / M(월봉)")
+    parser.add_argument("--method", choices=METHODS, default="pearson", help="유사도: pearson(0.7/0.3) / dtw(시간축 보정, 하한 가지치기)")
+    parser.add_argument("--limit", type=int, default=None, help="시가총액 상위 N개만 스캔")
+    parser.add_argument("--bullish", action="store_true"); parser.add_argument("--doji", action="store_true"); parser.add_argument("--hammer", action="store_true")
+    parser.add_argument("--filter", dest="expr", help='추가 캔들 조건식 (예: "hammer AND volume > 20d avg")')
+    parser.add_argument("--min-sim", type=float, default=MIN_SIM)
+    parser.add_argument("--top", type=int, default=10, help="패턴별 출력 개수")
+    parser.add_argument("--workers", type=int, default=30)
+    parser.add_argument("--json", dest="json_path", help="전체 결과를 JSON 파일로 저장")
+    parser.add_argument("--trace", action="store_true", help="단계별 시간 / 탈락 사유 / 지연 백분위 출력")
+    parser.add_argument("--profile", action="store_true", help="이번 스캔을 cProfile 로 기록 (종목 판정은 순차 실행), 상위 함수 출력")
+    args = parser.parse_args(argv)
+    keys = list(PATTERN_DB) if args.patterns == "all" else [k.strip() for k in args.patterns.split(",")]
+    unknown = [k for k in keys if k not in PATTERN_DB]
+    if unknown: parser.error(f"알 수 없는 패턴: {', '.join(unknown)}")
+    stocks = get_stock_list(args.market)
+    if args.limit: stocks = stocks[:args.limit]
+    patterns = pattern_inputs(keys, args.period)
+    report = FetchReport(); filter_report = FilterReport(); trace = ScanTrace(profile=bool(args.profile), market=args.market, source="cli", method=args.method).start()
+    results = run_scan(args.market, patterns, stocks, args.bullish, args.doji, args.hammer, min_sim=args.min_sim, max_workers=args.workers, report=report, expr=args.expr, filter_report=filter_report, trace=trace, timeframe=args.timeframe, method=args.method)
+    trace.finish(log=False)
+    if args.trace: print(json.dumps(trace.summary(), ensure_ascii=False, indent=2, default=float))
+    if args.profile: print(trace.profile_top)
+    print(f"prefilter: {filter_report.total} -> {filter_report.survivors} " + ", ".join(f"{name} -{n}" for name, n in filter_report.drops.items() if n))
+    for key, res in results.items():
+        print(f"[{key}] {PATTERN_DB[key]['name_EN'].replace(chr(10), ' ')} (period {patterns[key][1]}{args.timeframe}): {len(res)}")
+        for r in res[:args.top]: print(f"    {r['code']:>10}  {r['name']}  {r['sim']:.1f}%")
+    print(f"fetch: {report.summary()}")
+    for code, reason in report.failed.items(): print(f"    ❌ {code}: {reason}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f: json.dump({'market': args.market, 'timeframe': args.timeframe, 'method': args.method, 'stocks': len(stocks), 'results': results, 'failed': report.failed}, f, ensure_ascii=False, default=jsonable)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
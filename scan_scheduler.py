@@ -0,0 +1,198 @@
+import os
+import time
+import hashlib
+import argparse
+import threading
+from collections import deque
+import numpy as np
+from telemetry import get_metrics
+
+# --- 🚥 [서버 공용 스캔 스케줄러] ---
+# 장 마감 직후 여러 세션이 같은 조건(시장, 패턴, 기간, 필터, 범위)으로 분석 버튼을 누르면 세션마다 같은 스캔이 따로 돈다.
+# 이 모듈은 프로세스 전체에서
+#   - 같은 키의 진행 중인 스캔은 하나만 돌리고(singleflight), 나중에 온 세션은 그 진행 상황/결과를 같이 받는다
+#     (무료 요청은 같은 키의 PRO 스캔에도 붙는다 - PRO 결과가 상위 집합)
+#   - 동시에 도는 스캔 수를 MAX_RUNNING 으로 제한하고, 나머지는 PRO / 무료 대기열에 넣어
+#     가중치(WEIGHTS) 비율로 번갈아 입장시킨다 (stride 방식 공정 분배 - 한쪽이 몰려도 다른 쪽이 굶지 않는다)
+#   - 대기 중인 세션에는 두 대기열을 가중치대로 번갈아 입장시켰을 때의 예상 입장 순번을 알려 준다
+# 스캔은 스케줄러 스레드에서 돌고 세션은 Flight.follow() 로 스냅샷만 받아 그리므로, 세션이 새로고침되어도
+# 실행 중인 스캔은 끝까지 돌아 결과 캐시에 남는다 (대기 중인데 구독자가 모두 떠나면 대기열에서 뺀다).
+MAX_RUNNING = int(os.environ.get("ALPHACHART_MAX_SCANS", "4"))
+WEIGHTS = {'pro': 3, 'free': 1}
+POLL = 0.25  # 대기 중 순번 갱신 주기 (초)
+QUEUE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def scan_key(market, profile, period, filters, codes, **options):
+    # 같은 스캔인지 판단하는 키: 시장 / 정규화 프로파일 / 기간 / 캔들 필터 / 대상 종목 / 기타 옵션 (타임프레임, 유사도 방식 등)
+    h = hashlib.sha1(f"{market}|{int(period)}|{tuple(bool(f) for f in filters)}|{sorted(options.items())}".encode())
+    h.update(np.round(np.asarray(profile, dtype=np.float64), 9).tobytes()); h.update("\0".join(codes).encode())
+    return h.hexdigest()
+
+
+class Flight:
+    # 스캔 1건 (대기 -> 실행 -> 완료). 실행 함수 run(flight) 이 publish() 로 진행 상황을 올리면 구독 세션들이 받아 간다
+    def __init__(self, key, tier, run, scheduler):
+        self.key = key; self.tier = tier; self.run = run; self.scheduler = scheduler
+        self.state = "queued"; self.done = 0; self.total = 0; self.tops = {}; self.info = {}; self.error = None
+        self.version = 0; self.followers = 0; self.queued_at = time.monotonic(); self.started_at = None; self.finished_at = None
+        self._cond = threading.Condition()
+
+    def publish(self, done, total, tops):
+        # tops: {패턴 키: (상위 결과 목록, min_sim 이상 개수)}
+        with self._cond:
+            self.done = done; self.total = total; self.tops = tops; self.version += 1; self._cond.notify_all()
+
+    def _set_state(self, state, error=None):
+        with self._cond:
+            self.state = state; self.error = error; self.version += 1; self._cond.notify_all()
+
+    def snapshot(self):
+        return {'state': self.state, 'position': self.scheduler.position(self), 'done': self.done, 'total': self.total, 'tops': self.tops,
+                'error': self.error, 'version': self.version}
+
+    def follow(self, poll=POLL):
+        # 구독 (submit 1번 = follow 1번): 진행 상황이 바뀌거나 poll 초가 지날 때마다 스냅샷을 yield, 끝나면 마지막 스냅샷 후 종료
+        seen = -1
+        try:
+            while True:
+                with self._cond:
+                    if self.version == seen and self.state in ("queued", "running"): self._cond.wait(poll)
+                    seen = self.version
+                snap = self.snapshot(); yield snap
+                if snap['state'] not in ("queued", "running"): return
+        finally: self.scheduler._leave(self)
+
+
+class ScanScheduler:
+    def __init__(self, max_running=MAX_RUNNING, weights=WEIGHTS):
+        self.max_running = max(1, int(max_running)); self.weights = dict(weights)
+        self._queues = {tier: deque() for tier in self.weights}; self._pass = {tier: 0.0 for tier in self.weights}
+        self._flights = {}; self._running = set(); self._lock = threading.Lock()
+        self.started = 0; self.coalesced = 0; self.cancelled = 0
+
+    def submit(self, key, run, pro=False):
+        # 반환: (Flight, 기존 스캔에 합류했는지). 같은 키가 대기/실행 중이면 새로 만들지 않는다
+        tier = "pro" if pro else "free"
+        with self._lock:
+            for t in ((tier,) if pro else ("free", "pro")):
+                f = self._flights.get((key, t))
+                if f is not None:
+                    f.followers += 1; self.coalesced += 1; get_metrics().inc('alphachart_scan_requests_total', tier=tier, result="coalesced")
+                    return f, True
+            f = Flight(key, tier, run, self); f.followers = 1; self._flights[(key, tier)] = f
+            if not self._queues[tier]:
+                # 비어 있던 대기열은 다른 대기열의 현재 위치부터 시작 (쉬는 동안 밀린 몫을 한꺼번에 쓰지 않도록)
+                busy = [self._pass[t] for t in self._queues if self._queues[t]]
+                if busy: self._pass[tier] = max(self._pass[tier], min(busy))
+            self._queues[tier].append(f); get_metrics().inc('alphachart_scan_requests_total', tier=tier, result="leader")
+            self._admit()
+        return f, False
+
+    def _admit(self):
+        # (lock 보유) 빈 자리가 있으면 pass 값이 가장 작은 대기열부터 입장 - 입장할 때마다 1/가중치 만큼 증가
+        while len(self._running) < self.max_running:
+            ready = [t for t in self._queues if self._queues[t]]
+            if not ready: return
+            tier = min(ready, key=lambda t: self._pass[t]); self._pass[tier] += 1.0 / self.weights[tier]
+            f = self._queues[tier].popleft(); self._running.add(f); self.started += 1; f.started_at = time.monotonic()
+            get_metrics().observe('alphachart_scan_queue_seconds', f.started_at - f.queued_at, QUEUE_BUCKETS, tier=tier)
+            f._set_state("running")
+            threading.Thread(target=self._run, args=(f,), daemon=True, name="alphachart-scan").start()
+
+    def _run(self, f):
+        error = None
+        try: f.run(f)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"; get_metrics().inc('alphachart_scan_exceptions_total', type=type(e).__name__)
+        finally:
+            with self._lock:
+                self._running.discard(f); self._flights.pop((f.key, f.tier), None); self._admit()
+            f.finished_at = time.monotonic(); f._set_state("error" if error else "done", error)
+
+    def _leave(self, f):
+        # 구독자가 모두 떠난 대기 중 스캔은 취소 (실행 중이면 끝까지 돌려 결과 캐시에 남긴다)
+        with self._lock:
+            f.followers -= 1
+            if f.followers > 0 or f.state != "queued": return
+            self._queues[f.tier].remove(f); self._flights.pop((f.key, f.tier), None); self.cancelled += 1
+        f._set_state("cancelled")
+
+    def position(self, f):
+        # 예상 입장 순번 (1부터, 실행 중/완료면 0): 지금 대기열 상태에서 _admit 의 stride 선택을 그대로 흉내 내어 f 가 몇 번째로 입장하는지 센다
+        # (PRO 3 : 무료 1 이면 무료 대기열 2번째는 그 사이 PRO 가 최대 6건 먼저 들어간다). 나중에 오는 요청은 반영하지 않는 추정치
+        with self._lock:
+            try: mine = self._queues[f.tier].index(f)
+            except ValueError: return 0
+            passes = dict(self._pass); taken = {t: 0 for t in self._queues}; n = 0
+            while True:
+                tier = min((t for t in self._queues if taken[t] < len(self._queues[t])), key=lambda t: passes[t])
+                passes[tier] += 1.0 / self.weights[tier]; n += 1
+                if tier == f.tier and taken[tier] == mine: return n
+                taken[tier] += 1
+
+    def stats(self):
+        with self._lock:
+            return {'running': len(self._running), 'queued': {t: len(q) for t, q in self._queues.items()}, 'max_running': self.max_running,
+                    'started': self.started, 'coalesced': self.coalesced, 'cancelled': self.cancelled}
+
+
+def scan_job(market, patterns, stocks, cache_key=None, trading_day=None, trace=None, **scan_kwargs):
+    # iter_scan 을 스케줄러 작업으로 감싼다: chunk 마다 {key: (상위 k 목록, 개수)} 게시, 끝나면 trace 마무리 + (끝까지 돌았고 수집 실패가 없으면) 결과 캐시 저장
+    # trace 는 시작하지 않은 ScanTrace 를 넘긴다 (프로파일 모드는 스캔을 실행하는 스레드에 걸어야 하므로 여기서 start)
+    def run(flight):
+        from scan_engine import iter_scan
+        from fetcher import FetchReport
+        from prefilter import FilterReport
+        report = FetchReport(); filter_report = FilterReport(); flight.info.update(fetch_report=report, filter_report=filter_report, trace=trace); done = total = 0
+        if trace is not None: trace.start()
+        try:
+            for done, total, tops in iter_scan(market, patterns, stocks, report=report, filter_report=filter_report, trace=trace, **scan_kwargs):
+                flight.publish(done, total, {key: (t.items(), t.count) for key, t in tops.items()})
+        finally:
+            if trace is not None: trace.finish()
+        if cache_key and not report.failed and done == total and len(patterns) == 1:
+            from result_cache import get_result_cache
+            items, count = flight.tops.get(next(iter(patterns)), ([], 0))
+            get_result_cache().put(cache_key, market, trading_day, items, count)
+    return run
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+def get_scheduler():
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None: _default_scheduler = ScanScheduler()
+        return _default_scheduler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="스캔 스케줄러 시뮬레이션 (가짜 스캔으로 합류 / 공정 분배 / 대기 순번 확인)")
+    parser.add_argument("--sessions", type=int, default=40, help="동시에 분석 버튼을 누르는 세션 수")
+    parser.add_argument("--distinct", type=int, default=5, help="서로 다른 스캔 조건 수")
+    parser.add_argument("--pro-ratio", type=float, default=0.3)
+    parser.add_argument("--max-running", type=int, default=MAX_RUNNING)
+    parser.add_argument("--scan-seconds", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed); sched = ScanScheduler(args.max_running); waits = {'pro': [], 'free': []}; max_pos = {'pro': 0, 'free': 0}
+    plan = [(bool(p), f"cond-{c}") for p, c in zip(rng.random(args.sessions) < args.pro_ratio, rng.integers(args.distinct, size=args.sessions))]
+
+    def fake_scan(flight):
+        for i in range(1, 6): time.sleep(args.scan_seconds / 5); flight.publish(i, 5, {'user': ([], i)})
+
+    def session(pro, key):
+        tier = "pro" if pro else "free"; t0 = time.monotonic(); flight, _ = sched.submit(key, fake_scan, pro=pro); started = None
+        for snap in flight.follow(0.05):
+            if snap['state'] == "queued": max_pos[tier] = max(max_pos[tier], snap['position'])
+            elif started is None: started = time.monotonic(); waits[tier].append(started - t0)
+
+    threads = [threading.Thread(target=session, args=p) for p in plan]
+    t0 = time.monotonic()
+    for th in threads: th.start()
+    for th in threads: th.join()
+    print(f"⏱️ {time.monotonic() - t0:.2f} s | 요청 {args.sessions}개 -> 실제 스캔 {sched.started}개 (합류 {sched.coalesced}) | 동시 실행 한도 {sched.max_running}")
+    for tier, w in waits.items():
+        if w: print(f"    {tier:>4}: {len(w)}개 세션, 대기 p50 {np.percentile(w, 50):.2f} s / max {max(w):.2f} s, 최대 순번 {max_pos[tier]}")
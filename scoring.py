@@ -0,0 +1,63 @@
+import numpy as np
+from dtw import dtw_scores
+
+# --- 🧮 [일괄 유사도 엔진] ---
+# analyze_stock_legacy 의 MinMaxScaler -> np.interp(50점) -> pearsonr(전체 0.7 / 마지막 10점 0.3) 과정을
+# (종목 수 x n_days) 종가 행렬 하나에 대해 NumPy 배열 연산으로 한 번에 계산한다.
+N_POINTS = 50
+TAIL_LEN = 10
+W_TOTAL = 0.7
+W_TAIL = 0.3
+METHODS = ("pearson", "dtw")  # 유사도 모드: 피어슨 0.7/0.3 (기본) / DTW (dtw.py)
+
+_weights_cache = {}
+
+def resample_weights(n_days, n_points=N_POINTS):
+    # y @ W == np.interp(np.linspace(0, n_days-1, n_points), np.arange(n_days), y)
+    key = (n_days, n_points)
+    W = _weights_cache.get(key)
+    if W is None:
+        pos = np.linspace(0, n_days - 1, n_points); lo = np.clip(np.floor(pos).astype(np.int64), 0, n_days - 1)
+        hi = np.minimum(lo + 1, n_days - 1); frac = pos - lo; cols = np.arange(n_points)
+        W = np.zeros((n_days, n_points))
+        np.add.at(W, (lo, cols), 1.0 - frac); np.add.at(W, (hi, cols), frac)
+        _weights_cache[key] = W
+    return W
+
+
+def minmax_rows(m):
+    # 행 단위 MinMaxScaler (범위가 0인 행은 sklearn 과 같이 0 으로)
+    mn = m.min(axis=1, keepdims=True); rng = m.max(axis=1, keepdims=True) - mn
+    rng = np.where(rng == 0, 1.0, rng)
+    return (m - mn) / rng
+
+
+def pearson_rows(u, S):
+    # u(k,) 와 S(N,k) 각 행의 피어슨 상관계수. 분산이 0이면 NaN (pearsonr 과 동일)
+    uc = u - u.mean(); Sc = S - S.mean(axis=1, keepdims=True)
+    num = Sc @ uc; den = np.sqrt((Sc * Sc).sum(axis=1) * (uc @ uc))
+    with np.errstate(divide="ignore", invalid="ignore"): r = num / den
+    r[den == 0] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def resample_rows(closes, n_points=N_POINTS):
+    closes = np.asarray(closes, dtype=np.float64)
+    return minmax_rows(closes) @ resample_weights(closes.shape[1], n_points)
+
+
+def score_profiles(profiles, user_p_norm, tail_len=TAIL_LEN, method="pearson", min_sim=0.0, k=None, stats=None):
+    # 이미 50점으로 정규화/리샘플된 프로파일(N,50)에 대한 최종 유사도(%)
+    # method="dtw" 면 min_sim / 상위 k 컷으로 하한 가지치기 (컷 아래 종목은 정확한 점수 대신 컷 미만의 상한), stats: dtw.PruneStats
+    if method == "dtw": return dtw_scores(profiles, user_p_norm, min_sim, k, stats=stats)
+    user_p_norm = np.asarray(user_p_norm, dtype=np.float64)
+    corr_total = pearson_rows(user_p_norm, profiles)
+    corr_tail = np.nan_to_num(pearson_rows(user_p_norm[-tail_len:], profiles[:, -tail_len:]), nan=0.0)
+    return ((corr_total * W_TOTAL) + (corr_tail * W_TAIL) + 1) * 50
+
+
+def score_matrix(closes, user_p_norm, tail_len=TAIL_LEN, method="pearson", min_sim=0.0, k=None, stats=None):
+    # closes: (N, n_days) 종가 행렬 -> (N,) 유사도(%). 기존 엔진이 None 을 반환하던 종목은 NaN
+    closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+    if closes.shape[0] == 0: return np.empty(0)
+    return score_profiles(resample_rows(closes, len(user_p_norm)), user_p_norm, tail_len, method, min_sim, k, stats)
@@ -0,0 +1,120 @@
+import time
+import base64
+import argparse
+import threading
+from collections import OrderedDict
+import numpy as np
+from ohlcv_store import MARKETS, get_store
+
+# --- 📈 [결과 카드 미니 캔들] ---
+# 결과 카드마다 matplotlib 그림을 만드는 대신 (100개면 수 초 + 그림 누수), 표시할 종목들의 최근 봉을 한 번에 읽어
+# 좌표를 numpy 로 일괄 계산하고 작은 인라인 SVG(data URI) 로 만든다.
+#   - 캔들 부분은 (시장, 타임프레임, 종목, 기간, 거래일) 키로 프로세스 공용 LRU 에 저장 -> 같은 날 재실행/다른 세션은 문자열만 재사용
+#   - 사용자 패턴(정규화 프로파일)은 매번 캔들 위에 선으로 겹친다 (유사도와 같은 기준: 구간 종가 최저~최고에 0~1 을 맞춤)
+SPARK_W, SPARK_H, PAD = 240, 64, 3
+CACHE_SIZE = 4096
+CANDLE_COLORS = {'KRX': ("#ef4444", "#3b82f6")}  # (상승, 하락) - 국내는 빨강/파랑
+DEFAULT_COLORS = ("#16a34a", "#ef4444")
+OVERLAY_COLOR = "#f59e0b"
+
+
+def candle_geometry(ohlc, width=SPARK_W, height=SPARK_H, pad=PAD):
+    # ohlc: (종목 N, 봉 n, 4) - 짧은 종목은 앞쪽이 NaN. 반환: 봉 중심 x, 몸통 폭, y 좌표들 (N, n), 종가 최저/최고의 y (N,)
+    o, h, l, c = (ohlc[..., j] for j in range(4))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lo = np.nanmin(l, axis=1, keepdims=True); hi = np.nanmax(h, axis=1, keepdims=True); span = np.where(hi - lo > 0, hi - lo, 1.0)
+        def y(v): return pad + (height - 2 * pad) * (hi - v) / span
+        n = ohlc.shape[1]; step = (width - 2 * pad) / max(n, 1); x = pad + step * (np.arange(n) + 0.5)
+        return x, max(step * 0.7, 1.0), y(o), y(h), y(l), y(c), y(np.nanmin(c, axis=1, keepdims=True))[:, 0], y(np.nanmax(c, axis=1, keepdims=True))[:, 0]
+
+
+def _candles_svg(x, bw, yo, yh, yl, yc, colors):
+    ok = ~(np.isnan(yo) | np.isnan(yh) | np.isnan(yl) | np.isnan(yc)); rising = yc <= yo  # y 축이 아래로 커지므로 종가가 위 = 상승
+    parts = []
+    for mask, color in ((ok & rising, colors[0]), (ok & ~rising, colors[1])):
+        idx = np.flatnonzero(mask)
+        if not len(idx): continue
+        top = np.minimum(yo[idx], yc[idx]); body = np.maximum(np.abs(yc[idx] - yo[idx]), 0.8)
+        wick = "".join(f"M{a:.1f} {b:.1f}V{d:.1f}" for a, b, d in zip(x[idx], yh[idx], yl[idx]))
+        rect = "".join(f"M{a - bw / 2:.1f} {b:.1f}h{bw:.1f}v{d:.1f}h{-bw:.1f}z" for a, b, d in zip(x[idx], top, body))
+        parts.append(f'<path d="{wick}" stroke="{color}" stroke-width="1" vector-effect="non-scaling-stroke"/><path d="{rect}" fill="{color}"/>')
+    return "".join(parts)
+
+
+def overlay_svg(user_p_norm, x0, x1, y_lo, y_hi, color=OVERLAY_COLOR, width=2):
+    p = np.asarray(user_p_norm, dtype=np.float64); xs = np.linspace(x0, x1, len(p)); ys = y_lo + (y_hi - y_lo) * p
+    pts = " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(xs, ys))
+    return f'<polyline points="{pts}" fill="none" stroke="{color}" stroke-width="{width}" stroke-opacity="0.85" stroke-linejoin="round" vector-effect="non-scaling-stroke"/>'
+
+
+def to_data_uri(svg_body, width=SPARK_W, height=SPARK_H):
+    # 카드 폭에 맞춰 늘어나도록 비율 고정 없음 (선 굵기는 non-scaling-stroke 로 유지)
+    svg = f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}" preserveAspectRatio="none">{svg_body}</svg>'
+    return "data:image/svg+xml;base64," + base64.b64encode(svg.encode()).decode()
+
+
+def pattern_svg(user_p_norm, color, width=600, height=120, pad=6):
+    # 업로드/기본 패턴 모양 미리보기 (선 하나)
+    return to_data_uri(overlay_svg(user_p_norm, pad, width - pad, height - pad, pad, color, width=3), width, height)
+
+
+class SparkCache:
+    # {(시장, 타임프레임, 종목, 기간, 거래일): (캔들 SVG, 봉 x 시작/끝, 종가 최저/최고 y)} LRU
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries; self._data = OrderedDict(); self._lock = threading.Lock(); self.hits = 0; self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None: self.misses += 1; return None
+            self._data.move_to_end(key); self.hits += 1; return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._data[key] = entry; self._data.move_to_end(key)
+            while len(self._data) > self.max_entries: self._data.popitem(last=False)
+
+    def stats(self):
+        return {'entries': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+def render_cards(market, codes, period, user_p_norm, timeframe="D", trading_day=None, overlay_color=OVERLAY_COLOR, store=None, cache=None):
+    # 반환: {종목: SVG data URI}. 캐시에 없는 종목만 최근 period 개 봉을 한 번에 읽어 일괄 계산 (trading_day 가 없으면 캐시 미사용)
+    from prefilter import load_last_bars
+    from timeframes import tf_market
+    cache = cache or get_spark_cache(); period = int(period); entries = {}; todo = []
+    for code in codes:
+        entry = cache.get((market, timeframe, code, period, trading_day)) if trading_day else None
+        if entry is None: todo.append(code)
+        else: entries[code] = entry
+    if todo:
+        bars = load_last_bars(tf_market(market, timeframe), todo, period, store or get_store()).bars[..., :4]
+        x, bw, yo, yh, yl, yc, y_lo, y_hi = candle_geometry(bars); colors = CANDLE_COLORS.get(market, DEFAULT_COLORS)
+        for i, code in enumerate(todo):
+            if np.isnan(y_lo[i]): continue  # 로컬 저장소에 봉이 없음
+            first = int(np.argmax(~np.isnan(yc[i])))
+            entries[code] = (_candles_svg(x, bw, yo[i], yh[i], yl[i], yc[i], colors), float(x[first]), float(x[-1]), float(y_lo[i]), float(y_hi[i]))
+            if trading_day: cache.put((market, timeframe, code, period, trading_day), entries[code])
+    return {code: to_data_uri(body + overlay_svg(user_p_norm, x0, x1, lo, hi, overlay_color)) for code, (body, x0, x1, lo, hi) in entries.items()}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_spark_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None: _default_cache = SparkCache()
+        return _default_cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="결과 카드 미니 캔들 렌더링 시간 측정 (로컬 저장소)")
+    parser.add_argument("--market", choices=MARKETS, required=True)
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--period", type=int, default=20)
+    args = parser.parse_args()
+    codes = get_store().codes(args.market)[:args.count]; u = np.linspace(0, 1, 50)
+    for label in ("cold", "warm"):
+        t0 = time.perf_counter(); out = render_cards(args.market, codes, args.period, u, trading_day="bench"); dt = time.perf_counter() - t0
+        print(f"{label}: {len(out)}개 {dt * 1000:.1f} ms ({sum(len(v) for v in out.values()) / max(len(out), 1) / 1024:.1f} KB/카드)")
@@ -0,0 +1,205 @@
+import os
+import io
+import json
+import time
+import logging
+import pstats
+import cProfile
+import argparse
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import numpy as np
+from ohlcv_store import DATA_DIR
+
+# --- 📡 [스캔 계측] ---
+# "80% 이상 종목 없음" 이 나왔을 때 이유를 알 수 있도록 스캔 1회마다
+#   - 단계별 시간 (listing, fetch, resample, filter, screen, normalize, correlate, render)
+#   - filter_status / 사전 필터 탈락 사유 / NaN 상관계수 / 예외 타입별 개수
+#   - 종목별 지연 시간 백분위 (fetch: 증분 동기화, screen: 로컬 읽기 + 캔들 판정)
+# 을 ScanTrace 에 모으고, 끝나면 JSON 한 줄 로그(alphachart.scan) + 프로세스 공용 Prometheus 카운터/히스토그램에 합친다.
+# ALPHACHART_METRICS_PORT 를 주면 http://<host>:<port>/metrics 로 텍스트 형식을 노출한다.
+STAGES = ("listing", "fetch", "resample", "filter", "screen", "normalize", "correlate", "render")
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SCAN_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+PROFILE_FLAG = os.path.join(DATA_DIR, "profile_next_scan")
+PROFILE_TOP = 25
+
+logger = logging.getLogger("alphachart.scan")
+if not logger.handlers:
+    # 스캔 요약은 JSON 한 줄 그대로 stderr 로 (수집기에서 파싱하기 쉽도록 포맷 없이)
+    _handler = logging.StreamHandler(); _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler); logger.setLevel(logging.INFO); logger.propagate = False
+
+
+class ScanTrace:
+    # 스캔 1회분 계측. 여러 스레드에서 동시에 기록해도 된다.
+    # profile=True 면 스캔을 부른 스레드에 cProfile 을 건다 (run_scan 은 이때 종목 판정을 같은 스레드에서 순차 실행)
+    def __init__(self, profile=False, **labels):
+        self.scan_id = f"{int(time.time() * 1000):x}-{os.getpid()}"; self.labels = labels
+        self.stages = defaultdict(float); self.status = Counter(); self.exceptions = Counter(); self.latencies = defaultdict(list)
+        self.profile = cProfile.Profile() if profile else None; self.profile_path = None; self.profile_top = None
+        self.seconds = None; self._t0 = None; self._lock = threading.Lock()
+
+    def start(self):
+        self._t0 = time.perf_counter()
+        if self.profile: self.profile.enable()
+        return self
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try: yield
+        finally: self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name, seconds):
+        with self._lock: self.stages[name] += seconds
+
+    def count(self, status, n=1):
+        if n:
+            with self._lock: self.status[status] += n
+
+    def exception(self, error):
+        error = getattr(error, 'cause', None) or error  # FetchError 는 원인 예외 타입으로 센다
+        with self._lock: self.exceptions[type(error).__name__] += 1
+
+    def latency(self, kind, seconds):
+        with self._lock: self.latencies[kind].append(seconds)
+
+    def percentiles(self):
+        out = {}
+        for kind, values in self.latencies.items():
+            v = np.asarray(values)
+            out[kind] = {'n': len(v), 'p50': float(np.percentile(v, 50)), 'p90': float(np.percentile(v, 90)), 'p99': float(np.percentile(v, 99)), 'max': float(v.max())}
+        return out
+
+    def finish(self, log=True):
+        if self._t0 is not None and self.seconds is None: self.seconds = time.perf_counter() - self._t0
+        if self.profile is not None and self.profile_path is None:
+            self.profile.disable(); os.makedirs(PROFILE_DIR, exist_ok=True)
+            self.profile_path = os.path.join(PROFILE_DIR, f"scan-{self.scan_id}.prof"); self.profile.dump_stats(self.profile_path)
+            buf = io.StringIO(); pstats.Stats(self.profile, stream=buf).sort_stats("cumulative").print_stats(PROFILE_TOP); self.profile_top = buf.getvalue()
+        if log: logger.info(json.dumps(self.summary(), ensure_ascii=False, default=float))
+        get_metrics().record_scan(self)
+        return self
+
+    def summary(self):
+        with self._lock:
+            return {'event': 'scan', 'scan_id': self.scan_id, **self.labels, 'seconds': self.seconds,
+                    'stages': {k: round(v, 6) for k, v in self.stages.items()}, 'status': dict(self.status), 'exceptions': dict(self.exceptions),
+                    'latency': self.percentiles(), 'profile': self.profile_path}
+
+
+def note(trace, status, n=1):
+    # trace 가 없을 때도 호출부를 한 줄로 유지하기 위한 헬퍼
+    if trace is not None: trace.count(status, n)
+
+
+@contextmanager
+def timed(trace, name):
+    if trace is None: yield
+    else:
+        with trace.stage(name): yield
+
+
+# --- 📊 Prometheus 형식 레지스트리 ---
+_HELP = {
+    'alphachart_scans_total': ("counter", "Completed scans"),
+    'alphachart_scan_stage_seconds_total': ("counter", "Time spent per scan stage"),
+    'alphachart_scan_status_total': ("counter", "Tickers per filter_status / drop reason"),
+    'alphachart_scan_exceptions_total': ("counter", "Exceptions swallowed during scans, by type"),
+    'alphachart_stage_seconds_total': ("counter", "Time spent outside scans (e.g. listing)"),
+    'alphachart_scan_seconds': ("histogram", "Wall time per scan"),
+    'alphachart_ticker_latency_seconds': ("histogram", "Per-ticker latency by kind"),
+    'alphachart_license_checks_total': ("counter", "License logins by result"),
+    'alphachart_license_refresh_total': ("counter", "License sheet refreshes by result"),
+    'alphachart_scan_requests_total': ("counter", "Scan requests by tier, started (leader) or joined in-flight (coalesced)"),
+    'alphachart_scan_queue_seconds': ("histogram", "Time a scan waited for admission, by tier"),
+}
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = defaultdict(float); self.histograms = {}; self._lock = threading.Lock()
+
+    def inc(self, name, value=1.0, **labels):
+        with self._lock: self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, values, buckets=LATENCY_BUCKETS, **labels):
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64)); key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self.histograms.setdefault(key, {'buckets': buckets, 'counts': np.zeros(len(buckets), dtype=np.int64), 'sum': 0.0, 'count': 0})
+            h['counts'] += (values[:, None] <= np.asarray(buckets)[None, :]).sum(axis=0); h['sum'] += float(values.sum()); h['count'] += len(values)
+
+    def record_scan(self, trace):
+        market = trace.labels.get('market', '')
+        self.inc('alphachart_scans_total', market=market)
+        for stage, secs in trace.stages.items(): self.inc('alphachart_scan_stage_seconds_total', secs, stage=stage)
+        for status, n in trace.status.items(): self.inc('alphachart_scan_status_total', n, status=status)
+        for exc, n in trace.exceptions.items(): self.inc('alphachart_scan_exceptions_total', n, type=exc)
+        for kind, values in trace.latencies.items():
+            if values: self.observe('alphachart_ticker_latency_seconds', values, kind=kind)
+        if trace.seconds is not None: self.observe('alphachart_scan_seconds', trace.seconds, SCAN_BUCKETS, market=market)
+
+    def render(self):
+        def fmt(labels): return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in labels) + "}" if labels else ""
+        lines = []; seen = set()
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen: seen.add(name); kind, text = _HELP.get(name, ("counter", name)); lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+                lines.append(f"{name}{fmt(labels)} {value:g}")
+            for (name, labels), h in sorted(self.histograms.items(), key=lambda x: x[0]):
+                if name not in seen: seen.add(name); kind, text = _HELP.get(name, ("histogram", name)); lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+                for b, c in zip(h['buckets'], h['counts']): lines.append(f"{name}_bucket{fmt(labels + (('le', f'{b:g}'),))} {c}")
+                lines += [f"{name}_bucket{fmt(labels + (('le', '+Inf'),))} {h['count']}", f"{name}_sum{fmt(labels)} {h['sum']:g}", f"{name}_count{fmt(labels)} {h['count']}"]
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+def get_metrics():
+    return _metrics
+
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=None):
+    # /metrics 를 데몬 스레드로 노출 (프로세스당 한 번). port 생략 시 ALPHACHART_METRICS_PORT, 없으면 아무것도 하지 않는다
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    port = port or os.environ.get("ALPHACHART_METRICS_PORT")
+    if not port: return None
+    with _server_lock:
+        if _server is not None: return _server
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics": self.send_error(404); return
+                body = get_metrics().render().encode()
+                self.send_response(200); self.send_header("Content-Type", "text/plain; version=0.0.4"); self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+            def log_message(self, *args): pass
+        try: _server = ThreadingHTTPServer(("0.0.0.0", int(port)), Handler)
+        except OSError: return None  # 같은 포트를 이미 다른 프로세스가 사용 중
+        threading.Thread(target=_server.serve_forever, daemon=True, name="alphachart-metrics").start()
+        return _server
+
+
+def request_profile():
+    # 다음 스캔 한 번만 cProfile 로 잡도록 표시 (어느 세션이든 먼저 스캔한 쪽이 소비)
+    os.makedirs(os.path.dirname(PROFILE_FLAG), exist_ok=True)
+    with open(PROFILE_FLAG, "w") as f: f.write(str(time.time()))
+
+
+def consume_profile_request():
+    try: os.remove(PROFILE_FLAG); return True
+    except OSError: return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="스캔 계측 도구")
+    parser.add_argument("--profile-next", action="store_true", help="다음 스캔 1회를 cProfile 로 기록 (결과: data/profiles/*.prof)")
+    parser.add_argument("--show", help="저장된 .prof 파일 상위 함수 출력")
+    args = parser.parse_args()
+    if args.profile_next: request_profile(); print(f"✅ 다음 스캔을 프로파일링합니다 -> {PROFILE_DIR}")
+    if args.show: pstats.Stats(args.show).sort_stats("cumulative").print_stats(PROFILE_TOP)
@@ -0,0 +1,50 @@
+import numpy as np
+from benchmark import synth_universe, build_store
+from ann_index import PatternIndex, measure_recall, apply_prefilter
+from scoring import resample_rows
+
+
+def queries(n, seed=0):
+    rng = np.random.default_rng(seed); out = [np.cumsum(rng.normal(0, 1, 50)) for _ in range(n)]
+    return [(q - q.min()) / np.ptp(q) for q in out]
+
+
+def test_query_recall_against_brute_force(tmp_path):
+    store = build_store(str(tmp_path), synth_universe(600, seed=1)); index = PatternIndex(root=str(tmp_path / "ann"))
+    index.update_from_store(["KRX"], store)
+    for p, ix in index.indexes.items():
+        assert len(ix) and measure_recall(ix, queries(10), k=20) >= 0.95, p
+    ix = index.indexes[20]; code = ix.keys[7][1]
+    q = resample_rows(np.asarray(store.read_tail("KRX", code, 20)['Close'])[None, :])[0]
+    top = ix.query(q, k=5); exact = ix.brute_force(q, k=5)
+    assert top[0]['code'] == code and top[0]['sim'] > 99.99 and [r['code'] for r in top] == [r['code'] for r in exact]
+
+
+def test_rebuild_drops_delisted_and_remembers_skipped_rows(tmp_path):
+    frames = synth_universe(30, lengths=(120, 15), seed=2)
+    frames["FLAT01"] = frames["000000"].assign(Close=1000.0)
+    store = build_store(str(tmp_path / "a"), frames); index = PatternIndex(root=str(tmp_path / "ann"))
+    assert index.update_from_store(["KRX"], store) > 0
+    ix20 = index.indexes[20]
+    assert ("KRX", "000001") not in ix20.rows and ix20.last_date("KRX", "000001") == store.last_date("KRX", "000001")  # 15봉 < 20
+    assert ("KRX", "FLAT01") not in ix20.rows and ix20.last_date("KRX", "FLAT01") is not None
+    assert index.update_from_store(["KRX"], store) == 0  # 행을 만들지 않은 종목도 다시 읽지 않는다
+    index.save(); index = PatternIndex(root=str(tmp_path / "ann"))
+    assert index.update_from_store(["KRX"], store) == 0 and index.indexes[20].skipped == ix20.skipped
+    # 상장폐지: 저장소에서 빠진 종목은 재구축 때 행/날짜 기록 모두 지운다
+    gone = [("KRX", "000000"), ("KRX", "000001")]; n_rows = sum(key in ix.rows for ix in index.indexes.values() for key in gone)
+    removed = index.update_from_store(["KRX"], build_store(str(tmp_path / "b"), {c: df for c, df in frames.items() if ("KRX", c) not in gone}))
+    assert removed == n_rows == 5 and all(ix.last_date(*key) is None for ix in index.indexes.values() for key in gone)
+    assert all(ix.profiles.shape[0] == len(ix.keys) == len(ix.rows) for ix in index.indexes.values())
+    assert index.indexes[13].query(queries(1)[0], k=5)
+
+
+def test_apply_prefilter_skips_untradable_candidates(tmp_path):
+    frames = synth_universe(6, lengths=(60,), seed=3)
+    frames["000001"].iloc[-1, frames["000001"].columns.get_loc("Volume")] = 0.0
+    frames["000002"] = frames["000002"] * 0.0001  # 1 미만 동전주
+    store = build_store(str(tmp_path), frames, market="NYSE")
+    cands = [{'market': "NYSE", 'code': c, 'sim': 90.0} for c in frames]
+    assert [r['code'] for r in apply_prefilter(cands, store=store)] == ["000000", "000003", "000004", "000005"]
+    bullish = [c for c, df in frames.items() if df['Close'].iloc[-1] > df['Open'].iloc[-1]]
+    assert {r['code'] for r in apply_prefilter(cands, "bullish", store=store)} == set(bullish) - {"000001", "000002"}
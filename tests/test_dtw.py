@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from dtw import dtw_rows, dtw_scores, lb_kim, lb_keogh, lb_keogh_rev, envelope, band_radius, to_sim, PruneStats
+from scoring import resample_rows
+
+
+def naive_dtw(a, b, r):
+    # 교과서 그대로의 Sakoe-Chiba 밴드 DTW (누적 제곱 오차)
+    n = len(a); D = np.full((n + 1, n + 1), np.inf); D[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(max(1, i - r), min(n, i + r) + 1):
+            D[i, j] = (a[i - 1] - b[j - 1]) ** 2 + min(D[i - 1, j], D[i, j - 1], D[i - 1, j - 1])
+    return D[n, n]
+
+
+@pytest.fixture(scope="module")
+def data():
+    # 사용자 패턴 + (밀리거나 늘어난 변형, 잡음 섞인 변형, 랜덤워크, 평평한 행)
+    rng = np.random.default_rng(7); u = resample_rows(np.cumsum(rng.normal(0, 1, 40))[None, :])[0]
+    x = np.linspace(0, 1, 50); warped = [np.interp(np.clip(x * s + o, 0, 1), x, u) for s, o in zip(rng.uniform(0.85, 1.15, 40), rng.uniform(-0.05, 0.05, 40))]
+    noisy = [np.clip(u + rng.normal(0, sd, 50), 0, 1) for sd in rng.uniform(0.02, 0.3, 40)]
+    walks = list(resample_rows(np.exp(np.cumsum(rng.normal(0, 0.02, (80, 30)), axis=1))))
+    S = np.vstack(warped + noisy + walks + [np.full(50, 0.5)]); r = band_radius(50)
+    return u, S, r, np.array([naive_dtw(u, s, r) for s in S])
+
+
+def test_dtw_rows_matches_naive(data):
+    u, S, r, naive = data
+    d, exact = dtw_rows(u, S, r)
+    assert exact.all(); np.testing.assert_allclose(d, naive, rtol=1e-12, atol=1e-12)
+    d, exact = dtw_rows(u, S, r, cutoff=np.median(naive))  # 중단된 행은 최종 거리의 하한이면서 컷 초과
+    np.testing.assert_allclose(d[exact], naive[exact], rtol=1e-12, atol=1e-12)
+    assert (d[~exact] <= naive[~exact] + 1e-12).all() and (d[~exact] > np.median(naive)).all()
+
+
+def test_lower_bounds_never_exceed_dtw(data):
+    u, S, r, naive = data
+    for lb in (lb_kim(u, S), lb_keogh(u, S, r, envelope(u, r)), lb_keogh_rev(u, S, r)):
+        assert (lb <= naive + 1e-12).all()
+
+
+@pytest.mark.parametrize("min_sim", [0.0, 70.0, 80.0, 90.0])
+def test_pruned_scores_match_naive_above_cut(data, min_sim):
+    u, S, r, naive = data; full = to_sim(naive, 50); full[-1] = np.nan; stats = PruneStats()
+    sims = dtw_scores(S, u, min_sim, stats=stats)
+    keep = full >= min_sim
+    assert np.isnan(sims[-1]) and np.array_equal(sims >= min_sim, keep)
+    np.testing.assert_allclose(sims[keep], full[keep], rtol=0, atol=1e-9)
+    below = ~keep & ~np.isnan(full)
+    assert (sims[below] < min_sim).all() and (sims[below] >= full[below] - 1e-9).all()  # 가지치기 점수는 컷 미만의 상한
+    s = stats.summary()
+    assert s['flat'] == 1 and s['lb_kim'] + s['lb_keogh'] + s['abandoned'] + s['full'] == s['total'] - s['flat']
+    if min_sim >= 80: assert s['lb_kim'] + s['lb_keogh'] > 0
+
+
+@pytest.mark.parametrize("k", [1, 5, 30])
+def test_top_k_cut_keeps_exact_top_k(data, k):
+    u, S, r, naive = data; full = to_sim(naive, 50)[:-1]
+    sims = dtw_scores(S, u, 0.0, k=k)[:-1]
+    top = np.argsort(-full, kind="stable")[:k]
+    assert set(np.argsort(-sims, kind="stable")[:k]) == set(top)
+    np.testing.assert_allclose(sims[top], full[top], rtol=0, atol=1e-9)
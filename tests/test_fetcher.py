@@ -0,0 +1,48 @@
+import urllib.error
+import pytest
+from fetcher import Fetcher, FetchError, FetchReport, FlakySource, is_transient
+
+
+class ScriptedSource:
+    # 호출마다 errors 의 다음 예외를 던지고, 다 쓰면 code 를 돌려준다
+    def __init__(self, *errors):
+        self.errors = list(errors); self.calls = 0
+
+    def __call__(self, code, *args):
+        self.calls += 1
+        if self.errors: raise self.errors.pop(0)
+        return code
+
+
+def http_error(status):
+    return urllib.error.HTTPError("http://example/x", status, "err", None, None)
+
+
+@pytest.mark.parametrize("error, transient", [(TimeoutError(), True), (ConnectionError(), True), (http_error(429), True), (http_error(503), True),
+                                              (http_error(404), False), (ValueError("bad json"), False), (KeyError("005930"), False)])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+def test_retries_transient_errors_only():
+    fetcher = Fetcher(max_retries=3, sleep=lambda s: None); report = FetchReport()
+    source = ScriptedSource(TimeoutError(), http_error(502))
+    assert fetcher.fetch(source, "005930", report=report) == "005930" and source.calls == 3 and report.retries == 2
+    source = ScriptedSource(http_error(404))
+    with pytest.raises(FetchError) as e: fetcher.fetch(source, "005930", report=report)
+    assert source.calls == 1 and e.value.attempts == 1
+    source = ScriptedSource(*[ConnectionError()] * 10)
+    with pytest.raises(FetchError) as e: fetcher.fetch(source, "005930")
+    assert source.calls == 4 and e.value.attempts == 4
+
+
+def test_flaky_source_permanent_failure_is_not_retried():
+    calls = []; flaky = FlakySource(lambda code, *args: calls.append(code) or code, fail_codes={"000660"})
+    fetcher = Fetcher(max_retries=3, sleep=lambda s: None); report = FetchReport(); source = fetcher.wrap(flaky, "flaky", report)
+    assert source("005930") == "005930"
+    with pytest.raises(FetchError) as e: source("000660")
+    assert flaky.calls == 2 and e.value.attempts == 1 and report.retries == 0 and calls == ["005930"]
+    report.fail("000660", e.value); assert report.failed["000660"].startswith("HTTPError")
+    flaky = FlakySource(lambda code, *args: code, fail_rate=1.0)
+    with pytest.raises(FetchError): fetcher.fetch(flaky, "005930")
+    assert flaky.calls == 4  # 주입된 타임아웃은 일시적 오류 -> 재시도
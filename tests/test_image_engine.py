@@ -0,0 +1,28 @@
+import io
+import pytest
+from benchmark import synth_charts
+from image_engine import extract_features_engine, extract_features_fast, count_candles_engine, decode_image, profile_error, PROFILE_ERROR_BUDGET
+
+
+@pytest.fixture(scope="module")
+def charts():
+    return synth_charts(12, seed=3)
+
+
+def test_fast_profile_matches_legacy_within_budget(charts):
+    # 업로드 이미지 그대로(축소 없이) 추출 - 기존 엔진 대비 오차 허용치를 크기별로 지킨다
+    for ch in charts:
+        legacy = extract_features_engine(io.BytesIO(ch['png'])); fast = extract_features_fast(io.BytesIO(ch['png']))
+        assert fast[0].shape == (50,) and fast[1].shape[1::-1] == ch['size']
+        assert profile_error(legacy[0], fast[0]) <= PROFILE_ERROR_BUDGET, ch['size']
+        assert fast[2] == legacy[2] == count_candles_engine(decode_image(io.BytesIO(ch['png'])))
+
+
+def test_decoded_image_path_matches_upload_path(charts):
+    ch = charts[0]; img = decode_image(io.BytesIO(ch['png']))
+    a = extract_features_fast(io.BytesIO(ch['png'])); b = extract_features_fast(None, img=img)
+    assert (a[0] == b[0]).all() and a[2] == b[2]
+
+
+def test_undecodable_upload_returns_none():
+    assert extract_features_fast(io.BytesIO(b"not an image")) is None
@@ -0,0 +1,59 @@
+from datetime import datetime
+import license_cache
+from license_cache import LicenseCache, CsvSource, hash_key, LICENSE_TZ, MSG_OK, MSG_EXPIRED, MSG_REVOKED, MSG_INVALID, MSG_INACTIVE
+
+
+def write_csv(path, rows):
+    path.write_text("license_key,status,expiry_date\n" + "".join(f"{k},{s},{e}\n" for k, s, e in rows), encoding="utf-8")
+
+
+class CountingSource(CsvSource):
+    calls = 0
+
+    def __call__(self):
+        self.calls += 1; return super().__call__()
+
+
+def at(text):
+    return datetime.fromisoformat(text).replace(tzinfo=LICENSE_TZ).timestamp()
+
+
+def make_cache(tmp_path, rows, now):
+    csv = tmp_path / "lic.csv"; write_csv(csv, rows); clock = [now]
+    cache = LicenseCache(CountingSource(str(csv)), interval=3600, revoked_file=str(tmp_path / "revoked"), clock=lambda: clock[0])
+    assert cache.refresh()
+    return cache, csv, clock
+
+
+def test_expiry_is_checked_between_refreshes(tmp_path):
+    cache, _, clock = make_cache(tmp_path, [("AAA-1", "active", "2026-10-20"), ("BBB-2", "active", "2026-10-18 12:00"), ("CCC-3", "inactive", "")], at("2026-10-18T11:59"))
+    assert cache.check("AAA-1")[:2] == (True, MSG_OK) and cache.check("BBB-2")[:2] == (True, MSG_OK)
+    assert cache.check("CCC-3")[:2] == (False, MSG_INACTIVE)
+    clock[0] = at("2026-10-18T12:00")  # 다시 읽지 않아도 시각이 지나면 만료
+    assert cache.check("BBB-2")[:2] == (False, MSG_EXPIRED) and cache.check("AAA-1")[0]
+    clock[0] = at("2026-10-20T23:59:59"); assert cache.check("AAA-1")[0]  # 날짜만 있으면 그 날 끝까지
+    clock[0] = at("2026-10-21T00:00"); assert cache.check("AAA-1")[:2] == (False, MSG_EXPIRED)
+    assert cache.source.calls == 1
+
+
+def test_revoke_push_and_file_is_the_source_of_truth(tmp_path):
+    cache, csv, _ = make_cache(tmp_path, [("AAA-1", "active", ""), ("BBB-2", "active", "")], at("2026-10-18T09:00"))
+    other = LicenseCache(CsvSource(str(csv)), revoked_file=cache.revoked_file); other.refresh()  # 다른 프로세스
+    assert cache.check("AAA-1")[0] and other.check("AAA-1")[0]
+    h = cache.revoke("AAA-1")
+    assert h == hash_key("AAA-1") and cache.check("AAA-1")[:2] == (False, MSG_REVOKED) and other.check("AAA-1")[:2] == (False, MSG_REVOKED)
+    assert cache.check("BBB-2")[0]
+    with open(cache.revoked_file, "w", encoding="utf-8") as f: f.write(hash_key("BBB-2") + "\n")  # AAA 줄 삭제 = 해지 취소
+    assert cache.check("AAA-1")[0] and not cache.check("BBB-2")[0]
+    (tmp_path / "revoked").unlink()
+    assert cache.check("BBB-2")[0] and cache.stats()['revoked'] == 0
+
+
+def test_unknown_key_refresh_is_rate_limited(tmp_path, monkeypatch):
+    cache, csv, _ = make_cache(tmp_path, [("AAA-1", "active", "")], at("2026-10-18T09:00"))
+    write_csv(csv, [("AAA-1", "active", ""), ("NEW-9", "active", "")])  # 갱신 사이에 추가된 새 고객
+    assert cache.check("NEW-9")[:2] == (False, MSG_INVALID) and cache.source.calls == 1  # 방금 읽었으면 MIN_REFRESH_GAP 동안 다시 읽지 않는다
+    monkeypatch.setattr(license_cache, "MIN_REFRESH_GAP", 0.0)
+    assert cache.check("NEW-9")[:2] == (True, MSG_OK) and cache.source.calls == 2
+    assert cache.check("NOPE-0")[:2] == (False, MSG_INVALID) and cache.source.calls == 3
+    assert cache.check("AAA-1")[0] and cache.source.calls == 3  # 아는 키는 다시 읽지 않는다
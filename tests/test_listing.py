@@ -0,0 +1,43 @@
+import json
+import pickle
+import numpy as np
+import pytest
+from listing import Listing, ScanResult, as_listing, jsonable
+
+
+@pytest.fixture
+def pairs():
+    return [[f"{i:06d}", f"종목{i} 株式 Co."] for i in range(300)] + [["AAPL", "Apple"], ["9988", "阿里巴巴"]]
+
+
+def test_slices_masks_and_index_arrays_match_list(pairs):
+    listing = Listing.from_pairs("KRX", pairs); mask = np.array([i % 3 == 0 for i in range(len(pairs))])
+    assert len(listing) == len(pairs) and list(listing) == [tuple(p) for p in pairs] and listing[-1] == ("9988", "阿里巴巴")
+    for view, expected in ((listing[:50], pairs[:50]), (listing[250:], pairs[250:]), (listing[10:200:7], pairs[10:200:7]), (listing[::-1], pairs[::-1]),
+                           (listing[mask], [p for p, m in zip(pairs, mask) if m]), (listing[np.array([301, 0, 5])], [pairs[301], pairs[0], pairs[5]]), (listing[5:5], [])):
+        assert list(view) == [tuple(p) for p in expected] and view.code_list() == [p[0] for p in expected]
+        for code, name in expected[:20]: assert view.find(code) == [p[0] for p in expected].index(code) and view.name_of(code) == name
+    assert listing[:50].find("AAPL") == -1 and listing[:50].name_of("AAPL", "?") == "?" and listing[:50][:10][3] == tuple(pairs[3])
+
+
+def test_prepend_and_as_listing(pairs):
+    listing = as_listing(pairs, "KRX"); view = listing[100:110].prepend("AAPL", "Apple")
+    assert as_listing(listing) is listing and view[0] == ("AAPL", "Apple") and list(view)[1:] == [tuple(p) for p in pairs[100:110]] and view.find("000105") == 6
+
+
+@pytest.mark.parametrize("cut", [slice(None), slice(0, 0), slice(120, 140), slice(None, None, -3)])
+def test_pickle_round_trip(pairs, cut):
+    listing = Listing.from_pairs("NYSE", pairs); listing.find("AAPL")  # 정렬 인덱스가 있는 상태도
+    view = listing[cut]; copy = pickle.loads(pickle.dumps(view))
+    assert copy.market == "NYSE" and list(copy) == list(view) and len(copy) == len(view)
+    for code, _ in list(view)[:10]: assert copy.find(code) == view.find(code)
+
+
+def test_scan_result_reads_like_dict_and_pickles():
+    r = ScanResult("005930", "삼성전자", 91.5, 70000.0); r['name'] = "Samsung"
+    assert r['sim'] == 91.5 and 'market' not in r and r.get('market', "KRX") == "KRX" and r.to_dict()['name'] == "Samsung"
+    with pytest.raises(KeyError): r['market']
+    with pytest.raises(KeyError): r['other'] = 1
+    r2 = pickle.loads(pickle.dumps(ScanResult("AAPL", "Apple", 88.0, 1.0, market="NASDAQ")))
+    assert r2['market'] == "NASDAQ" and r2.to_dict() == ScanResult("AAPL", "Apple", 88.0, 1.0, market="NASDAQ").to_dict()
+    assert json.loads(json.dumps([r, np.float32(1.5)], default=jsonable)) == [r.to_dict(), 1.5]
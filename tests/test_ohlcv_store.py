@@ -0,0 +1,60 @@
+import threading
+from datetime import date, datetime, timezone
+import numpy as np
+import pandas as pd
+import pytest
+import ohlcv_store
+from ohlcv_store import OHLCVStore, FixtureSource, expected_session, load_recent_bars
+
+
+def make_frame(n, start="2026-01-05"):
+    close = np.linspace(100.0, 100.0 + n - 1, n)
+    return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': np.full(n, 1000.0)},
+                        index=pd.bdate_range(start, periods=n, name="Date"))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path))
+
+
+def test_update_appends_only_missing_days(store):
+    df = make_frame(30); source = FixtureSource({'005930': df}, as_of=df.index[19])
+    assert store.update("KRX", "005930", source) == 20
+    source.as_of = df.index[-1]
+    assert store.update("KRX", "005930", source) == 10
+    assert source.calls == [("005930", None), ("005930", (df.index[19] + pd.Timedelta(days=1)).strftime("%Y-%m-%d"))]
+    bars = store.read_tail("KRX", "005930", 5)
+    np.testing.assert_array_equal(bars['Close'], df['Close'].to_numpy()[-5:])
+    assert store.update("KRX", "005930", source) == 0 and store.length("KRX", "005930") == 30
+
+
+def test_expected_session_follows_market_close():
+    # 2026-10-16 (금) KRX 마감 15:30 KST = 06:30 UTC, NYSE 마감 16:00 EDT = 20:00 UTC (+ SYNC_DELAY)
+    assert expected_session("KRX", datetime(2026, 10, 16, 6, 0, tzinfo=timezone.utc)) == date(2026, 10, 15)
+    assert expected_session("KRX", datetime(2026, 10, 16, 7, 0, tzinfo=timezone.utc)) == date(2026, 10, 16)
+    assert expected_session("NYSE", datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)) == date(2026, 10, 15)
+    assert expected_session("NYSE", datetime(2026, 10, 16, 21, 0, tzinfo=timezone.utc)) == date(2026, 10, 16)
+    assert expected_session("KRX.W", datetime(2026, 10, 18, 3, 0, tzinfo=timezone.utc)) == date(2026, 10, 16)  # 일요일 -> 금요일
+
+
+def test_scan_before_close_refetches_after_close(store, monkeypatch):
+    df = make_frame(10, start="2026-10-05"); source = FixtureSource({'005930': df}, as_of=df.index[-2])
+    monkeypatch.setattr(ohlcv_store, "expected_session", lambda market, now=None: df.index[-2].date())  # 장중: 전 거래일까지
+    load_recent_bars("KRX", "005930", 5, store=store, source=source)
+    assert store.is_fresh("KRX", "005930") and store.length("KRX", "005930") == 9
+    load_recent_bars("KRX", "005930", 5, store=store, source=source); assert len(source.calls) == 1
+    source.as_of = df.index[-1]
+    monkeypatch.setattr(ohlcv_store, "expected_session", lambda market, now=None: df.index[-1].date())  # 마감 후
+    assert not store.is_fresh("KRX", "005930")
+    bars = load_recent_bars("KRX", "005930", 5, store=store, source=source, frame=False)
+    assert len(source.calls) == 2 and bars['Date'][-1] == np.datetime64(df.index[-1].date())
+
+
+def test_concurrent_updates_fetch_once(store):
+    df = make_frame(50); source = FixtureSource({'000660': df})
+    threads = [threading.Thread(target=store.update, args=("KRX", "000660", source), kwargs={'only_stale': True}) for _ in range(8)]
+    for th in threads: th.start()
+    for th in threads: th.join()
+    assert len(source.calls) == 1 and store.length("KRX", "000660") == 50
+    np.testing.assert_array_equal(store.read_tail("KRX", "000660", 50)['Close'], df['Close'].to_numpy())
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+import ohlcv_store
+from ohlcv_store import OHLCVStore, FixtureSource, COLUMNS
+from prefilter import parse, tokenize, build_expr, prefilter, apply_filters, LastBars, FilterReport
+from scan_engine import screen_stock_legacy
+
+
+def make_frames(n_codes, n=40, seed=0):
+    # 마지막 봉 모양을 골고루 (양봉/음봉/도지/망치/거래정지/동전주/짧은 이력)
+    rng = np.random.default_rng(seed); frames = {}; dates = pd.bdate_range("2026-08-03", periods=n, name="Date")
+    for i in range(n_codes):
+        close = np.abs(100.0 + np.cumsum(rng.normal(0, 1, n))) * (0.01 if i % 11 == 0 else 1.0)
+        o = close * (1 + rng.normal(0, 0.01, n)); body_hi, body_lo = np.maximum(o, close), np.minimum(o, close)
+        h = body_hi + np.abs(close) * rng.exponential(0.005, n); l = body_lo - np.abs(close) * rng.exponential(0.005, n)
+        v = rng.integers(1, 1000, n).astype(float)
+        kind = i % 5
+        if kind == 1: o[-1] = close[-1]  # 도지
+        if kind == 2: o[-1] = close[-1] * 0.999; h[-1] = close[-1] * 1.0005; l[-1] = close[-1] * 0.98  # 망치
+        if kind == 3 and i % 3 == 0: v[-1] = 0.0
+        m = 12 if i % 13 == 0 else n
+        frames[f"{i:06d}"] = pd.DataFrame({'Open': o, 'High': h, 'Low': l, 'Close': close, 'Volume': v}, index=dates)[-m:]
+    return frames
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = OHLCVStore(str(tmp_path)); monkeypatch.setattr(ohlcv_store, "_default_store", store)
+    return store
+
+
+@pytest.mark.parametrize("market", ["KRX", "NYSE"])
+@pytest.mark.parametrize("filters", [(False, False, False), (True, False, False), (False, True, False), (False, False, True)])
+def test_prefilter_matches_scalar_screen(store, monkeypatch, market, filters):
+    frames = make_frames(200); source = FixtureSource(frames)
+    for code in frames: store.update(market, code, source)
+    last = max(df.index[-1] for df in frames.values()).date()
+    monkeypatch.setattr(ohlcv_store, "expected_session", lambda market, now=None: last)
+    codes = sorted(frames); report = FilterReport()
+    mask = prefilter(market, codes, build_expr(*filters), 20, store=store, report=report)
+    scalar = [screen_stock_legacy(code, code, 20, market, *filters, min_days=20) is not None for code in codes]
+    assert list(mask) == scalar
+    assert report.total == len(codes) and report.survivors == sum(scalar) and report.total - sum(report.drops.values()) == report.survivors
+
+
+def test_drop_counts_are_sequential_per_predicate():
+    # 종목: 데이터 없음 / 짧은 이력 / 거래정지 / 망치 아님 / 거래량 부족 / 통과 / (강제 포함, 망치 아님)
+    L = 21; bars = np.full((7, L, len(COLUMNS)), np.nan)
+    hammer = [99.9, 100.05, 98.0, 100.0]; bearish = [101.0, 102.0, 99.0, 100.0]
+    for i, (shape, vol) in enumerate([(hammer, 10.0), (hammer, 10.0), (hammer, 0.0), (bearish, 10.0), (hammer, 1.0), (hammer, 10.0), (bearish, 1.0)]):
+        if i == 0: continue
+        bars[i, :, :4] = bearish; bars[i, :, 4] = 5.0; bars[i, -1, :4] = shape; bars[i, -1, 4] = vol
+    table = LastBars([f"C{i}" for i in range(7)], bars, np.array([0, 5, 30, 30, 30, 30, 30]))
+    report = FilterReport()
+    mask = apply_filters(table, "KRX", "hammer AND volume > 20d avg", min_bars=20, force_codes={"C6"}, report=report)
+    assert list(mask) == [False, False, False, False, False, True, True]
+    assert report.drops == {'no_data': 1, 'short_history': 1, 'tradable': 1, 'hammer': 1, 'volume > 20d avg': 1}
+    assert (report.total, report.survivors) == (7, 2)
+
+
+def test_parse_builds_nested_nodes():
+    node = parse("(bullish OR doji) AND close > 1.5 * 60d avg AND NOT hammer")
+    assert node == ('and', [('or', [('pred', 'bullish'), ('pred', 'doji')]), ('cmp', 'close', '>', ('mul', 1.5, ('avg', 'close', 60))), ('not', ('pred', 'hammer'))])
+    assert tokenize("volume>=20d avg") == ["volume", ">=", "20d avg"]
+
+
+@pytest.mark.parametrize("text", ["volume > 20d avg AND $", "hammer AND 10%", "foo > 1", "close >> 1", "close > avg"])
+def test_parse_rejects_unknown_tokens(text):
+    with pytest.raises(ValueError): parse(text)
+
+
+@pytest.mark.parametrize("text", ["(hammer AND doji", "hammer AND doji)", "((bullish OR doji) AND close > 1", "()", "NOT (", "hammer AND"])
+def test_parse_rejects_unbalanced_expressions(text):
+    with pytest.raises(ValueError): parse(text)
@@ -0,0 +1,23 @@
+import threading
+from scan_scheduler import ScanScheduler
+
+
+def test_queue_position_matches_admission_order():
+    # 예상 순번은 PRO / 무료 두 대기열을 stride 로 번갈아 입장시킨 실제 순서와 같아야 한다
+    # 동시 실행 1건 -> 첫 스캔이 gate 에서 막혀 있는 동안 나머지는 대기열에 쌓이고, 풀리면 한 건씩 차례로 입장
+    sched = ScanScheduler(max_running=1); gate = threading.Event(); order = []; done = threading.Semaphore(0)
+
+    def job(name):
+        def run(flight):
+            order.append(name); gate.wait(5); done.release()
+        return run
+
+    sched.submit("running", job("running"), pro=True)
+    flights = {}
+    for name, pro in (("f1", False), ("p1", True), ("f2", False), ("p2", True), ("p3", True), ("p4", True), ("p5", True)):
+        flights[name], _ = sched.submit(name, job(name), pro=pro)
+    expected = {name: sched.position(f) for name, f in flights.items()}
+    assert sorted(expected.values()) == list(range(1, len(flights) + 1))
+    gate.set()
+    for _ in range(len(flights) + 1): done.acquire(timeout=5)
+    assert sorted(expected, key=expected.get) == order[1:]
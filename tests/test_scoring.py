@@ -0,0 +1,35 @@
+import warnings
+import numpy as np
+import pytest
+from scipy.stats import pearsonr
+from scoring import score_matrix, score_profiles, resample_rows, minmax_rows
+
+
+def scalar_similarity(flow, user_p_norm):
+    # 기존 종목별 계산: MinMax -> np.interp(50점) -> pearsonr(전체 0.7 / 마지막 10점 0.3), 꼬리가 NaN 이면 0
+    n_days = len(flow); rng = np.ptp(flow)
+    s_res = np.interp(np.linspace(0, n_days - 1, 50), np.arange(n_days), (flow - flow.min()) / (rng if rng else 1.0))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        corr_total = pearsonr(user_p_norm, s_res)[0]
+        if np.isnan(corr_total): return np.nan
+        corr_tail = pearsonr(user_p_norm[-10:], s_res[-10:])[0]
+    return ((corr_total * 0.7) + ((0.0 if np.isnan(corr_tail) else corr_tail) * 0.3) + 1) * 50
+
+
+@pytest.mark.parametrize("n_days", [13, 20, 29, 60, 120])
+def test_score_matrix_matches_pearsonr(n_days):
+    rng = np.random.default_rng(n_days); user_p_norm = minmax_rows(np.cumsum(rng.normal(0, 1, 50))[None, :])[0]
+    closes = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, (200, n_days)), axis=1))
+    closes[0] = 500.0  # 평평한 종목 -> NaN
+    closes[1, -n_days // 3:] = closes[1, -n_days // 3 - 1]  # 꼬리만 평평 -> 꼬리 상관계수 0
+    expected = np.array([scalar_similarity(row, user_p_norm) for row in closes]); got = score_matrix(closes, user_p_norm)
+    assert np.isnan(got[0]) and np.isnan(expected[0])
+    np.testing.assert_allclose(got[1:], expected[1:], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(score_profiles(resample_rows(closes), user_p_norm)[1:], expected[1:], rtol=0, atol=1e-9)
+
+
+def test_identical_and_inverted_patterns():
+    u = np.linspace(0, 1, 50) ** 2; closes = np.vstack([100 + 50 * u, 100 - 50 * u])
+    np.testing.assert_allclose(score_matrix(closes, u), [100.0, 0.0], atol=1e-9)
+    assert score_matrix(np.empty((0, 20)), u).shape == (0,)
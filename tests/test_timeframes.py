@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from ohlcv_store import OHLCVStore, DATE_COL, COLUMNS
+from timeframes import aggregate, resample_code, tf_market
+
+
+def make_frame(n, start="2026-01-05"):
+    rng = np.random.default_rng(0); close = 100.0 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': rng.integers(1, 1000, n).astype(float)},
+                        index=pd.bdate_range(start, periods=n, name="Date"))
+
+
+def test_incremental_resample_matches_full(tmp_path):
+    # 진행 중인 마지막 봉만 다시 집계해도 전체 집계와 같아야 한다
+    store = OHLCVStore(str(tmp_path)); df = make_frame(120)
+    for a in range(0, 120, 7):
+        store.append("KRX", "005930", df.iloc[a:a + 7])
+        for tf in ("W", "M"): resample_code("KRX", "005930", tf, store)
+    for tf in ("W", "M"):
+        full, _ = aggregate(store.read_tail("KRX", "005930", 120), tf); got = store.read_tail(tf_market("KRX", tf), "005930", 1000)
+        for col in (DATE_COL,) + COLUMNS: np.testing.assert_array_equal(got[col], full[col])
+
+
+def test_tail_rewrite_keeps_open_maps_valid(tmp_path):
+    # 다른 스캔이 매핑 중인 주봉 파일을 제자리에서 줄이지 않는다 (이전 매핑은 이전 내용을 그대로 본다)
+    store = OHLCVStore(str(tmp_path)); df = make_frame(40)
+    store.append("KRX", "000660", df); resample_code("KRX", "000660", "W", store)
+    old = store.read_tail("KRX.W", "000660", 1000); before = {col: np.array(old[col]) for col in old}
+    store.replace_tail("KRX.W", "000660", 2, None)
+    assert store.length("KRX.W", "000660") == 2
+    for col in old: np.testing.assert_array_equal(old[col], before[col])
+    assert resample_code("KRX", "000660", "W", store) == 40 and store.length("KRX.W", "000660") == len(before['Close'])
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+import scan_engine
+from scan_engine import TopK, iter_scan
+
+
+def rows(n, seed=0):
+    # 점수 동점이 많도록 정수 점수 (동점이면 먼저 들어온 쪽이 앞)
+    rng = np.random.default_rng(seed)
+    return [{'code': f"{i:06d}", 'sim': float(s)} for i, s in enumerate(rng.integers(60, 100, n))]
+
+
+def expected(rs, k, min_sim):
+    return sorted((r for r in rs if r['sim'] >= min_sim), key=lambda r: r['sim'], reverse=True)[:k]
+
+
+@pytest.mark.parametrize("n, k, min_sim", [(0, 5, 80.0), (3, 5, 80.0), (500, 1, 80.0), (500, 20, 80.0), (500, 100, 0.0), (500, 20, 200.0)])
+def test_topk_matches_sorted_prefix(n, k, min_sim):
+    rs = rows(n, seed=n + k); top = TopK(k, min_sim)
+    for r in rs: top.push(r)
+    want = expected(rs, k, min_sim)
+    assert top.items() == want and len(top) == len(want) and top.count == sum(r['sim'] >= min_sim for r in rs)
+    assert top.floor() == (want[-1]['sim'] if len(want) == k else None)
+    if len(want) >= 3: assert top.floor(3) == want[2]['sim']
+
+
+def test_iter_scan_streams_the_same_top_k(monkeypatch):
+    # 점수 계산은 가짜 run_scan 으로 바꾸고 chunk 분할 / 병합 / 조기 종료만 본다
+    table = {r['code']: r['sim'] for r in rows(950, seed=3)}
+    def fake_run_scan(market, patterns, chunk, *args, **kwargs):
+        return {key: sorted(({'code': c, 'sim': table[c]} for c, _ in chunk), key=lambda r: r['sim'], reverse=True) for key in patterns}
+    monkeypatch.setattr(scan_engine, "run_scan", fake_run_scan)
+    stocks = [[c, c] for c in table]; all_rows = [{'code': c, 'sim': s} for c, s in table.items()]
+    steps = list((done, total, {key: t.items() for key, t in tops.items()}) for done, total, tops in iter_scan("KRX", {'p': None}, stocks, min_sim=80.0, k=20, chunk_size=100))
+    assert [d for d, _, _ in steps] == list(range(100, 901, 100)) + [950] and steps[-1][2]['p'] == expected(all_rows, 20, 80.0)
+    done, total, tops = list(iter_scan("KRX", {'p': None}, stocks, min_sim=80.0, k=20, stop_sim=90.0, stop_k=5, chunk_size=100))[-1]
+    seen = [{'code': c, 'sim': table[c]} for c, _ in stocks[:done]]
+    assert done < total and tops['p'].items() == expected(seen, 20, 80.0) and tops['p'].floor(5) >= 90.0
@@ -0,0 +1,101 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from ohlcv_store import DATE_COL, COLUMNS, MARKETS, get_store, load_recent_bars
+
+# --- 🗓️ [주봉/월봉 타임프레임] ---
+# 일봉 저장소에서 주봉(W, 월요일 시작)/월봉(M)을 집계해 같은 저장소의 "<시장>.<W|M>" 시장 폴더에 같은 형식으로 저장한다.
+#   봉 1개 = 구간 첫 시가 / 최고가 / 최저가 / 마지막 종가 / 거래량 합, 날짜는 구간의 마지막 거래일
+# 종목마다 _resample 파일에 (소비한 일봉 수, 마지막 봉이 시작한 일봉 위치, 집계 봉 수) 를 남겨 두고,
+# 새 일봉이 들어오면 마지막(진행 중인) 봉 하나만 지운 뒤 그 봉의 시작 일봉부터 새 일봉까지만 다시 집계해 덧붙인다.
+# 재집계는 종목별 잠금 안에서 하고, 뒷부분은 컬럼 파일을 통째로 바꿔 끼운다 (다른 스캔이 매핑 중인 파일을 제자리에서 줄이지 않는다).
+# 저장 형식이 일봉과 같으므로 사전 필터 / 캔들 판정 / 유사도 계산 / 프로세스 풀 경로를 그대로 쓴다.
+TIMEFRAMES = ("D", "W", "M")
+STATE_FILE = "_resample"
+
+
+def tf_market(market, timeframe="D"):
+    # 저장소에서 쓰는 시장 이름 (일봉은 그대로)
+    return market if timeframe == "D" else f"{market}.{timeframe}"
+
+
+def bucket_ids(dates, timeframe):
+    days = np.asarray(dates, dtype="datetime64[D]")
+    if timeframe == "W": return (days.astype(np.int64) + 3) // 7  # 1970-01-01 은 목요일 -> 월요일 기준 주 번호
+    if timeframe == "M": return days.astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"unknown timeframe: {timeframe}")
+
+
+def aggregate(bars, timeframe):
+    # bars: 날짜 오름차순 {Date, Open, High, Low, Close, Volume} 배열 -> (집계 봉 dict, 봉마다 시작 행 위치)
+    dates = np.asarray(bars[DATE_COL])
+    if len(dates) == 0: return {col: np.asarray(bars[col])[:0] for col in (DATE_COL,) + COLUMNS}, np.zeros(0, dtype=np.int64)
+    ids = bucket_ids(dates, timeframe); starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]); ends = np.r_[starts[1:], len(ids)] - 1
+    o, h, l, c, v = (np.asarray(bars[col], dtype=np.float64) for col in COLUMNS)
+    # 고가/저가는 NaN 을 건너뛰고 (pandas resample 과 같게), 거래량은 NaN 을 0 으로 본다
+    out = {DATE_COL: dates[ends], 'Open': o[starts], 'High': np.fmax.reduceat(h, starts), 'Low': np.fmin.reduceat(l, starts),
+           'Close': c[ends], 'Volume': np.add.reduceat(np.nan_to_num(v), starts)}
+    return out, starts
+
+
+def _state_path(store, market, code, timeframe):
+    return os.path.join(store._dir(tf_market(market, timeframe), code), STATE_FILE)
+
+
+def _read_state(store, market, code, timeframe):
+    try:
+        with open(_state_path(store, market, code, timeframe)) as f: consumed, last_start, n_out = (int(x) for x in f.read().split())
+        return consumed, last_start, n_out
+    except (OSError, ValueError): return None
+
+
+def _write_state(store, market, code, timeframe, consumed, last_start, n_out):
+    p = _state_path(store, market, code, timeframe); os.makedirs(os.path.dirname(p), exist_ok=True)
+    with open(p, "w") as f: f.write(f"{consumed} {last_start} {n_out}")
+
+
+def resample_code(market, code, timeframe, store=None):
+    # 반환: 이번에 다시 집계한 일봉 수 (0 = 이미 최신). 일봉이 다시 만들어졌거나 상태가 안 맞으면 전체 재집계
+    store = store or get_store(); tm = tf_market(market, timeframe)
+    with store.lock(tm, code):
+        n = store.length(market, code); state = _read_state(store, market, code, timeframe); n_out = store.length(tm, code)
+        if state is not None and state[0] == n and state[2] == n_out: return 0
+        if state is None or state[0] > n or state[2] != n_out or n_out == 0: start, keep = 0, 0
+        else: start, keep = state[1], n_out - 1
+        if n == 0: store._replace_tail(tm, code, 0, None); _write_state(store, market, code, timeframe, 0, 0, 0); return 0
+        agg, starts = aggregate(store.read_tail(market, code, n - start), timeframe)
+        added = store._replace_tail(tm, code, keep, pd.DataFrame({col: agg[col] for col in COLUMNS}, index=pd.DatetimeIndex(agg[DATE_COL])))
+        _write_state(store, market, code, timeframe, n, start + int(starts[-1]), keep + added)
+        return n - start
+
+
+def resample_missing(market, codes, timeframe, store=None, report=None, trace=None):
+    # 일봉 동기화 직후 호출: 종목마다 상태 파일 확인 + (새 일봉이 있으면) 마지막 봉 구간만 다시 집계
+    if timeframe == "D": return 0
+    store = store or get_store(); done = 0
+    for code in codes:
+        try: done += resample_code(market, code, timeframe, store) > 0
+        except Exception as e:
+            if report is not None: report.fail(code, e)
+            if trace is not None: trace.exception(e)
+    return done
+
+
+def load_resampled_bars(market, code, n, timeframe="D", store=None, source=None, frame=True):
+    # load_recent_bars 의 타임프레임 버전: 일봉 증분 동기화 -> 마지막 봉 재집계 -> 마지막 n개 봉
+    if timeframe == "D": return load_recent_bars(market, code, n, store=store, source=source, frame=frame)
+    store = store or get_store(); load_recent_bars(market, code, 1, store=store, source=source, frame=False)
+    resample_code(market, code, timeframe, store)
+    return (store.read_tail_frame if frame else store.read_tail)(tf_market(market, timeframe), code, n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="일봉 저장소에서 주봉/월봉 증분 집계 (야간 배치)")
+    parser.add_argument("--market", choices=MARKETS, required=True)
+    parser.add_argument("--timeframes", default="W,M", help="쉼표로 구분된 타임프레임 (W, M)")
+    args = parser.parse_args()
+    store = get_store(); codes = store.codes(args.market)
+    for tf in args.timeframes.split(","):
+        n = resample_missing(args.market, codes, tf, store)
+        print(f"✅ {tf_market(args.market, tf)}: {len(codes)}개 종목 중 {n}개 갱신")
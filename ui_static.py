@@ -0,0 +1,72 @@
+# --- 🌐 [화면 문구 / 공통 스타일] ---
+# Streamlit 은 위젯을 누를 때마다 PythonFile.py 전체를 다시 실행하므로, 세 언어 문구 사전(TRANS)과 테마와 무관한 CSS 를
+# 이 모듈로 옮겨 프로세스당 한 번만 만든다. PRO/무료 테마 색이 들어가는 규칙 몇 개만 PythonFile.py 에서 실행마다 만든다.
+
+TRANS = {
+    "KR": {
+        "sidebar_header": "⚙️ 설정", "license_active": "✅ PRO 라이선스 활성", "license_info": "남은 기간: {}", "logout": "로그아웃 / 리셋",
+        "current_free": "현재: 무료 버전 (Free)", "license_input": "🔑 라이선스 키 입력", "confirm": "인증 확인", "cancel": "취소",
+        "checking": "라이선스 확인 중...", "market_select": "시장 선택", "limit_search": "검색 범위 제한 (전체 {:,}개 중)",
+        "limit_search_free": "검색 범위 제한 (시가총액 상위 {:,}개 중)", "pro_active_msg": "✅ PRO 활성화: {}개 정밀 스캔 가능",
+        "free_limit_msg": "🔒 무료 버전은 시가총액 상위 300개만 스캔 가능", "filter_detail": "🎯 상세 필터 설정 (눌러서 열기)",
+        "filter_bullish": "마지막(최근) 캔들 양봉(상승)만 보기", "filter_doji": "마지막(최근) 캔들 도지(십자가)만 보기",
+        "filter_hammer": "마지막 캔들 양봉/도지이면서 아래꼬리 아주 긴 것(망치형)", "filter_expr": "🧮 추가 조건식 (PRO)", "filter_expr_help": "예: volume > 20d avg, (bullish OR doji) AND close > 1.5 * 60d avg, NOT doji — 필드: open, high, low, close, volume, body, range, upper_shadow, lower_shadow, body_ratio, upper_ratio, lower_ratio", "filter_expr_error": "⚠️ 추가 조건식을 해석할 수 없습니다: {}", "filter_all_markets": "🌏 5개 시장 통합 검색 (AI 인덱스)", "period_set_caption": "⏱️ 분석 기간 설정", "timeframe_label": "🗓️ 봉 단위 (업로드한 차트와 같은 단위 선택)", "timeframe_names": {"D": "일봉", "W": "주봉", "M": "월봉"}, "method_label": "📐 유사도 방식", "method_names": {"pearson": "기본 (상관계수)", "dtw": "DTW (기간이 조금 어긋나도 모양 일치)"},
+        "period_info_fmt": "💠 **[{}]** 기준: AI가 차트에서 **오늘부터 과거 {}일** 치 패턴을 자동 인식하여 분석합니다.",
+        "section1_title": "### 🧬 1. AlphaChart AI 에 기본 장착된 패턴 모델 선택 <span style='font-size:16px; color:#64748b; font-weight:normal;'>(차트매매 대가들이 사용)</span>",
+        "btn_upgrade_view": "👑 PRO 업그레이드 옵션 보기", "btn_close": "닫기",
+        "lbl_sub_title": "💎 월 정기구독", "lbl_sub_badge": "10% 할인", "lbl_one_title": "🎫 단기 이용권 구매",
+        "lbl_day_pass": "1일 이용권", "lbl_month_pass": "1개월 이용권",
+        "guide_html": """<div style="background-color: #e8f4f8; padding: 15px; border-radius: 10px; line-height: 1.6; color: #333;">이 패턴들은 상승 지속형 6개, 하락에서 반등형 9개이며 하락 경직 또는 눌림목 상태이므로,<br>내일 또는 모레 매수해도 단타나 스윙으로 성공할 확률이 높은 대표적인 모델입니다.<br><br>단, 기업가치, 거래량, 뉴스, 공시 등 내재가치와 외부환경은 매매 전에 함께 고려해야 할 것입니다.<br><br>물론, 복잡한 내재와 외부를 고려하지 않고 그냥 매수해도 안전할 확률이 높은 편이지만,<br>돌다리도 두드리고 건널 필요는 있겠지요.<br><br>자! 이제, <span class="mission-highlight">도플갱어를 찾은 후 최종 선택</span>은 여러분의 몫입니다.</div>""",
+        "section2_title": "### 🖼️ 2. 또는 나만의 차트 업로드", "upload_label": "이미지 파일 업로드 (jpg, png)", "upload_caption": "이동평균선 등을 제외하고 캔들차트만 있을수록 정확합니다.",
+        "ai_analysis_badge": "🔍 AI 분석", "ai_pattern_shape": "AI Pattern Shape", "candles_detected": "캔들 <b>{}</b>개 인식됨", "pro_only_model": "🔒 PRO 전용 모델입니다.",
+        "btn_analyze": "🚀 [{}] 분석 시작", "error_pro_only": "PRO 전용 패턴입니다. 업그레이드 후 이용해 주세요.", "error_no_file": "이미지를 분석할 수 없습니다. 파일을 확인해 주세요.",
+        "scanning_msg": "최적의 도플갱어 종목을 스캔 중입니다... {}", "result_title": "### 🏆 분석 결과 (80% 이상 일치: {}개)", "no_result": "80% 이상 일치하는 종목을 찾지 못했습니다.", "fetch_failed_msg": "⚠️ 데이터 수집 실패로 제외된 종목: {}개", "queue_msg": "⏳ 분석 대기 중... 예상 {}번째 순서 (동시 분석 {}건 제한, 잠시만 기다려 주세요)", "coalesced_msg": "🔗 같은 조건의 분석이 이미 진행 중이라 그 결과를 함께 받습니다.", "scan_error_msg": "❌ 분석 중 오류가 발생했습니다: {}", "prefilter_msg": "🧹 캔들 사전 필터: {}개 중 {}개 통과 ({})",
+        "chart_view": "📈 차트 보기", "pc_chart": "💻 PC용 차트", "mo_chart": "📱 모바일용 차트", "locked_msg": "🔒 TOP 6위 이후 결과 및 전종목 정밀 스캔은<br>PRO 버전에서 확인 가능합니다.",
+        "mission_html": """<div class="mission-box">먼저, <span class="mission-highlight">AlphaChart의 미션</span>은 급등주, 대박주를 찾아 투자하도록 돕는 것이 아닙니다. 그런 차트들은 통계적으로 유의하지 않기 때문입니다.<br>즉, 그동안의 급등주, 대박주들의 패턴이 일정하지 않아 성공률이 낮습니다.<br>AlphaChart의 미션은 내일이나 모레 몇프로라도 상승할 확률이 높고 안전한 종목을 찾는 것입니다.<br>안전하다는 것은, 상승 패턴에서는 <span class="mission-highlight">상승이 유지되는 상태</span>, 하락 패턴에서는 드디어 <span class="mission-highlight">상승으로 전환하기 직전</span>의 상태를 말합니다.<br><br>오랜 주식 거래의 경험과 반복을 통해, 캔들의 단순한 형태보다는 수거래일 동안의 <span class="mission-highlight">추세와 마지막 몇개의 캔들 형태를 함께 보는 것</span>이 중요하다는 사실이 수많은 연구자와 투자자들로부터 검증되어 왔습니다.<br><br>이러한 과거의 패턴을 통한 단기의 패턴 예측, 그 중에서도 오늘까지의 차트를 보고 내일의 캔들 형태와 방향을 알고 싶습니다. 그래서, 일일이 상장된 모든 종목을 찾아서 내가 원하는 차트와 유사한 종목을 찾고, 증권사의 프로그램을 통해 원하는 그림을 그리거나 조건을 입력해서 검색해 왔죠. 그러나 무겁고 불편하고 부정확했습니다.<br><br>이제 <span class="mission-highlight">AlphaChart AI</span>가 몇 분만에 도플갱어 종목들을 찾아줄 수 있습니다.<br><br>또, 많은 시행착오를 통해 차트 매매의 대가들이 정립해 놓은 검증된 패턴들을 기본 장착하여, 사용자가 일일이 관심 차트를 찾아 업로드 하지 않아도, 내일이나 모레 매수 할 만한 종목 후보군을 찾을 수 있게 되었습니다.<br><br>차트 매매를 주로 하시는 데이 트레이더, 기업가치와 함께 차트를 같이 보시는 단중기 트레이더 모두 AlphaChart AI를 통해 불필요한 시간 낭비 없이, <span class="mission-highlight">투자의 성공확률을 극대화</span> 하시길 기원합니다.<br><br>세계인이 함께 쓰는 글로벌 서칭 시스템으로서 과부하를 막고 양질의 결과를 도출하기 위해, 부득이 무료버전은 기능을 제한하고 있습니다.<br>추후 서버 증설 등 투자 확대를 통해 무료 범위를 확대할 계획이니 너그러이 양해 부탁드립니다. <br><br>원하는 차트의 도플갱어가 어쩌면 매일 나오지는 않을 수도 있습니다. 하지만 성공률을 높이는 것이 중요하니 또 내일을 기다리면 됩니다.<br><br>앞으로, 위에서 매도해야 하는 패턴도 제공할 계획이며, 계속해서<span class="mission-highlight"> 혁신적인 인사이트</span>를 제시하겠습니다. 감사합니다.</div>"""
+    },
+    "EN": {
+        "sidebar_header": "⚙️ Settings", "license_active": "✅ PRO License Active", "license_info": "Remaining: {}", "logout": "Logout / Reset",
+        "current_free": "Current: Free Version", "license_input": "🔑 Enter License Key", "confirm": "Verify", "cancel": "Cancel",
+        "checking": "Verifying...", "market_select": "Select Market", "limit_search": "Search Limit (Scanning {:,} stocks)",
+        "limit_search_free": "Search Limit (Top {:,} Market Cap)", "pro_active_msg": "✅ PRO Active: Precision scan of {} stocks",
+        "free_limit_msg": "🔒 Free version scans top 300 market cap only", "filter_detail": "🎯 Advanced Filters (Click to expand)",
+        "filter_bullish": "Last candle must be Bullish (Green/Red)", "filter_doji": "Last candle must be Doji (Cross)",
+        "filter_hammer": "Last candle Bullish/Doji with Very Long Lower Shadow (Hammer)", "filter_expr": "🧮 Extra Condition (PRO)", "filter_expr_help": "e.g. volume > 20d avg, (bullish OR doji) AND close > 1.5 * 60d avg, NOT doji — fields: open, high, low, close, volume, body, range, upper_shadow, lower_shadow, body_ratio, upper_ratio, lower_ratio", "filter_expr_error": "⚠️ Could not parse the extra condition: {}", "filter_all_markets": "🌏 Search All 5 Markets (AI Index)", "period_set_caption": "⏱️ Analysis Period", "timeframe_label": "🗓️ Candle Timeframe (match your uploaded chart)", "timeframe_names": {"D": "Daily", "W": "Weekly", "M": "Monthly"}, "method_label": "📐 Similarity Method", "method_names": {"pearson": "Standard (Correlation)", "dtw": "DTW (matches shape even if the period is slightly off)"},
+        "period_info_fmt": "💠 Based on **[{}]**: AI automatically detects and analyzes the pattern of **past {} days from today**.",
+        "section1_title": "### 🧬 1. Select AI Built-in Patterns <span style='font-size:16px; color:#64748b; font-weight:normal;'>(Used by Master Traders)</span>",
+        "btn_upgrade_view": "👑 View PRO Upgrade Options", "btn_close": "Close",
+        "lbl_sub_title": "💎 Monthly Subscription", "lbl_sub_badge": "10% OFF", "lbl_one_title": "🎫 1 Day / 1 Month Pass",
+        "lbl_day_pass": "1 Day Pass", "lbl_month_pass": "1 Month Pass",
+        "guide_html": """<div style="background-color: #e8f4f8; padding: 15px; border-radius: 10px; line-height: 1.6; color: #333;">These patterns consist of 6 bullish continuation types and 9 reversal-from-bottom types. As they represent a state of consolidated decline or pullback,<br>they are representative models with a high probability of success for day or swing trading, even if bought tomorrow or the day after.<br><br>However, intrinsic values and external environments such as corporate value, trading volume, news, and disclosures should be considered together before trading.<br><br>Of course, the probability of safety is high even if you buy without considering complex internal and external factors,<br>but it is necessary to look before you leap.<br><br>Now! After finding the doppelganger, <span class="mission-highlight">the final choice</span> is yours.</div>""",
+        "section2_title": "### 🖼️ 2. Or Upload Your Own Chart", "upload_label": "Upload Image (jpg, png)", "upload_caption": "Accuracy improves if only candlestick charts are present (exclude Moving Averages, etc).",
+        "ai_analysis_badge": "🔍 AI Analysis", "ai_pattern_shape": "AI Pattern Shape", "candles_detected": "<b>{}</b> Candles Detected", "pro_only_model": "🔒 PRO Version Only.",
+        "btn_analyze": "🚀 Start Analysis [{}]", "error_pro_only": "This is a PRO pattern. Please upgrade to use.", "error_no_file": "Cannot analyze image. Please check the file.",
+        "scanning_msg": "Scanning for optimal doppelgangers... {}", "result_title": "### 🏆 Analysis Results (Found {} stocks > 80%)", "no_result": "No stocks found with > 80% similarity.", "fetch_failed_msg": "⚠️ Stocks skipped due to data fetch failures: {}", "queue_msg": "⏳ Waiting in queue... estimated position {} (up to {} analyses run at once, please wait)", "coalesced_msg": "🔗 An identical analysis is already running, sharing its results.", "scan_error_msg": "❌ An error occurred during analysis: {}", "prefilter_msg": "🧹 Candle prefilter: {1} of {0} stocks passed ({2})",
+        "chart_view": "📈 View Chart", "pc_chart": "💻 PC Chart", "mo_chart": "📱 Mobile Chart", "locked_msg": "🔒 Results from Top 6 onwards & Full Scan<br>available in PRO Version.",
+        "mission_html": """<div class="mission-box">First of all, <span class="mission-highlight">AlphaChart's mission</span> is not to help you find skyrocketing or jackpot stocks. This is because such charts are not statistically significant.<br>In other words, the patterns of past jackpot stocks are inconsistent, resulting in a low success rate.<br>AlphaChart's mission is to find safe stocks with a high probability of rising even a few percent tomorrow or the day after.<br>Being safe means a state where <span class="mission-highlight">the rise is maintained</span> in an upward pattern, or a state <span class="mission-highlight">just before turning into a rise</span> in a downward pattern.<br><br>Through extensive experience and repetition in stock trading, it has been verified by numerous researchers and investors that it is more important to look at the <span class="mission-highlight">trend over several trading days combined with the shape of the last few candles</span> rather than the simple shape of a single candle.<br><br>Through predicting short-term patterns using these past patterns, we specifically want to know tomorrow's candle shape and direction based on the chart up to today. Previously, we had to manually search through all listed stocks to find similar charts, or use heavy and inaccurate PC programs to draw patterns or input conditions. However, it was heavy, inconvenient, and inaccurate.<br><br>Now, <span class="mission-highlight">AlphaChart AI</span> can find doppelganger stocks in just a few minutes.<br><br>Also, by equipping verified patterns established by chart trading masters through many trials and errors, you can now find candidate stocks to buy tomorrow or the day after without uploading your own chart.<br><br>We hope that both day traders and short-to-medium term traders who look at charts alongside corporate value will <span class="mission-highlight">maximize their success probability</span> without wasting unnecessary time through AlphaChart AI.<br><br>As a global searching system used by people around the world, we inevitably limit the features of the free version to prevent server overload and ensure high-quality results.<br>We plan to expand the free scope through future investments such as server expansion, so we ask for your generous understanding.<br><br>A doppelganger of the chart you want may not appear every day. However, it is important to increase the success rate, so you can just wait for tomorrow.<br><br>We plan to provide patterns for selling at the top in the future, and we will continue to present <span class="mission-highlight">innovative insights</span>. Thank you.</div>"""
+    },
+    "JP": {
+        "sidebar_header": "⚙️ 設定", "license_active": "✅ PROライセンス有効", "license_info": "残り期間: {}", "logout": "ログアウト / リセット",
+        "current_free": "現在: 無料版 (Free)", "license_input": "🔑 ライセンスキー入力", "confirm": "確認", "cancel": "キャンセル",
+        "checking": "確認中...", "market_select": "市場選択", "limit_search": "検索範囲制限 (全体 {:,} 銘柄中)",
+        "limit_search_free": "検索範囲制限 (時価総額上位 {:,} 銘柄)", "pro_active_msg": "✅ PRO有効化: {}銘柄 精密スキャン",
+        "free_limit_msg": "🔒 無料版は時価総額上位300銘柄のみスキャン可能", "filter_detail": "🎯 詳細フィルタ設定 (クリックして展開)",
+        "filter_bullish": "直近ローソク足が「陽線」のみ", "filter_doji": "直近ローソク足が「十字線(同時線)」のみ",
+        "filter_hammer": "直近ローソク足が陽線/十字で下ヒゲが非常に長いもの (ハンマー)", "filter_expr": "🧮 追加条件式 (PRO)", "filter_expr_help": "例: volume > 20d avg, (bullish OR doji) AND close > 1.5 * 60d avg, NOT doji — フィールド: open, high, low, close, volume, body, range, upper_shadow, lower_shadow, body_ratio, upper_ratio, lower_ratio", "filter_expr_error": "⚠️ 追加条件式を解釈できません: {}", "filter_all_markets": "🌏 5市場統合検索 (AIインデックス)", "period_set_caption": "⏱️ 分析期間設定", "timeframe_label": "🗓️ 足の種類 (アップロードしたチャートと同じ種類を選択)", "timeframe_names": {"D": "日足", "W": "週足", "M": "月足"}, "method_label": "📐 類似度方式", "method_names": {"pearson": "標準 (相関係数)", "dtw": "DTW (期間が多少ずれても形状一致)"},
+        "period_info_fmt": "💠 **[{}]** 基準: AIがチャートから **今日から過去{}日分** のパターンを自動認識して分析します。",
+        "section1_title": "### 🧬 1. AlphaChart AI 搭載のパターンモデルを選択 <span style='font-size:16px; color:#64748b; font-weight:normal;'>(チャート売買の大家たちが使用)</span>",
+        "btn_upgrade_view": "👑 PROアップグレードオプションを見る", "btn_close": "閉じる",
+        "lbl_sub_title": "💎 月額定期購読", "lbl_sub_badge": "10%割引", "lbl_one_title": "🎫 1日 / 1ヶ月利用券",
+        "lbl_day_pass": "1日 利用券", "lbl_month_pass": "1ヶ月 利用券",
+        "guide_html": """<div style="background-color: #e8f4f8; padding: 15px; border-radius: 10px; line-height: 1.6; color: #333;">これらのパターンは上昇持続型6つ、下落からの反発型9つであり、下落硬直または押し目買いの状態にあるため、<br>明日や明後日に購入してもデイトレやスイングトレードで成功する確率が高い代表的なモデルです。<br><br>ただし、企業価値、出来高、ニュース、開示情報などの本質的価値と外部環境は、売買前に併せて考慮する必要があります。<br><br>もちろん、複雑な内外要因を考慮せずに購入しても安全である確率は高い方ですが、<br>石橋を叩いて渡る必要はあるでしょう。<br><br>さあ！ドッペルゲンガーを見つけた後の<span class="mission-highlight">最終選択</span>は、あなたの役割です。</div>""",
+        "section2_title": "### 🖼️ 2. または自分のチャートをアップロード", "upload_label": "画像ファイルアップロード (jpg, png)", "upload_caption": "移動平均線などを除き、ローソク足チャートのみであるほど正確です。",
+        "ai_analysis_badge": "🔍 AI分析", "ai_pattern_shape": "AI Pattern Shape", "candles_detected": "ローソク足 <b>{}</b>本 認識", "pro_only_model": "🔒 PRO専用モデルです。",
+        "btn_analyze": "🚀 [{}] 分析開始", "error_pro_only": "PRO専用パターンです。アップグレードしてご利用ください。", "error_no_file": "画像を分析できません。ファイルを確認してください。",
+        "scanning_msg": "最適なドッペルゲンガー銘柄をスキャン中... {}", "result_title": "### 🏆 分析結果 (80%以上一致: {}件)", "no_result": "80%以上一致する銘柄が見つかりませんでした。", "fetch_failed_msg": "⚠️ データ取得失敗により除外された銘柄: {}件", "queue_msg": "⏳ 分析待ち... 推定{}番目 (同時分析は{}件まで、しばらくお待ちください)", "coalesced_msg": "🔗 同じ条件の分析が進行中のため、その結果を共有します。", "scan_error_msg": "❌ 分析中にエラーが発生しました: {}", "prefilter_msg": "🧹 ローソク足事前フィルタ: {}件中 {}件通過 ({})",
+        "chart_view": "📈 チャートを見る", "pc_chart": "💻 PC用チャート", "mo_chart": "📱 モバイル用チャート", "locked_msg": "🔒 6位以降の結果および全銘柄スキャンは<br>PROバージョンで確認可能です。",
+        "mission_html": """<div class="mission-box">まず、<span class="mission-highlight">AlphaChartのミッション</span>は、急騰株や大化け株を探して投資を助けることではありません。そのようなチャートは統計的に有意ではないためです。<br>つまり、これまでの急騰株や大化け株のパターンは一定しておらず、成功率が低いのです。<br>AlphaChartのミッションは、明日や明後日に数パーセントでも上昇する確率が高く、安全な銘柄を見つけることです。<br>安全とは、上昇パターンでは<span class="mission-highlight">上昇が維持されている状態</span>、下落パターンではついに<span class="mission-highlight">上昇に転じる直前</span>の状態を指します。<br><br>長年の株式取引の経験と反復を通じて、単なるローソク足の形よりも、数取引日間の<span class="mission-highlight">トレンドと最後の数本のローソク足の形を共に見ること</span>が重要であるという事実が、数多くの研究者や投資家によって検証されてきました。<br><br>このような過去のパターンを通じた短期パターン予測、その中でも私たちは今日までのチャートを見て、明日のローソク足の形と方向を知りたいのです。これまでは、上場されている全銘柄から自分が望むチャートと類似した銘柄を手作業で探したり、証券会社の重いプログラムを使って絵を描いたり条件を入力して検索してきました。しかし、それは重くて不便で、不正確でした。<br><br>今や<span class="mission-highlight">AlphaChart AI</span>が数分でドッペルゲンガー銘柄を見つけ出します。<br><br>また、多くの試行錯誤を経てチャート売買の大家たちが確立した検証済みのパターンを基本搭載しており、ユーザーがわざわざ関心のあるチャートを探してアップロードしなくても、明日や明後日に購入すべき銘柄候補群を見つけることができます。<br><br>チャート売買を主とするデイトレーダーの方も、企業価値と共にチャートを見るスイングトレーダーの方も、AlphaChart AIを通じて不必要な時間の浪費なく、<span class="mission-highlight">投資の成功確率を最大化</span>されることを祈念いたします。<br><br>世界中の人々が共に使用するグローバルサーチングシステムとして、過負荷を防ぎ良質な結果を導き出すために、やむを得ず無料版は機能を制限しております。<br>今後、サーバー増設などの投資拡大を通じて無料範囲を拡大する計画ですので、何卒寛大なご理解をお願い申し上げます。<br><br>ご希望のチャートのドッペルゲンガーは、毎日現れるわけではないかもしれません。しかし、成功率を高めることが重要ですので、また明日を待てばよいのです。<br><br>今後、高値で売却すべきパターンも提供する計画であり、引き続き<span class="mission-highlight">革新的なインサイト</span>を提示してまいります。ありがとうございます。</div>"""
+    }
+}
+
+# 테마와 무관한 공통 CSS (웹 폰트, 애니메이션, 카드/버튼 레이아웃)
+BASE_STYLE = """<style>@import url('https://fonts.googleapis.com/css2?family=Pretendard:wght@400;700;800;900&display=swap'); * { font-family: 'Pretendard', sans-serif; } .stApp { background-color: #f8fafc; color: #1e293b; } @keyframes dynamic-pulse { 0% { transform: translateY(0px) scale(1); filter: drop-shadow(0 5px 15px rgba(56, 189, 248, 0.4)); } 50% { transform: translateY(-8px) scale(1.03); filter: drop-shadow(0 15px 25px rgba(56, 189, 248, 0.7)); } 100% { transform: translateY(0px) scale(1); filter: drop-shadow(0 5px 15px rgba(56, 189, 248, 0.4)); } } @media (max-width: 768px) { [data-testid="stSidebarCollapsedControl"] { background: linear-gradient(45deg, #FFD700, #FF8C00) !important; border-radius: 50% !important; border: 2px solid white !important; width: 3.5rem !important; height: 3.5rem !important; box-shadow: 0 0 15px rgba(255, 215, 0, 0.9) !important; top: 0.5rem !important; left: 0.5rem !important; animation: attention-pulse 1.5s infinite !important; display: flex !important; align-items: center !important; justify-content: center !important; z-index: 999999 !important; } [data-testid="stSidebarCollapsedControl"] svg { fill: black !important; stroke: black !important; width: 2rem !important; height: 2rem !important; } .mobile-guide-text { position: fixed; top: 1.2rem; left: 4.5rem; color: #b45309; font-weight: 900; font-size: 14px; z-index: 999999; background: rgba(255, 255, 255, 0.95); padding: 6px 12px; border-radius: 20px; border: 2px solid #fbbf24; box-shadow: 0 4px 10px rgba(0,0,0,0.15); animation: text-pulse 2s infinite; pointer-events: none; } } @media (min-width: 769px) { .mobile-guide-text { display: none; } } @keyframes attention-pulse { 0% { transform: scale(1); box-shadow: 0 0 0 0 rgba(251, 191, 36, 0.7); } 70% { transform: scale(1.15); box-shadow: 0 0 0 15px rgba(251, 191, 36, 0); } 100% { transform: scale(1); box-shadow: 0 0 0 0 rgba(251, 191, 36, 0); } } @keyframes text-pulse { 0% { transform: scale(1); box-shadow: 0 0 0 0 rgba(251, 191, 36, 0.4); } 50% { transform: scale(1.05); box-shadow: 0 0 10px rgba(251, 191, 36, 0.2); } 100% { transform: scale(1); box-shadow: 0 0 0 0 rgba(251, 191, 36, 0.4); } } div.stButton > button { width: 100%; min-height: 4.5rem; height: auto; white-space: pre-wrap !important; word-wrap: break-word; line-height: 1.4 !important; padding: 8px 5px !important; vertical-align: middle; font-size: 14px !important; } .pro-badge { background: #fbbf24; color: black; font-weight: 900; padding: 2px 8px; border-radius: 4px; font-size: 14px; vertical-align: middle; margin-left: 10px; } .upgrade-pro-btn { display: inline-block; padding: 15px 50px; margin-top: 25px; background: linear-gradient(135deg, #fbbf24 0%, #f59e0b 100%); color: #000 !important; font-weight: 900; font-size: 20px; text-decoration: none; border-radius: 50px; border: 2px solid #ffffff; transition: transform 0.2s; box-shadow: 0 4px 6px rgba(0,0,0,0.1); } .upgrade-pro-btn:hover { transform: scale(1.05); box-shadow: 0 6px 8px rgba(0,0,0,0.2); } .mission-box { background: white; padding: 25px; border-radius: 15px; border: 1px solid #e2e8f0; margin-bottom: 1.5rem; line-height: 1.8; color: #334155; font-size: 17px; word-break: keep-all; overflow-wrap: break-word; } .result-card { padding: 18px; border-radius: 12px; background: white; border: 1px solid #e2e8f0; margin-bottom: 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.02); } .spark-img { display: block; width: 100%; height: 64px; margin-bottom: 12px; } .stock-info { display: flex; align-items: center; justify-content: space-between; margin-bottom: 12px; } .stock-name { font-weight: 900; font-size: 19px; color: #0f172a; } .stock-code { font-size: 13px; color: #64748b; background: #f1f5f9; padding: 2px 6px; border-radius: 4px; margin-left: 5px; } .btn-row { display: flex; gap: 8px; flex-wrap: wrap; } .custom-btn { display: inline-flex; align-items: center; justify-content: center; padding: 8px 16px; border-radius: 8px; text-decoration: none !important; font-size: 13px; font-weight: bold; transition: 0.2s; border: none; cursor: pointer; } .btn-pc { background: #f1f5f9; color: #475569 !important; border: 1px solid #cbd5e1; } .btn-pc:hover { background: #e2e8f0; color: #1e293b !important; } .btn-mo { background: #03c75a; color: white !important; border: 1px solid #03c75a; } .btn-mo:hover { background: #02b351; color: white !important; } .locked-card { padding: 20px; border-radius: 12px; background: #fffbeb; border: 2px dashed #fbbf24; text-align: center; color: #b45309; font-weight: bold; margin-top: 10px; } .info-tag { background: #e0f2fe; color: #0369a1; padding: 3px 8px; border-radius: 4px; font-size: 12px; font-weight: bold; margin-right: 5px; }</style>"""